@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesure du débit HTTP d'un serveur TestGyver en cours d'exécution.
+
+Envoie des requêtes GET depuis plusieurs threads (une connexion persistante
+par thread) et affiche le débit et les percentiles de latence. Lancer la
+même mesure sur chaque mode de start.sh (dev, eventlet, gunicorn) pour les
+comparer :
+
+    python3 _build/bench_server.py --url http://127.0.0.1:5000/health --requests 2000 --concurrency 50
+"""
+
+import argparse
+import http.client
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, ratio):
+    """Retourne le percentile `ratio` (0-1) d'une liste triée."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(ratio * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_benchmark(url, total_requests, concurrency, timeout=10, headers=None):
+    """
+    Exécute la mesure.
+
+    Args:
+        url: URL appelée (http ou https)
+        total_requests: Nombre total de requêtes
+        concurrency: Nombre de threads clients
+        timeout: Délai maximal d'une requête (secondes)
+        headers: En-têtes HTTP supplémentaires
+
+    Returns:
+        dict: Nombre de requêtes, erreurs, durée, débit et latences (ms)
+    """
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def client():
+        """Envoie des requêtes jusqu'à épuisement du compteur partagé."""
+        connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        local_latencies = []
+        local_errors = []
+
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers or {})
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    local_errors.append(f"HTTP {response.status}")
+                else:
+                    local_latencies.append((time.perf_counter() - started) * 1000)
+            except (OSError, http.client.HTTPException) as e:
+                local_errors.append(type(e).__name__)
+                connection.close()
+                connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total_requests,
+        'succeeded': len(latencies),
+        'errors': len(errors),
+        'error_types': sorted(set(errors)),
+        'duration': duration,
+        'rps': len(latencies) / duration if duration > 0 else 0.0,
+        'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p90': percentile(latencies, 0.90),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1] if latencies else 0.0
+    }
+
+
+def main():
+    """Lance la mesure et affiche le résultat."""
+    parser = argparse.ArgumentParser(description="Mesure du débit HTTP de TestGyver")
+    parser.add_argument('--url', default='http://127.0.0.1:5000/health', help="URL appelée")
+    parser.add_argument('--requests', type=int, default=2000, help="Nombre total de requêtes")
+    parser.add_argument('--concurrency', type=int, default=50, help="Nombre de clients simultanés")
+    parser.add_argument('--token', default=None, help="Jeton JWT (en-tête Authorization) pour les routes /api")
+    args = parser.parse_args()
+
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else None
+
+    print("=" * 60)
+    print(f"Mesure du débit: {args.url}")
+    print(f"{args.requests} requêtes, {args.concurrency} clients simultanés")
+    print("=" * 60)
+
+    result = run_benchmark(args.url, args.requests, args.concurrency, headers=headers)
+
+    print(f"Réussies     : {result['succeeded']}/{result['requests']}")
+    if result['errors']:
+        print(f"Erreurs      : {result['errors']} ({', '.join(result['error_types'])})")
+    print(f"Durée        : {result['duration']:.2f} s")
+    print(f"Débit        : {result['rps']:.1f} req/s")
+    print(f"Latence (ms) : moyenne {result['mean']:.1f} | p50 {result['p50']:.1f} | "
+          f"p90 {result['p90']:.1f} | p99 {result['p99']:.1f} | max {result['max']:.1f}")
+
+    return 0 if result['errors'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
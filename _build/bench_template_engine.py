@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark du moteur de substitution des variables.
+
+Compare l'implémentation historique (trois re.sub par chaîne et par exécution)
+au moteur compilé, sans cache puis avec cache des plans, sur des valeurs
+d'action de tailles croissantes.
+
+    python3 _build/bench_template_engine.py [--repeat N]
+"""
+
+import sys
+import os
+import re
+import timeit
+
+# Ajouter le répertoire racine au path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.template_engine import TemplateEngine
+
+
+def legacy_resolve(value, variables_dict, test_variables):
+    """Implémentation historique des exécuteurs (référence)."""
+    if isinstance(value, str):
+        def replace_testgyver(match):
+            return str(variables_dict.get(match.group(1), match.group(0)))
+
+        def replace_test(match):
+            return str(test_variables.get(f"app.{match.group(1)}", match.group(0)))
+
+        def replace_collection(match):
+            return str(variables_dict.get(f"test.{match.group(1)}", match.group(0)))
+
+        value = re.sub(r'\{\{([^.}]+)\}\}', replace_testgyver, value)
+        value = re.sub(r'\{\{app\.([^}]+)\}\}', replace_test, value)
+        value = re.sub(r'\{\{test\.([^}]+)\}\}', replace_collection, value)
+        return value
+    if isinstance(value, dict):
+        return {k: legacy_resolve(v, variables_dict, test_variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [legacy_resolve(v, variables_dict, test_variables) for v in value]
+    return value
+
+
+def build_payload(size):
+    """Construit une valeur d'action type requête HTTP avec `size` éléments dans le corps."""
+    return {
+        'method': 'POST',
+        'url': '{{api_url}}/campains/{{test.campain_id}}/items',
+        'headers': {
+            'Authorization': 'Bearer {{app.token}}',
+            'Content-Type': 'application/json',
+            'X-Test-Id': '{{test.test_id}}'
+        },
+        'body': [
+            {
+                'id': index,
+                'name': f'element-{index}',
+                'owner': '{{app.user_id}}',
+                'path': '{{test.work_dir}}/data/' + str(index),
+                'description': 'Texte libre sans aucune variable à remplacer pour cet élément',
+                'enabled': True
+            }
+            for index in range(size)
+        ]
+    }
+
+
+def main():
+    """Lance le benchmark et affiche les temps moyens par rendu."""
+    repeat = 5
+    if '--repeat' in sys.argv:
+        repeat = int(sys.argv[sys.argv.index('--repeat') + 1])
+
+    variables_dict = {
+        'api_url': 'https://api.example.com',
+        'test.test_id': '6543a1b2c3d4e5f6a7b8c9d0',
+        'test.campain_id': '6543a1b2c3d4e5f6a7b8c9d1',
+        'test.work_dir': '/app/workdir/6543a1b2c3d4e5f6a7b8c9d1/work'
+    }
+    test_variables = {'app.token': 'eyJhbGciOiJIUzI1NiJ9.e30', 'app.user_id': '42'}
+
+    print("=" * 78)
+    print("Benchmark de la substitution des variables (temps moyen par rendu)")
+    print("=" * 78)
+    print(f"{'éléments':>9} | {'historique':>12} | {'compilé':>12} | {'compilé+cache':>14} | {'gain':>6}")
+    print("-" * 78)
+
+    for size in (1, 10, 100, 1000):
+        payload = build_payload(size)
+        number = max(1, 2000 // size)
+
+        engine = TemplateEngine()
+        cached = engine.render(payload, variables_dict, test_variables, cache_key=('bench', 0, 0))
+        assert cached == legacy_resolve(payload, variables_dict, test_variables)
+
+        legacy = min(timeit.repeat(lambda: legacy_resolve(payload, variables_dict, test_variables), number=number, repeat=repeat)) / number
+        compiled = min(timeit.repeat(lambda: engine.render(payload, variables_dict, test_variables), number=number, repeat=repeat)) / number
+        with_cache = min(timeit.repeat(lambda: engine.render(payload, variables_dict, test_variables, cache_key=('bench', 0, 0)), number=number, repeat=repeat)) / number
+
+        print(f"{size:>9} | {legacy * 1e6:>9.1f} µs | {compiled * 1e6:>9.1f} µs | {with_cache * 1e6:>11.1f} µs | {legacy / with_cache:>5.1f}x")
+
+    print("-" * 78)
+    print("« compilé » : analyse de la valeur à chaque rendu ; « compilé+cache » : plan réutilisé")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de diagnostic des index MongoDB.
+
+Exécute explain() sur les requêtes des modèles et signale les parcours
+complets de collection (COLLSCAN). À lancer depuis la racine du projet :
+
+    python3 _build/check_indexes.py [--create]
+"""
+
+import sys
+import os
+
+# Ajouter le répertoire parent au path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.indexes import ensure_indexes, explain_queries
+
+
+def main():
+    """Affiche le plan d'exécution de chaque requête des modèles."""
+    print("=" * 60)
+    print("Diagnostic des index MongoDB TestGyver")
+    print("=" * 60)
+    print()
+    
+    if '--create' in sys.argv:
+        print("Provisionnement des index...")
+        for entry in ensure_indexes():
+            status = "OK" if entry['status'] == 'ok' else f"ERREUR: {entry['error']}"
+            print(f"   {entry['collection']}.{entry['name'] or entry['keys']}: {status}")
+        print()
+    
+    results = explain_queries()
+    collscans = [result for result in results if result['collscan']]
+    
+    for result in results:
+        marker = "✗ COLLSCAN" if result['collscan'] else "✓"
+        index = result['index'] or '-'
+        print(f"{marker} [{result['collection']}] {result['query']}")
+        print(f"     index: {index} | étapes: {' > '.join(result['stages'])}")
+    
+    print()
+    if collscans:
+        print(f"✗ {len(collscans)} requête(s) sans index sur {len(results)}")
+        print("   Lancez 'python3 _build/check_indexes.py --create' pour créer les index attendus")
+        return 1
+    
+    print(f"✓ Toutes les requêtes ({len(results)}) utilisent un index")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -106,7 +106,7 @@ class TestCollectionVariables:
             return False
         
         # Vérifier l'assignation de test.files_dir
-        if "variables_dict['test.files_dir']" in content:
+        if "base_variables['test.files_dir']" in content:
             print_success("Variable 'test.files_dir' assignée dans campain_executor")
         else:
             self.errors.append("Variable 'test.files_dir' non assignée")
@@ -114,7 +114,7 @@ class TestCollectionVariables:
             return False
         
         # Vérifier l'assignation de test.work_dir
-        if "variables_dict['test.work_dir']" in content:
+        if "base_variables['test.work_dir']" in content:
             print_success("Variable 'test.work_dir' assignée dans campain_executor")
         else:
             self.errors.append("Variable 'test.work_dir' non assignée")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test de l'histogramme de latences (utils/latency_histogram.py).
+Vérifie la précision des percentiles, la fusion et le résumé en millisecondes.
+"""
+
+import sys
+import os
+import math
+import random
+
+# Ajouter le répertoire racine au path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.latency_histogram import LatencyHistogram
+
+
+def exact_percentile(values, percent):
+    """Percentile exact (rang supérieur) servant de référence."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(round(len(ordered) * percent / 100.0, 6)))
+    return ordered[rank - 1]
+
+
+def test_empty():
+    """Test d'un histogramme sans mesure."""
+    histogram = LatencyHistogram()
+    assert histogram.count == 0
+    assert histogram.percentile(99) == 0
+    assert histogram.mean() == 0.0
+    assert histogram.summary()['p99'] == 0.0
+    print("✅ Histogramme vide")
+
+
+def test_small_values_exact():
+    """Test des petites valeurs, conservées sans arrondi."""
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record_us(value)
+
+    assert histogram.count == 100
+    assert histogram.min == 1 and histogram.max == 100
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert histogram.percentile(100) == 100
+    assert histogram.mean() == 50.5
+    print("✅ Petites valeurs exactes")
+
+
+def test_relative_precision():
+    """Test de l'erreur relative des percentiles sur une distribution étalée."""
+    rng = random.Random(42)
+    values = [int(rng.lognormvariate(9, 1.5)) for _ in range(20000)]
+
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record_us(value)
+
+    bound = 2.0 ** -(histogram.precision_bits - 1)
+    for percent in (1, 25, 50, 75, 90, 99, 99.9):
+        expected = exact_percentile(values, percent)
+        measured = histogram.percentile(percent)
+        assert measured >= expected, f"p{percent} sous-estimé : {measured} < {expected}"
+        assert (measured - expected) <= expected * bound, f"p{percent} imprécis : {measured} vs {expected}"
+
+    assert histogram.percentile(100) == max(values)
+    assert len(histogram.counts) < 1000
+    print("✅ Erreur relative bornée, mémoire indépendante du nombre de mesures")
+
+
+def test_record_seconds():
+    """Test de l'enregistrement en secondes."""
+    histogram = LatencyHistogram()
+    histogram.record(0.25)
+    histogram.record(0.0005)
+    assert histogram.max == 250000
+    assert histogram.min == 500
+    print("✅ Conversion secondes → microsecondes")
+
+
+def test_merge():
+    """Test de la fusion d'histogrammes (un par utilisateur virtuel)."""
+    rng = random.Random(7)
+    parts = [LatencyHistogram() for _ in range(4)]
+    combined = LatencyHistogram()
+    for index in range(8000):
+        value = rng.randint(100, 500000)
+        parts[index % 4].record_us(value)
+        combined.record_us(value)
+
+    merged = LatencyHistogram()
+    merged.merge(LatencyHistogram())
+    for part in parts:
+        merged.merge(part)
+
+    assert merged.count == combined.count
+    assert merged.counts == combined.counts
+    assert (merged.min, merged.max, merged.total) == (combined.min, combined.max, combined.total)
+    for percent in (50, 90, 99):
+        assert merged.percentile(percent) == combined.percentile(percent)
+
+    try:
+        merged.merge(LatencyHistogram(precision_bits=4))
+        assert False, "Fusion de précisions différentes acceptée"
+    except ValueError:
+        pass
+    print("✅ Fusion d'histogrammes")
+
+
+def test_summary_and_buckets():
+    """Test du résumé en millisecondes et de la distribution."""
+    histogram = LatencyHistogram()
+    for value in (1000, 2000, 3000, 300000):
+        histogram.record_us(value)
+
+    summary = histogram.summary((50, 99.9))
+    assert summary['count'] == 4
+    assert summary['max'] == 300.0
+    assert summary['min'] == 1.0
+    assert 'p50' in summary and 'p99.9' in summary
+    assert summary['p99.9'] == 300.0
+
+    buckets = histogram.buckets()
+    assert sum(count for _, _, count in buckets) == 4
+    assert all(lower <= upper for lower, upper, _ in buckets)
+    assert [lower for lower, _, _ in buckets] == sorted(lower for lower, _, _ in buckets)
+    print("✅ Résumé et distribution")
+
+
+def run_all_tests():
+    """Exécute tous les tests."""
+    print("=" * 60)
+    print("Tests de l'histogramme de latences")
+    print("=" * 60)
+
+    try:
+        test_empty()
+        test_small_values_exact()
+        test_relative_precision()
+        test_record_seconds()
+        test_merge()
+        test_summary_and_buckets()
+
+        print("\n" + "=" * 60)
+        print("✅ TOUS LES TESTS SONT PASSÉS")
+        print("=" * 60)
+        return True
+    except AssertionError as e:
+        print(f"\n❌ ÉCHEC DU TEST : {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de test du moteur de substitution des variables (utils/template_engine.py).
+Vérifie l'équivalence avec les trois substitutions successives historiques.
+"""
+
+import sys
+import os
+import re
+
+# Ajouter le répertoire racine au path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.template_engine import TemplateEngine, compile_value, resolve_variables
+
+
+def legacy_resolve(value, variables_dict, test_variables):
+    """Implémentation historique (trois re.sub successifs) servant de référence."""
+    if isinstance(value, str):
+        value = re.sub(r'\{\{([^.}]+)\}\}', lambda m: str(variables_dict.get(m.group(1), m.group(0))), value)
+        value = re.sub(r'\{\{app\.([^}]+)\}\}', lambda m: str(test_variables.get(f"app.{m.group(1)}", m.group(0))), value)
+        value = re.sub(r'\{\{test\.([^}]+)\}\}', lambda m: str(variables_dict.get(f"test.{m.group(1)}", m.group(0))), value)
+        return value
+    if isinstance(value, dict):
+        return {k: legacy_resolve(v, variables_dict, test_variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [legacy_resolve(v, variables_dict, test_variables) for v in value]
+    return value
+
+
+VARIABLES = {
+    'url_base': 'https://exemple.com',
+    'port': 8080,
+    'chemin': '{{test.work_dir}}/entrant',
+    'jeton': '{{app.token}}',
+    'test.test_id': '34843848343',
+    'test.campain_id': 'camp_12345',
+    'test.work_dir': '/workdir/camp_12345/work'
+}
+
+TEST_VARIABLES = {
+    'app.token': 'abc123xyz',
+    'app.session': None,
+    'app.lien': '{{test.test_id}}'
+}
+
+CASES = [
+    '{{test.test_id}}',
+    '{{url_base}}:{{port}}/api/{{test.campain_id}}',
+    'Bearer {{app.token}}',
+    '{{inconnue}} et {{app.inconnue}} et {{test.inconnue}}',
+    '{{app.session}}',
+    '{{chemin}}/fichier.txt',
+    '{{jeton}}',
+    '{{app.lien}}',
+    '{{autre.section}}',
+    '{{app}} {{test}}',
+    'aucune variable',
+    '{{}} {{app.}} {{url_base}',
+    '',
+]
+
+
+def test_strings_match_legacy():
+    """Chaque cas produit le même résultat que l'implémentation historique."""
+    print("\n=== Équivalence avec l'implémentation historique ===")
+    for case in CASES:
+        expected = legacy_resolve(case, VARIABLES, TEST_VARIABLES)
+        result = resolve_variables(case, VARIABLES, TEST_VARIABLES)
+        assert result == expected, f"{case!r}: {result!r} != {expected!r}"
+        print(f"✅ {case!r} -> {result!r}")
+
+
+def test_nested_structures():
+    """Les dict/list imbriqués sont reconstruits, les autres types conservés."""
+    print("\n=== Structures imbriquées ===")
+    value = {
+        'url': '{{url_base}}/users/{{app.token}}',
+        'headers': {'X-Test': '{{test.test_id}}', 'X-Port': 8080},
+        'files': ['{{test.work_dir}}/a.txt', 'b.txt', None, True],
+        'timeout': 30
+    }
+    expected = legacy_resolve(value, VARIABLES, TEST_VARIABLES)
+    result = resolve_variables(value, VARIABLES, TEST_VARIABLES)
+    assert result == expected, f"{result!r} != {expected!r}"
+    assert result is not value and result['headers'] is not value['headers']
+    assert result['files'] is not value['files']
+    print("✅ Résultat identique, nouveaux conteneurs")
+
+
+def test_constants():
+    """Les chaînes sans variable ne sont pas découpées."""
+    print("\n=== Constantes ===")
+    plan = compile_value({'a': 'texte', 'b': '{{x.y}}', 'c': 1})
+    for _, item in plan.items:
+        assert item.__class__.__name__ == 'Constant', item
+    print("✅ Chaînes sans variable compilées en constantes")
+
+
+def test_cache():
+    """Le plan est compilé une fois par clé et les variables changent à chaque rendu."""
+    print("\n=== Cache des plans ===")
+    engine = TemplateEngine(max_size=2)
+    value = {'url': '{{url_base}}/{{test.test_id}}'}
+
+    first = engine.render(value, VARIABLES, TEST_VARIABLES, cache_key=('t1', 0, 0))
+    other_variables = dict(VARIABLES, url_base='https://autre.com')
+    second = engine.render(value, other_variables, TEST_VARIABLES, cache_key=('t1', 0, 0))
+
+    assert first['url'] == 'https://exemple.com/34843848343'
+    assert second['url'] == 'https://autre.com/34843848343'
+    assert engine.get_stats()['hits'] == 1 and engine.get_stats()['misses'] == 1
+
+    # Une nouvelle révision du test compile un nouveau plan
+    changed = engine.render({'url': '{{port}}'}, VARIABLES, TEST_VARIABLES, cache_key=('t1', 1, 0))
+    assert changed['url'] == '8080'
+
+    # Capacité maximale respectée (LRU)
+    engine.render('x', VARIABLES, TEST_VARIABLES, cache_key=('t2', 0, 0))
+    assert engine.get_stats()['size'] == 2
+    print("✅ Cache par (test, révision, action) avec éviction LRU")
+
+
+def run_all_tests():
+    """Exécute tous les tests."""
+    print("=" * 60)
+    print("Tests du moteur de substitution des variables")
+    print("=" * 60)
+    
+    try:
+        test_strings_match_legacy()
+        test_nested_structures()
+        test_constants()
+        test_cache()
+        
+        print("\n" + "=" * 60)
+        print("✅ TOUS LES TESTS SONT PASSÉS")
+        print("=" * 60)
+        return True
+    except AssertionError as e:
+        print(f"\n❌ ÉCHEC DU TEST : {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Application Flask principale pour TestGyver."""
+import atexit
 from flask import Flask, jsonify
 from flask_swagger_ui import get_swaggerui_blueprint
 from flask_socketio import SocketIO, join_room, leave_room
-from utils.db import load_config
+from utils.db import load_config, get_pool_stats
+from utils.config import install_reload_signal
 from utils.workdir import ensure_workdir_exists
+from utils.indexes import ensure_indexes
 from utils.campain_executor import CampainExecutor
+from utils.job_worker import JobWorker
+from utils.event_bus import MongoEventRelay, BACKEND_MONGO, get_backend, get_socketio_options, create_event_emitter
+from models.job import Job
 from utils.test_executor import TestExecutor
 from routes import (
     auth_bp,
@@ -29,23 +35,48 @@ def create_app():
     
     app = Flask(__name__)
     
-    # Charger la configuration
+    # Charger la configuration (rechargée sur SIGHUP ou modification du fichier)
     config = load_config()
+    install_reload_signal()
     app.config['SECRET_KEY'] = config['jwt_secret']
     app.config['JSON_AS_ASCII'] = False
     
-    # Initialiser SocketIO
-    socketio = SocketIO(app, cors_allowed_origins="*")
+    # Initialiser SocketIO (file de messages Redis selon events.backend)
+    events_backend = get_backend()
+    socketio = SocketIO(app, cors_allowed_origins="*", **get_socketio_options(events_backend))
     
     # Stocker socketio dans les extensions pour un accès facile
     app.extensions['socketio'] = socketio
     
-    # Initialiser les exécuteurs
-    campain_executor = CampainExecutor(socketio)
-    test_executor = TestExecutor(socketio)
+    # Provisionner les index MongoDB (idempotent)
+    if config['mongo'].get('ensure_indexes', True):
+        try:
+            ensure_indexes()
+        except Exception as e:
+            print(f"⚠ Provisionnement des index MongoDB impossible: {e}")
+    
+    # Initialiser les exécuteurs : leurs événements passent par le bus
+    # configuré pour atteindre les clients de tous les processus web
+    events = create_event_emitter(socketio, events_backend)
+    campain_executor = CampainExecutor(socketio, events)
+    test_executor = TestExecutor(socketio, events)
     app.config['CAMPAIN_EXECUTOR'] = campain_executor
     app.config['TEST_EXECUTOR'] = test_executor
     
+    # Worker consommant la file d'attente des exécutions (désactivable
+    # lorsque les exécutions sont confiées à des processus worker.py)
+    job_worker = JobWorker(campain_executor, test_executor)
+    app.config['JOB_WORKER'] = job_worker
+    if config.get('execution', {}).get('worker', {}).get('enabled', True):
+        job_worker.start()
+        atexit.register(job_worker.stop)
+    
+    # Relais vers les clients de ce processus des événements publiés dans MongoDB
+    if events_backend == BACKEND_MONGO:
+        event_relay = MongoEventRelay(socketio)
+        event_relay.start()
+        app.extensions['event_relay'] = event_relay
+    
     # Gestionnaires d'événements WebSocket
     @socketio.on('join')
     def handle_join(data):
@@ -113,9 +144,25 @@ def create_app():
         """Endpoint de santé pour vérifier que l'application fonctionne."""
         return jsonify({
             'status': 'healthy',
-            'version': config['version']
+            'version': load_config()['version']
         }), 200
     
+    @app.route('/health/mongo')
+    def health_mongo():
+        """Statistiques du pool de connexions MongoDB du processus (supervision)."""
+        return jsonify(get_pool_stats()), 200
+    
+    @app.route('/health/jobs')
+    def health_jobs():
+        """État de la file d'attente des exécutions et du worker local (supervision)."""
+        try:
+            return jsonify({
+                'jobs': Job.count_by_status(),
+                'worker': app.config['JOB_WORKER'].get_stats()
+            }), 200
+        except Exception as e:
+            return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
+    
     # Gestionnaire d'erreurs 404
     @app.errorhandler(404)
     def not_found(error):
@@ -133,7 +180,7 @@ def create_app():
     def inject_config():
         """Injecte la configuration dans tous les templates."""
         return {
-            'app_version': config['version'],
+            'app_version': load_config()['version'],
             'app_name': 'TestGyver'
         }
     
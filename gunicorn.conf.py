@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Configuration gunicorn de TestGyver (mode de production).
+
+Les valeurs proviennent de la section "server" de configuration.json,
+surchargeable par l'environnement (ex: TESTGYVER__SERVER__WORKERS=2) :
+
+    gunicorn --config gunicorn.conf.py app:app
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.config import get_config  # noqa: E402
+
+_config = get_config()
+_server = _config.get('server', {})
+
+# Adresse d'écoute (mêmes variables que start.sh)
+bind = f"{os.environ.get('FLASK_HOST', _config['app']['host'])}:{os.environ.get('FLASK_PORT', _config['app']['port'])}"
+
+# Flask-SocketIO impose un worker asynchrone (eventlet ou gevent). Au-delà
+# d'un worker, utiliser events.backend "mongo" ou "redis" et n'autoriser que
+# le transport websocket (pas d'affinité de session entre workers gunicorn).
+worker_class = _server.get('worker_class', 'eventlet')
+workers = int(_server.get('workers', 1))
+
+# Nombre maximum de connexions simultanées par worker (HTTP + WebSocket)
+worker_connections = int(_server.get('worker_connections', 1000))
+backlog = int(_server.get('backlog', 2048))
+keepalive = int(_server.get('keepalive', 5))
+
+# Délai sans réponse avant redémarrage d'un worker
+timeout = int(_server.get('timeout', 60))
+
+# Délai laissé aux exécutions en cours à l'arrêt (SIGTERM, rechargement)
+graceful_timeout = int(_server.get('graceful_timeout', 30))
+
+accesslog = _server.get('accesslog', '-')
+errorlog = '-'
+loglevel = _server.get('loglevel', 'info')
+
+
+def worker_exit(server, worker):
+    """
+    Vide le worker d'exécution intégré avant l'arrêt du worker gunicorn.
+
+    Les campagnes en cours cessent de démarrer de nouveaux tests ; leurs
+    jobs sont remis en file pour être repris par un autre processus.
+    """
+    job_worker = getattr(worker, 'wsgi', None) and worker.wsgi.config.get('JOB_WORKER')
+    if not job_worker:
+        return
+
+    # Garder une marge avant l'arrêt forcé par l'arbitre gunicorn
+    if job_worker.stop(timeout=max(1, graceful_timeout - 5)):
+        server.log.info("Worker d'exécution vidé (pid: %s)", worker.pid)
+    else:
+        server.log.warning("Exécutions encore en cours à l'arrêt (pid: %s), reprise après expiration du bail", worker.pid)
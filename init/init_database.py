@@ -11,6 +11,7 @@ from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, CollectionInvalid
 from models.user import User
 from utils.db import load_config
+from utils.indexes import ensure_indexes
 import getpass
 
 class Colors:
@@ -92,7 +93,7 @@ def create_collections(db):
     """Crée les collections nécessaires."""
     print_info("Création des collections...")
     
-    collections = ['users', 'variables', 'campains', 'tests', 'rapports']
+    collections = ['users', 'variables', 'campains', 'tests', 'rapports', 'rapport_logs', 'jobs']
     existing_collections = db.list_collection_names()
     
     for collection_name in collections:
@@ -108,25 +109,12 @@ def create_collections(db):
     # Créer des index pour optimiser les performances
     print_info("Création des index...")
     
-    # Index pour les utilisateurs (email unique)
-    db.users.create_index('email', unique=True)
-    print_success("Index sur 'users.email' créé")
-    
-    # Index pour les variables (key + filiere unique)
-    db.variables.create_index([('key', 1), ('filiere', 1)], unique=True)
-    print_success("Index sur 'variables.key + filiere' créé")
-    
-    # Index pour les campagnes
-    db.campains.create_index('dateCreated')
-    print_success("Index sur 'campains.dateCreated' créé")
-    
-    # Index pour les tests
-    db.tests.create_index('campainId')
-    print_success("Index sur 'tests.campainId' créé")
-    
-    # Index pour les rapports
-    db.rapports.create_index('campainId')
-    print_success("Index sur 'rapports.campainId' créé")
+    for entry in ensure_indexes(db):
+        keys = ' + '.join(field for field, _ in entry['keys'])
+        if entry['status'] == 'ok':
+            print_success(f"Index sur '{entry['collection']}.{keys}' créé")
+        else:
+            print_warning(f"Index sur '{entry['collection']}.{keys}' non créé: {entry['error']}")
 
 def create_admin_user():
     """Crée un utilisateur administrateur."""
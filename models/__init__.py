@@ -4,11 +4,15 @@ from .variable import Variable
 from .campain import Campain
 from .test import Test
 from .rapport import Rapport
+from .rapport_log import RapportLog
+from .job import Job
 
 __all__ = [
     'User',
     'Variable',
     'Campain',
     'Test',
-    'Rapport'
+    'Rapport',
+    'RapportLog',
+    'Job'
 ]
@@ -2,12 +2,16 @@
 from bson import ObjectId
 from datetime import datetime
 from utils.db import get_collection
+from utils.pagination import paginate_query
 
 class Campain:
     """Classe représentant une campagne de tests."""
     
     collection_name = 'campains'
     
+    # Tri des listes paginées (le dernier champ doit être unique)
+    PAGE_SORT = [('dateCreated', -1), ('_id', -1)]
+    
     @staticmethod
     def create(user_created, name, description=''):
         """Crée une nouvelle campagne."""
@@ -23,44 +27,95 @@ class Campain:
         result = collection.insert_one(campain_data)
         return str(result.inserted_id)
     
+    @staticmethod
+    def _creator_lookup_stages():
+        """
+        Étapes d'agrégation résolvant le nom du créateur de chaque campagne.
+        
+        Une seule jointure ($lookup) remplace la requête 'users' par campagne ;
+        seul le champ 'name' de l'utilisateur est lu.
+        
+        Returns:
+            list: Étapes à ajouter au pipeline
+        """
+        return [
+            {
+                '$lookup': {
+                    'from': 'users',
+                    'let': {'user_id': '$userCreated'},
+                    'pipeline': [
+                        {'$match': {'$expr': {'$eq': ['$_id', '$$user_id']}}},
+                        {'$project': {'_id': 0, 'name': 1}}
+                    ],
+                    'as': 'creator'
+                }
+            },
+            {
+                '$addFields': {
+                    'userCreatedName': {
+                        '$ifNull': [{'$arrayElemAt': ['$creator.name', 0]}, 'Utilisateur inconnu']
+                    }
+                }
+            },
+            {'$project': {'creator': 0}}
+        ]
+    
+    @staticmethod
+    def _format(campain):
+        """Convertit une campagne pour l'API (ObjectId et dates en chaînes)."""
+        campain['_id'] = str(campain['_id'])
+        campain['userCreated'] = str(campain['userCreated'])
+        if isinstance(campain.get('dateCreated'), datetime):
+            campain['dateCreated'] = campain['dateCreated'].isoformat()
+        return campain
+    
     @staticmethod
     def find_by_id(campain_id):
         """Trouve une campagne par son ID."""
         collection = get_collection(Campain.collection_name)
-        campain = collection.find_one({'_id': ObjectId(campain_id)})
-        
-        if campain:
-            # Récupérer les informations de l'utilisateur créateur
-            user_collection = get_collection('users')
-            user = user_collection.find_one({'_id': campain['userCreated']})
-            
-            campain['_id'] = str(campain['_id'])
-            campain['userCreated'] = str(campain['userCreated'])
-            campain['userCreatedName'] = user['name'] if user else 'Utilisateur inconnu'
-            if isinstance(campain.get('dateCreated'), datetime):
-                campain['dateCreated'] = campain['dateCreated'].isoformat()
         
-        return campain
+        pipeline = [{'$match': {'_id': ObjectId(campain_id)}}, {'$limit': 1}]
+        pipeline.extend(Campain._creator_lookup_stages())
+        
+        campains = list(collection.aggregate(pipeline))
+        return Campain._format(campains[0]) if campains else None
     
     @staticmethod
     def get_all():
         """Récupère toutes les campagnes."""
         collection = get_collection(Campain.collection_name)
-        campains = list(collection.find().sort('dateCreated', -1))
         
-        # Récupérer les informations des utilisateurs
-        user_collection = get_collection('users')
+        # Le nom du créateur est résolu par MongoDB en une seule requête
+        pipeline = [{'$sort': dict(Campain.PAGE_SORT)}]
+        pipeline.extend(Campain._creator_lookup_stages())
         
-        for campain in campains:
-            user = user_collection.find_one({'_id': campain['userCreated']})
-            
-            campain['_id'] = str(campain['_id'])
-            campain['userCreated'] = str(campain['userCreated'])
-            campain['userCreatedName'] = user['name'] if user else 'Utilisateur inconnu'
-            if isinstance(campain.get('dateCreated'), datetime):
-                campain['dateCreated'] = campain['dateCreated'].isoformat()
+        return [Campain._format(campain) for campain in collection.aggregate(pipeline)]
+    
+    @staticmethod
+    def get_page(page=1, page_size=None, after=None):
+        """
+        Récupère une page de campagnes, lue directement dans MongoDB.
         
-        return campains
+        Args:
+            page: Numéro de la page (commence à 1)
+            page_size: Nombre de campagnes par page
+            after: Curseur opaque retourné par la page précédente
+        
+        Returns:
+            dict: Campagnes de la page et informations de pagination
+        """
+        collection = get_collection(Campain.collection_name)
+        
+        # La jointure sur 'users' n'est appliquée qu'aux campagnes de la page
+        return paginate_query(
+            collection,
+            page=page,
+            page_size=page_size,
+            sort=Campain.PAGE_SORT,
+            after=after,
+            transform=Campain._format,
+            stages=Campain._creator_lookup_stages()
+        )
     
     @staticmethod
     def get_by_user(user_id):
@@ -70,15 +125,12 @@ class Campain:
         
         # Récupérer les informations de l'utilisateur
         user_collection = get_collection('users')
-        user = user_collection.find_one({'_id': ObjectId(user_id)})
+        user = user_collection.find_one({'_id': ObjectId(user_id)}, {'name': 1})
         user_name = user['name'] if user else 'Utilisateur inconnu'
         
         for campain in campains:
-            campain['_id'] = str(campain['_id'])
-            campain['userCreated'] = str(campain['userCreated'])
+            Campain._format(campain)
             campain['userCreatedName'] = user_name
-            if isinstance(campain.get('dateCreated'), datetime):
-                campain['dateCreated'] = campain['dateCreated'].isoformat()
         
         return campains
     
@@ -0,0 +1,211 @@
+"""Modèle pour la file d'attente persistante des exécutions (jobs)."""
+from bson import ObjectId
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from utils.db import get_collection
+
+class Job:
+    """
+    Classe représentant une exécution en file d'attente.
+
+    Un job est pris en charge par un worker pour une durée limitée (bail).
+    Le worker renouvelle régulièrement son bail ; si le processus s'arrête,
+    le bail expire et le job peut être repris par un autre worker.
+    """
+
+    collection_name = 'jobs'
+
+    # Statuts d'un job
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    @staticmethod
+    def _format(job):
+        """Convertit les ObjectId et dates d'un job pour la sérialisation."""
+        job['_id'] = str(job['_id'])
+        if job.get('rapportId'):
+            job['rapportId'] = str(job['rapportId'])
+        for field in ('dateCreated', 'dateStarted', 'dateFinished', 'leaseExpiresAt', 'heartbeatAt'):
+            if isinstance(job.get(field), datetime):
+                job[field] = job[field].isoformat()
+        return job
+
+    @staticmethod
+    def enqueue(job_type, rapport_id, payload, max_attempts=3):
+        """
+        Ajoute un job dans la file d'attente.
+
+        Args:
+            job_type: Type de job (ex: 'campain')
+            rapport_id: ID du rapport alimenté par le job (None pour un test seul)
+            payload: Paramètres d'exécution
+            max_attempts: Nombre maximum de prises en charge
+
+        Returns:
+            str: ID du job créé
+        """
+        collection = get_collection(Job.collection_name)
+
+        job_data = {
+            'type': job_type,
+            'rapportId': ObjectId(rapport_id) if rapport_id else None,
+            'payload': payload,
+            'status': Job.STATUS_QUEUED,
+            'attempts': 0,
+            'maxAttempts': max_attempts,
+            'owner': None,
+            'leaseExpiresAt': None,
+            'heartbeatAt': None,
+            'dateCreated': datetime.utcnow(),
+            'dateStarted': None,
+            'dateFinished': None,
+            'error': None
+        }
+
+        result = collection.insert_one(job_data)
+        return str(result.inserted_id)
+
+    @staticmethod
+    def claim(owner, lease_seconds):
+        """
+        Prend en charge le plus ancien job disponible (opération atomique).
+
+        Sont disponibles les jobs en attente et les jobs "running" dont le
+        bail a expiré (worker arrêté ou bloqué).
+
+        Args:
+            owner: Identifiant du worker
+            lease_seconds: Durée du bail en secondes
+
+        Returns:
+            dict: Job pris en charge ou None si la file est vide
+        """
+        collection = get_collection(Job.collection_name)
+        now = datetime.utcnow()
+
+        job = collection.find_one_and_update(
+            {'$or': [
+                {'status': Job.STATUS_QUEUED},
+                {'status': Job.STATUS_RUNNING, 'leaseExpiresAt': {'$lt': now}}
+            ]},
+            {
+                '$set': {
+                    'status': Job.STATUS_RUNNING,
+                    'owner': owner,
+                    'leaseExpiresAt': now + timedelta(seconds=lease_seconds),
+                    'heartbeatAt': now,
+                    'dateStarted': now
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('dateCreated', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+        return Job._format(job) if job else None
+
+    @staticmethod
+    def heartbeat(job_id, owner, lease_seconds):
+        """
+        Renouvelle le bail d'un job.
+
+        Args:
+            job_id: ID du job
+            owner: Identifiant du worker
+            lease_seconds: Durée du bail en secondes
+
+        Returns:
+            bool: False si le job n'appartient plus à ce worker
+        """
+        collection = get_collection(Job.collection_name)
+        now = datetime.utcnow()
+
+        result = collection.update_one(
+            {'_id': ObjectId(job_id), 'owner': owner, 'status': Job.STATUS_RUNNING},
+            {'$set': {
+                'leaseExpiresAt': now + timedelta(seconds=lease_seconds),
+                'heartbeatAt': now
+            }}
+        )
+        return result.matched_count > 0
+
+    @staticmethod
+    def finish(job_id, owner, status=STATUS_COMPLETED, error=None):
+        """
+        Termine un job.
+
+        Args:
+            job_id: ID du job
+            owner: Identifiant du worker
+            status: Statut final (completed, failed)
+            error: Message d'erreur éventuel
+
+        Returns:
+            bool: False si le job n'appartient plus à ce worker
+        """
+        collection = get_collection(Job.collection_name)
+
+        result = collection.update_one(
+            {'_id': ObjectId(job_id), 'owner': owner},
+            {'$set': {
+                'status': status,
+                'leaseExpiresAt': None,
+                'dateFinished': datetime.utcnow(),
+                'error': error
+            }}
+        )
+        return result.matched_count > 0
+
+    @staticmethod
+    def release(job_id, owner):
+        """
+        Remet un job en file d'attente (arrêt du worker avant la fin du job).
+
+        Args:
+            job_id: ID du job
+            owner: Identifiant du worker
+
+        Returns:
+            bool: False si le job n'appartient plus à ce worker
+        """
+        collection = get_collection(Job.collection_name)
+
+        result = collection.update_one(
+            {'_id': ObjectId(job_id), 'owner': owner, 'status': Job.STATUS_RUNNING},
+            {'$set': {
+                'status': Job.STATUS_QUEUED,
+                'owner': None,
+                'leaseExpiresAt': None
+            }}
+        )
+        return result.matched_count > 0
+
+    @staticmethod
+    def get_active_rapport_ids():
+        """
+        Retourne les IDs des rapports ayant un job en attente ou en cours.
+
+        Returns:
+            set: IDs (str) des rapports
+        """
+        collection = get_collection(Job.collection_name)
+        rapport_ids = collection.distinct('rapportId', {'status': {'$in': list(Job.ACTIVE_STATUSES)}})
+        return {str(rapport_id) for rapport_id in rapport_ids if rapport_id}
+
+    @staticmethod
+    def count_by_status():
+        """
+        Compte les jobs par statut.
+
+        Returns:
+            dict: {statut: nombre}
+        """
+        collection = get_collection(Job.collection_name)
+        counts = collection.aggregate([
+            {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+        ])
+        return {entry['_id']: entry['count'] for entry in counts}
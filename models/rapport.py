@@ -2,14 +2,30 @@
 from bson import ObjectId
 from datetime import datetime
 from utils.db import get_collection
+from utils.pagination import paginate_query
+from models.rapport_log import RapportLog
 
 class Rapport:
     """Classe représentant un rapport d'exécution de campagne."""
     
     collection_name = 'rapports'
     
+    # Tri des listes paginées (le dernier champ doit être unique)
+    PAGE_SORT = [('dateCreated', -1), ('_id', -1)]
+    
+    # Champs retournés par défaut dans les listes (les résultats de tests sont exclus)
+    SUMMARY_FIELDS = ('campainId', 'dateCreated', 'details', 'filiere', 'result', 'status', 'progress', 'stopOnFailure', 'concurrency')
+    
+    # Compteurs calculés par MongoDB à partir des résultats de tests
+    COMPUTED_FIELDS = {
+        'testsCount': {'$size': {'$ifNull': ['$tests', []]}},
+        'passedCount': {'$size': {'$filter': {'input': {'$ifNull': ['$tests', []]}, 'as': 'test', 'cond': {'$eq': ['$$test.status', 'passed']}}}},
+        'failedCount': {'$size': {'$filter': {'input': {'$ifNull': ['$tests', []]}, 'as': 'test', 'cond': {'$eq': ['$$test.status', 'failed']}}}},
+        'skippedCount': {'$size': {'$filter': {'input': {'$ifNull': ['$tests', []]}, 'as': 'test', 'cond': {'$eq': ['$$test.status', 'skipped']}}}}
+    }
+    
     @staticmethod
-    def create(campain_id, result, details, filiere, tests, status='pending', progress=0, stop_on_failure=False):
+    def create(campain_id, result, details, filiere, tests, status='pending', progress=0, stop_on_failure=False, concurrency=1):
         """Crée un nouveau rapport."""
         collection = get_collection(Rapport.collection_name)
         
@@ -22,7 +38,8 @@ class Rapport:
             'tests': tests,
             'status': status,  # pending, running, completed, failed
             'progress': progress,  # pourcentage de progression (0-100)
-            'stopOnFailure': stop_on_failure
+            'stopOnFailure': stop_on_failure,
+            'concurrency': concurrency  # nombre de tests exécutés en parallèle
         }
         
         result = collection.insert_one(rapport_data)
@@ -41,9 +58,7 @@ class Rapport:
                 rapport['dateCreated'] = rapport['dateCreated'].isoformat()
             
             # Convertir les ObjectId dans les tests
-            for test in rapport.get('tests', []):
-                if 'testId' in test:
-                    test['testId'] = str(test['testId'])
+            Rapport._format_tests(rapport)
         
         return rapport
     
@@ -59,9 +74,7 @@ class Rapport:
             if isinstance(rapport.get('dateCreated'), datetime):
                 rapport['dateCreated'] = rapport['dateCreated'].isoformat()
             
-            for test in rapport.get('tests', []):
-                if 'testId' in test:
-                    test['testId'] = str(test['testId'])
+            Rapport._format_tests(rapport)
         
         return rapports
     
@@ -77,12 +90,117 @@ class Rapport:
             if isinstance(rapport.get('dateCreated'), datetime):
                 rapport['dateCreated'] = rapport['dateCreated'].isoformat()
             
-            for test in rapport.get('tests', []):
-                if 'testId' in test:
-                    test['testId'] = str(test['testId'])
+            Rapport._format_tests(rapport)
         
         return rapports
     
+    @staticmethod
+    def get_page(campain_id=None, page=1, page_size=None, after=None, projection=None):
+        """
+        Récupère une page de rapports, lue directement dans MongoDB.
+        
+        Args:
+            campain_id: ID de la campagne (None pour tous les rapports)
+            page: Numéro de la page (commence à 1)
+            page_size: Nombre de rapports par page
+            after: Curseur opaque retourné par la page précédente
+            projection: Champs à retourner (voir utils.projection), None pour les documents complets
+        
+        Returns:
+            dict: Rapports de la page et informations de pagination
+        """
+        collection = get_collection(Rapport.collection_name)
+        query = {'campainId': ObjectId(campain_id)} if campain_id else {}
+        
+        def format_rapport(rapport):
+            rapport['_id'] = str(rapport['_id'])
+            if 'campainId' in rapport:
+                rapport['campainId'] = str(rapport['campainId'])
+            if isinstance(rapport.get('dateCreated'), datetime):
+                rapport['dateCreated'] = rapport['dateCreated'].isoformat()
+            
+            if 'tests' in rapport:
+                Rapport._format_tests(rapport)
+            return rapport
+        
+        return paginate_query(
+            collection,
+            query=query,
+            page=page,
+            page_size=page_size,
+            sort=Rapport.PAGE_SORT,
+            after=after,
+            transform=format_rapport,
+            projection=projection
+        )
+    
+    @staticmethod
+    def _format_tests(rapport):
+        """
+        Prépare les résultats de tests d'un rapport pour l'API.
+        
+        Les résultats sont ajoutés au fil de l'eau (éventuellement en parallèle) :
+        ils sont remis dans l'ordre de la campagne grâce au champ 'index'.
+        """
+        tests = rapport.get('tests', [])
+        tests.sort(key=lambda test: test.get('index', 0))
+        
+        for test in tests:
+            if 'testId' in test:
+                test['testId'] = str(test['testId'])
+    
+    @staticmethod
+    def push_tests(rapport_id, tests, progress=None):
+        """
+        Ajoute des résultats de tests à un rapport sans réécrire le tableau existant.
+        
+        Args:
+            rapport_id: ID du rapport
+            tests: Liste des résultats à ajouter
+            progress: Progression (0-100) à appliquer, ne peut jamais diminuer
+        
+        Returns:
+            bool: True
+        """
+        collection = get_collection(Rapport.collection_name)
+        
+        tests = list(tests)
+        update = {'$push': {'tests': {'$each': tests}}}
+        
+        if progress is not None:
+            # $max garantit une progression monotone même si plusieurs
+            # workers terminent leurs tests dans le désordre
+            update['$max'] = {'progress': progress}
+        
+        query = {'_id': ObjectId(rapport_id)}
+        
+        # Un résultat déjà enregistré pour le même index n'est pas ajouté une
+        # seconde fois (reprise d'une exécution interrompue)
+        indexes = [test['index'] for test in tests if 'index' in test]
+        if indexes:
+            query['tests.index'] = {'$nin': indexes}
+        
+        collection.update_one(query, update)
+        return True
+    
+    @staticmethod
+    def get_unfinished_ids(created_before):
+        """
+        Retourne les IDs des rapports en attente ou en cours créés avant une date.
+        
+        Args:
+            created_before: Date de création maximale (datetime UTC)
+        
+        Returns:
+            list: IDs (str) des rapports
+        """
+        collection = get_collection(Rapport.collection_name)
+        rapports = collection.find(
+            {'status': {'$in': ['pending', 'running']}, 'dateCreated': {'$lt': created_before}},
+            {'_id': 1}
+        )
+        return [str(rapport['_id']) for rapport in rapports]
+    
     @staticmethod
     def update(rapport_id, data):
         """Met à jour un rapport."""
@@ -96,6 +214,9 @@ class Rapport:
         if 'details' in data:
             update_data['details'] = data['details']
         
+        if 'error' in data:
+            update_data['error'] = data['error']
+        
         if 'filiere' in data:
             update_data['filiere'] = data['filiere']
         
@@ -111,6 +232,9 @@ class Rapport:
         if 'stopOnFailure' in data:
             update_data['stopOnFailure'] = data['stopOnFailure']
         
+        if 'concurrency' in data:
+            update_data['concurrency'] = data['concurrency']
+        
         if update_data:
             collection.update_one({'_id': ObjectId(rapport_id)}, {'$set': update_data})
         
@@ -118,9 +242,13 @@ class Rapport:
     
     @staticmethod
     def delete(rapport_id):
-        """Supprime un rapport."""
+        """Supprime un rapport et ses logs d'exécution."""
         collection = get_collection(Rapport.collection_name)
         result = collection.delete_one({'_id': ObjectId(rapport_id)})
+        
+        if result.deleted_count > 0:
+            RapportLog.delete_by_rapport(rapport_id)
+        
         return result.deleted_count > 0
     
     @staticmethod
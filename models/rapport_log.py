@@ -0,0 +1,198 @@
+"""Modèle pour le stockage des logs d'exécution par blocs (hors du document rapport)."""
+import zlib
+from bson import ObjectId, Binary
+from datetime import datetime
+from utils.db import get_collection, load_config
+
+try:
+    import zstandard
+except ImportError:  # Compression zstd optionnelle
+    zstandard = None
+
+
+class RapportLog:
+    """
+    Classe représentant les logs d'un test exécuté dans un rapport.
+
+    Les logs sont découpés en blocs (chunks) de taille fixe, éventuellement
+    compressés, et stockés dans une collection dédiée. Chaque bloc connaît sa
+    position (offset) dans le flux UTF-8 d'origine, ce qui permet de relire
+    une plage d'octets sans charger l'ensemble des logs.
+    """
+
+    collection_name = 'rapport_logs'
+
+    DEFAULT_CHUNK_SIZE = 256 * 1024
+
+    @staticmethod
+    def _get_settings():
+        """
+        Retourne la configuration du stockage des logs.
+
+        Returns:
+            tuple: (taille des blocs en octets, algorithme de compression)
+        """
+        logs_config = load_config().get('logs', {})
+        chunk_size = int(logs_config.get('chunk_size', RapportLog.DEFAULT_CHUNK_SIZE))
+        compression = logs_config.get('compression') or None
+
+        if compression == 'zstd' and zstandard is None:
+            print("⚠ Module 'zstandard' absent : compression zlib utilisée pour les logs")
+            compression = 'zlib'
+
+        if compression not in (None, 'zlib', 'zstd'):
+            raise ValueError(f"Compression de logs non supportée: {compression}")
+
+        return max(chunk_size, 1024), compression
+
+    @staticmethod
+    def _compress(data, compression):
+        """Compresse un bloc selon l'algorithme demandé."""
+        if compression == 'zlib':
+            return zlib.compress(data)
+        if compression == 'zstd':
+            return zstandard.ZstdCompressor().compress(data)
+        return data
+
+    @staticmethod
+    def _decompress(data, compression):
+        """Décompresse un bloc selon l'algorithme utilisé à l'écriture."""
+        if compression == 'zlib':
+            return zlib.decompress(data)
+        if compression == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("Le module 'zstandard' est requis pour lire ces logs")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return bytes(data)
+
+    @staticmethod
+    def split_chunks(data, chunk_size):
+        """
+        Découpe un contenu binaire en blocs positionnés.
+
+        Args:
+            data: Contenu à découper (bytes)
+            chunk_size: Taille maximale d'un bloc
+
+        Returns:
+            list: Liste de tuples (offset, bloc)
+        """
+        return [(offset, data[offset:offset + chunk_size]) for offset in range(0, len(data), chunk_size)]
+
+    @staticmethod
+    def write(rapport_id, test_id, logs):
+        """
+        Enregistre les logs d'un test sous forme de blocs.
+
+        Args:
+            rapport_id: ID du rapport
+            test_id: ID du test
+            logs: Texte des logs
+
+        Returns:
+            dict: Référence à stocker dans le rapport (taille, nombre de blocs, compression)
+        """
+        collection = get_collection(RapportLog.collection_name)
+        chunk_size, compression = RapportLog._get_settings()
+
+        data = (logs or '').encode('utf-8')
+        now = datetime.utcnow()
+
+        documents = []
+        for seq, (offset, chunk) in enumerate(RapportLog.split_chunks(data, chunk_size)):
+            documents.append({
+                'rapportId': ObjectId(rapport_id),
+                'testId': ObjectId(test_id),
+                'seq': seq,
+                'offset': offset,
+                'end': offset + len(chunk),
+                'compression': compression,
+                'data': Binary(RapportLog._compress(chunk, compression)),
+                'dateCreated': now
+            })
+
+        if documents:
+            collection.insert_many(documents, ordered=False)
+
+        return {
+            'size': len(data),
+            'chunks': len(documents),
+            'compression': compression
+        }
+
+    @staticmethod
+    def get_size(rapport_id, test_id):
+        """
+        Retourne la taille totale (octets) des logs d'un test.
+
+        Returns:
+            int: Taille en octets, None si aucun log n'est enregistré
+        """
+        collection = get_collection(RapportLog.collection_name)
+        last_chunk = collection.find_one(
+            {'rapportId': ObjectId(rapport_id), 'testId': ObjectId(test_id)},
+            {'end': 1},
+            sort=[('offset', -1)]
+        )
+        return last_chunk['end'] if last_chunk else None
+
+    @staticmethod
+    def iter_range(rapport_id, test_id, start=0, end=None):
+        """
+        Lit une plage d'octets des logs d'un test, bloc par bloc.
+
+        Seuls les blocs recouvrant la plage demandée sont lus en base.
+
+        Args:
+            rapport_id: ID du rapport
+            test_id: ID du test
+            start: Premier octet (inclus)
+            end: Dernier octet (exclus), None pour lire jusqu'à la fin
+
+        Yields:
+            bytes: Morceaux successifs de la plage demandée
+        """
+        collection = get_collection(RapportLog.collection_name)
+
+        query = {
+            'rapportId': ObjectId(rapport_id),
+            'testId': ObjectId(test_id),
+            'end': {'$gt': start}
+        }
+        if end is not None:
+            query['offset'] = {'$lt': end}
+
+        for chunk in collection.find(query).sort('offset', 1):
+            data = RapportLog._decompress(chunk['data'], chunk.get('compression'))
+
+            # Découper le bloc aux bornes de la plage demandée
+            chunk_start = max(start - chunk['offset'], 0)
+            chunk_end = len(data) if end is None else min(end - chunk['offset'], len(data))
+
+            if chunk_end > chunk_start:
+                yield data[chunk_start:chunk_end]
+
+    @staticmethod
+    def read(rapport_id, test_id):
+        """
+        Lit l'intégralité des logs d'un test.
+
+        Returns:
+            str: Texte des logs (chaîne vide si aucun log)
+        """
+        data = b''.join(RapportLog.iter_range(rapport_id, test_id))
+        return data.decode('utf-8', errors='replace')
+
+    @staticmethod
+    def delete_by_rapport(rapport_id):
+        """Supprime tous les blocs de logs d'un rapport."""
+        collection = get_collection(RapportLog.collection_name)
+        result = collection.delete_many({'rapportId': ObjectId(rapport_id)})
+        return result.deleted_count
+
+    @staticmethod
+    def delete_by_test(rapport_id, test_id):
+        """Supprime les blocs de logs d'un test d'un rapport (reprise d'une exécution)."""
+        collection = get_collection(RapportLog.collection_name)
+        result = collection.delete_many({'rapportId': ObjectId(rapport_id), 'testId': ObjectId(test_id)})
+        return result.deleted_count
@@ -2,12 +2,25 @@
 from bson import ObjectId
 from datetime import datetime
 from utils.db import get_collection
+from utils.pagination import paginate_query
 
 class Test:
     """Classe représentant un test avec ses actions."""
     
     collection_name = 'tests'
     
+    # Tri des listes paginées (le dernier champ doit être unique)
+    PAGE_SORT = [('dateCreated', -1), ('_id', -1)]
+    
+    # Champs retournés par défaut dans les listes (le contenu des actions est exclu)
+    SUMMARY_FIELDS = ('campainId', 'userId', 'dateCreated', 'name', 'description')
+    
+    # Résumé des actions calculé par MongoDB
+    COMPUTED_FIELDS = {
+        'actionsCount': {'$size': {'$ifNull': ['$actions', []]}},
+        'actionTypes': {'$setUnion': [{'$ifNull': ['$actions.type', []]}]}
+    }
+    
     @staticmethod
     def create(campain_id, user_id, actions, name=None, description=None, variables=None):
         """Crée un nouveau test."""
@@ -20,7 +33,8 @@ class Test:
             'actions': actions,
             'name': name or '',
             'description': description or '',
-            'variables': variables or []
+            'variables': variables or [],
+            'revision': 0  # Incrémentée à chaque modification (cache des plans de substitution)
         }
         
         result = collection.insert_one(test_data)
@@ -71,6 +85,44 @@ class Test:
         
         return tests
     
+    @staticmethod
+    def get_page(campain_id=None, page=1, page_size=None, after=None, projection=None):
+        """
+        Récupère une page de tests, lue directement dans MongoDB.
+        
+        Args:
+            campain_id: ID de la campagne (None pour tous les tests)
+            page: Numéro de la page (commence à 1)
+            page_size: Nombre de tests par page
+            after: Curseur opaque retourné par la page précédente
+            projection: Champs à retourner (voir utils.projection), None pour les documents complets
+        
+        Returns:
+            dict: Tests de la page et informations de pagination
+        """
+        collection = get_collection(Test.collection_name)
+        query = {'campainId': ObjectId(campain_id)} if campain_id else {}
+        
+        def format_test(test):
+            test['_id'] = str(test['_id'])
+            for field in ('campainId', 'userId'):
+                if field in test:
+                    test[field] = str(test[field])
+            if isinstance(test.get('dateCreated'), datetime):
+                test['dateCreated'] = test['dateCreated'].isoformat()
+            return test
+        
+        return paginate_query(
+            collection,
+            query=query,
+            page=page,
+            page_size=page_size,
+            sort=Test.PAGE_SORT,
+            after=after,
+            transform=format_test,
+            projection=projection
+        )
+    
     @staticmethod
     def update(test_id, data):
         """Met à jour un test."""
@@ -91,7 +143,10 @@ class Test:
             update_data['variables'] = data['variables']
         
         if update_data:
-            collection.update_one({'_id': ObjectId(test_id)}, {'$set': update_data})
+            collection.update_one(
+                {'_id': ObjectId(test_id)},
+                {'$set': update_data, '$inc': {'revision': 1}}
+            )
         
         return True
     
@@ -108,7 +163,7 @@ class Test:
         collection = get_collection(Test.collection_name)
         collection.update_one(
             {'_id': ObjectId(test_id)},
-            {'$push': {'actions': action}}
+            {'$push': {'actions': action}, '$inc': {'revision': 1}}
         )
         return True
     
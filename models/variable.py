@@ -1,12 +1,16 @@
 """Modèle pour la gestion des variables multi-environnements."""
 from bson import ObjectId
 from utils.db import get_collection
+from utils.pagination import paginate_query
 
 class Variable:
     """Classe représentant une variable multi-environnement."""
     
     collection_name = 'variables'
     
+    # Tri des listes paginées (les variables n'ont pas de date de création)
+    PAGE_SORT = [('_id', 1)]
+    
     @staticmethod
     def create(key, value, filiere, description='', is_root=False):
         """Crée une nouvelle variable."""
@@ -61,6 +65,45 @@ class Variable:
         
         return variables
     
+    @staticmethod
+    def get_page(filiere=None, is_root=None, page=1, page_size=None, after=None):
+        """
+        Récupère une page de variables, lue directement dans MongoDB.
+        
+        Args:
+            filiere: Filière à filtrer (None pour toutes)
+            is_root: True/False pour filtrer sur le statut racine, None sinon
+            page: Numéro de la page (commence à 1)
+            page_size: Nombre de variables par page
+            after: Curseur opaque retourné par la page précédente
+        
+        Returns:
+            dict: Variables de la page et informations de pagination
+        """
+        collection = get_collection(Variable.collection_name)
+        
+        query = {}
+        if filiere:
+            query['filiere'] = filiere
+        if is_root is True:
+            query['isRoot'] = True
+        elif is_root is False:
+            query['isRoot'] = {'$ne': True}
+        
+        def format_variable(variable):
+            variable['_id'] = str(variable['_id'])
+            return variable
+        
+        return paginate_query(
+            collection,
+            query=query,
+            page=page,
+            page_size=page_size,
+            sort=Variable.PAGE_SORT,
+            after=after,
+            transform=format_variable
+        )
+    
     @staticmethod
     def get_grouped_by_filiere():
         """Récupère toutes les variables groupées par filière."""
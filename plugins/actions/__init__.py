@@ -29,18 +29,43 @@ def get_all_actions():
     """
     Retourne la liste de toutes les actions disponibles avec leurs masques de saisie.
     
+    Les descriptions sont calculées une seule fois par chargement des plugins.
+    
     Returns:
         dict: Dictionnaire {type: {"mask": [...], "class": ..., "metadata": {...}}}
     """
-    actions = {}
-    for action_type, action_class in ACTION_REGISTRY.items():
-        instance = action_class()
-        actions[action_type] = {
-            "mask": instance.get_input_mask(),
-            "class": action_class.__name__,
-            "metadata": instance.get_metadata()
+    return {
+        action_type: {
+            "mask": descriptor["mask"],
+            "class": descriptor["class"],
+            "metadata": descriptor["metadata"]
         }
-    return actions
+        for action_type, descriptor in action_manager.get_descriptors().items()
+    }
+
+
+def get_action_descriptor(action_type):
+    """
+    Retourne la description en cache d'une action (masque, métadonnées,
+    variables de sortie, label).
+    
+    Args:
+        action_type: Type de l'action ('http', 'ssh', etc.)
+    
+    Returns:
+        dict: Description de l'action ou None si le type n'existe pas
+    """
+    return action_manager.get_descriptor(action_type)
+
+
+def get_action_descriptors():
+    """
+    Retourne les descriptions en cache de toutes les actions.
+    
+    Returns:
+        dict: Dictionnaire {type: description}
+    """
+    return action_manager.get_descriptors()
 
 
 def reload_actions():
@@ -51,10 +76,8 @@ def reload_actions():
     Returns:
         dict: Dictionnaire des actions rechargées
     """
-    global ACTION_REGISTRY
-    action_manager.reload_plugins()
-    ACTION_REGISTRY = action_manager.get_all_plugins()
-    return ACTION_REGISTRY
+    # Le registre est mis à jour sur place : ACTION_REGISTRY reste valide
+    return action_manager.reload_plugins()
 
 
 def register_action(action_name, action_class):
@@ -68,11 +91,7 @@ def register_action(action_name, action_class):
     Returns:
         bool: True si enregistrée avec succès
     """
-    success = action_manager.register_plugin(action_name, action_class)
-    if success:
-        global ACTION_REGISTRY
-        ACTION_REGISTRY = action_manager.get_all_plugins()
-    return success
+    return action_manager.register_plugin(action_name, action_class)
 
 
 def get_action_info(action_name):
@@ -102,6 +121,8 @@ __all__ = [
     'ActionBase',
     'get_action',
     'get_all_actions',
+    'get_action_descriptor',
+    'get_action_descriptors',
     'reload_actions',
     'register_action',
     'get_action_info',
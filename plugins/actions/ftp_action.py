@@ -1,7 +1,11 @@
 """Action pour effectuer des opérations FTP."""
-from ftplib import FTP, error_perm, error_temp
+from ftplib import error_perm, error_temp
 import io
+import time
 from plugins.actions.action_base import ActionBase
+from utils.ftp_utils import DEFAULT_BLOCK_SIZE, ftp_connection, get_ftp_settings
+from utils.run_context import current_scope
+from utils.workdir import open_download, resolve_local_path
 
 
 class FTPAction(ActionBase):
@@ -37,7 +41,7 @@ class FTPAction(ActionBase):
                 "name": "method",
                 "type": "select",
                 "label": "Méthode FTP",
-                "options": ["GET", "PUT", "DELETE", "LIST"],
+                "options": ["GET", "PUT", "DELETE", "LIST", "DOWNLOAD", "UPLOAD"],
                 "required": True
             },
             {
@@ -81,6 +85,13 @@ class FTPAction(ActionBase):
                 "label": "Contenu du fichier (pour PUT)",
                 "placeholder": "Contenu à uploader",
                 "required": False
+            },
+            {
+                "name": "local_path",
+                "type": "string",
+                "label": "Fichier local (DOWNLOAD : relatif à test.work_dir, UPLOAD : relatif à test.files_dir)",
+                "placeholder": "export/fichier.csv",
+                "required": False
             }
         ]
     
@@ -106,6 +117,16 @@ class FTPAction(ActionBase):
                 "name": "ftp_operation_success",
                 "description": "Indique si l'opération a réussi (true/false)",
                 "type": "string"
+            },
+            {
+                "name": "ftp_local_path",
+                "description": "Chemin du fichier local (pour DOWNLOAD/UPLOAD)",
+                "type": "string"
+            },
+            {
+                "name": "ftp_throughput",
+                "description": "Débit du transfert en octets par seconde (pour DOWNLOAD/UPLOAD)",
+                "type": "number"
             }
         ]
     
@@ -113,129 +134,29 @@ class FTPAction(ActionBase):
         """
         Exécute une opération FTP.
         
+        Dans un test ou une campagne, la connexion FTP est conservée et
+        réutilisée par les actions suivantes vers le même serveur et compte
+        (voir utils/ftp_utils.py).
+        
         Args:
-            action_context: Dictionnaire contenant method, host, port, username, password, remote_path, content
+            action_context: Dictionnaire contenant method, host, port, username, password, remote_path, content, local_path
         """
-        ftp = None
-        
         try:
             method = action_context.get('method', 'GET').upper()
             host = action_context.get('host')
             port = int(action_context.get('port', 21))
             username = action_context.get('username')
             password = action_context.get('password')
-            remote_path = action_context.get('remote_path')
-            content = action_context.get('content', '')
             
             self.add_trace(f"Connexion FTP à {host}:{port}")
             
-            # Connexion au serveur FTP
-            ftp = FTP()
-            ftp.connect(host, port, timeout=30)
-            ftp.login(username, password)
-            
-            self.add_trace(f"Connexion établie - Message de bienvenue: {ftp.getwelcome()}")
-            
-            # Exécuter l'opération demandée
-            if method == 'GET':
-                self.add_trace(f"Téléchargement du fichier: {remote_path}")
-                
-                # Télécharger le fichier
-                data = io.BytesIO()
-                ftp.retrbinary(f'RETR {remote_path}', data.write)
-                
-                file_content = data.getvalue().decode('utf-8', errors='replace')
-                file_size = len(data.getvalue())
-                
-                # Préparer les variables de sortie
-                output_vars = {
-                    "ftp_file_content": file_content,
-                    "ftp_file_size": file_size,
-                    "ftp_file_list": "",
-                    "ftp_operation_success": "true"
-                }
-                
-                self.set_code(0)
-                self.add_trace(f"Fichier téléchargé avec succès ({file_size} octets)")
-                
-                return self.get_result({
-                    "content": file_content[:1000],  # Limiter la taille
-                    "size": file_size
-                }, output_vars)
-            
-            elif method == 'PUT':
-                self.add_trace(f"Upload du fichier vers: {remote_path}")
-                
-                # Uploader le fichier
-                data = io.BytesIO(content.encode('utf-8'))
-                ftp.storbinary(f'STOR {remote_path}', data)
-                
-                file_size = len(content)
-                
-                # Préparer les variables de sortie
-                output_vars = {
-                    "ftp_file_content": "",
-                    "ftp_file_size": file_size,
-                    "ftp_file_list": "",
-                    "ftp_operation_success": "true"
-                }
-                
-                self.set_code(0)
-                self.add_trace(f"Fichier uploadé avec succès ({file_size} octets)")
+            with ftp_connection(host, port, username, password) as (ftp, reused):
+                if reused:
+                    self.add_trace("Connexion FTP réutilisée")
+                else:
+                    self.add_trace(f"Connexion établie - Message de bienvenue: {ftp.getwelcome()}")
                 
-                return self.get_result({
-                    "uploaded": True,
-                    "size": file_size
-                }, output_vars)
-            
-            elif method == 'DELETE':
-                self.add_trace(f"Suppression du fichier: {remote_path}")
-                
-                # Supprimer le fichier
-                ftp.delete(remote_path)
-                
-                # Préparer les variables de sortie
-                output_vars = {
-                    "ftp_file_content": "",
-                    "ftp_file_size": 0,
-                    "ftp_file_list": "",
-                    "ftp_operation_success": "true"
-                }
-                
-                self.set_code(0)
-                self.add_trace("Fichier supprimé avec succès")
-                
-                return self.get_result({"deleted": True}, output_vars)
-            
-            elif method == 'LIST':
-                self.add_trace(f"Liste des fichiers dans: {remote_path}")
-                
-                # Lister les fichiers
-                files = []
-                ftp.retrlines(f'LIST {remote_path}', files.append)
-                
-                file_list_str = "\n".join(files)
-                
-                # Préparer les variables de sortie
-                output_vars = {
-                    "ftp_file_content": "",
-                    "ftp_file_size": 0,
-                    "ftp_file_list": file_list_str,
-                    "ftp_operation_success": "true"
-                }
-                
-                self.set_code(0)
-                self.add_trace(f"Liste récupérée ({len(files)} entrées)")
-                
-                return self.get_result({
-                    "files": files[:50],  # Limiter à 50 entrées
-                    "count": len(files)
-                }, output_vars)
-            
-            else:
-                self.set_code(1)
-                self.add_trace(f"Méthode FTP non supportée: {method}")
-                return self.get_result()
+                return self._execute_method(ftp, method, action_context)
         
         except error_perm as e:
             self.set_code(1)
@@ -251,11 +172,188 @@ class FTPAction(ActionBase):
             self.set_code(1)
             self.add_trace(f"Erreur inattendue: {str(e)}")
             return self.get_result()
+    
+    def _execute_method(self, ftp, method, action_context):
+        """
+        Exécute l'opération FTP demandée sur une connexion ouverte.
+        
+        Args:
+            ftp: Connexion FTP authentifiée
+            method: GET, PUT, DELETE, LIST, DOWNLOAD ou UPLOAD
+            action_context: Paramètres de l'action
+        
+        Returns:
+            dict: Résultat de l'action
+        """
+        remote_path = action_context.get('remote_path')
+        content = action_context.get('content', '')
+        
+        if method == 'GET':
+            self.add_trace(f"Téléchargement du fichier: {remote_path}")
+            
+            # Télécharger le fichier
+            data = io.BytesIO()
+            ftp.retrbinary(f'RETR {remote_path}', data.write)
+            
+            file_content = data.getvalue().decode('utf-8', errors='replace')
+            file_size = len(data.getvalue())
+            
+            # Préparer les variables de sortie
+            output_vars = self._output_vars(ftp_file_content=file_content, ftp_file_size=file_size)
+            
+            self.set_code(0)
+            self.add_trace(f"Fichier téléchargé avec succès ({file_size} octets)")
+            
+            return self.get_result({
+                "content": file_content[:1000],  # Limiter la taille
+                "size": file_size
+            }, output_vars)
+        
+        elif method == 'PUT':
+            self.add_trace(f"Upload du fichier vers: {remote_path}")
+            
+            # Uploader le fichier
+            data = io.BytesIO(content.encode('utf-8'))
+            ftp.storbinary(f'STOR {remote_path}', data)
+            
+            file_size = len(content)
+            
+            # Préparer les variables de sortie
+            output_vars = self._output_vars(ftp_file_size=file_size)
+            
+            self.set_code(0)
+            self.add_trace(f"Fichier uploadé avec succès ({file_size} octets)")
+            
+            return self.get_result({
+                "uploaded": True,
+                "size": file_size
+            }, output_vars)
+        
+        elif method == 'DELETE':
+            self.add_trace(f"Suppression du fichier: {remote_path}")
+            
+            # Supprimer le fichier
+            ftp.delete(remote_path)
+            
+            self.set_code(0)
+            self.add_trace("Fichier supprimé avec succès")
+            
+            return self.get_result({"deleted": True}, self._output_vars())
+        
+        elif method == 'LIST':
+            self.add_trace(f"Liste des fichiers dans: {remote_path}")
+            
+            # Lister les fichiers
+            files = []
+            ftp.retrlines(f'LIST {remote_path}', files.append)
+            
+            file_list_str = "\n".join(files)
+            
+            # Préparer les variables de sortie
+            output_vars = self._output_vars(ftp_file_list=file_list_str)
+            
+            self.set_code(0)
+            self.add_trace(f"Liste récupérée ({len(files)} entrées)")
+            
+            return self.get_result({
+                "files": files[:50],  # Limiter à 50 entrées
+                "count": len(files)
+            }, output_vars)
+        
+        elif method in ('DOWNLOAD', 'UPLOAD'):
+            return self._transfer_file(ftp, method, remote_path, action_context.get('local_path'))
+        
+        else:
+            self.set_code(1)
+            self.add_trace(f"Méthode FTP non supportée: {method}")
+            return self.get_result()
+    
+    def _transfer_file(self, ftp, method, remote_path, local_path):
+        """
+        Transfère un fichier entre le serveur et le disque local, par blocs.
+        
+        DOWNLOAD écrit le fichier distant dans test.work_dir, UPLOAD envoie un
+        fichier de test.files_dir : la mémoire utilisée ne dépend pas de la
+        taille du fichier.
+        
+        Args:
+            ftp: Connexion FTP authentifiée
+            method: DOWNLOAD ou UPLOAD
+            remote_path: Chemin distant
+            local_path: Chemin local (relatif au répertoire de la campagne, ou absolu dans celui-ci)
+        
+        Returns:
+            dict: Résultat de l'action
+        """
+        if not remote_path or not local_path:
+            self.set_code(1)
+            self.add_trace(f"Les champs 'remote_path' et 'local_path' sont obligatoires pour {method}")
+            return self.get_result()
+        
+        scope = current_scope()
+        block_size = int(get_ftp_settings().get('block_size', DEFAULT_BLOCK_SIZE))
+        transferred = 0
         
-        finally:
-            if ftp:
-                try:
-                    ftp.quit()
-                    self.add_trace("Connexion FTP fermée")
-                except:
-                    pass
+        if method == 'DOWNLOAD':
+            path = resolve_local_path(local_path, scope.work_dir if scope is not None else None)
+            self.add_trace(f"Téléchargement de {remote_path} vers {path}")
+            
+            started = time.monotonic()
+            # Fichier temporaire renommé une fois le transfert terminé : un échec
+            # ne laisse pas de fichier vide ou partiel dans test.work_dir
+            with open_download(path) as local_file:
+                def write_block(block):
+                    """Écrit un bloc reçu dans le fichier local."""
+                    nonlocal transferred
+                    local_file.write(block)
+                    transferred += len(block)
+                
+                ftp.retrbinary(f'RETR {remote_path}', write_block, blocksize=block_size)
+        else:
+            path = resolve_local_path(local_path, scope.files_dir if scope is not None else None)
+            if not path.is_file():
+                self.set_code(1)
+                self.add_trace(f"Fichier local introuvable: {path}")
+                return self.get_result()
+            self.add_trace(f"Upload de {path} vers {remote_path}")
+            
+            def count_block(block):
+                """Comptabilise un bloc envoyé."""
+                nonlocal transferred
+                transferred += len(block)
+            
+            started = time.monotonic()
+            with open(path, 'rb') as local_file:
+                ftp.storbinary(f'STOR {remote_path}', local_file, blocksize=block_size, callback=count_block)
+        
+        duration = time.monotonic() - started
+        throughput = int(transferred / duration) if duration > 0 else transferred
+        
+        self.set_code(0)
+        self.add_trace(f"{transferred} octets transférés en {duration:.2f} s ({throughput / 1024 / 1024:.2f} Mo/s)")
+        
+        return self.get_result({
+            "local_path": str(path),
+            "size": transferred,
+            "duration": round(duration, 3),
+            "throughput": throughput
+        }, self._output_vars(ftp_file_size=transferred, ftp_local_path=str(path), ftp_throughput=throughput))
+    
+    @staticmethod
+    def _output_vars(**values):
+        """
+        Construit les variables de sortie (valeurs par défaut pour les variables non renseignées).
+        
+        Returns:
+            dict: Variables de sortie de l'action
+        """
+        output_vars = {
+            "ftp_file_content": "",
+            "ftp_file_size": 0,
+            "ftp_file_list": "",
+            "ftp_operation_success": "true",
+            "ftp_local_path": "",
+            "ftp_throughput": 0
+        }
+        output_vars.update(values)
+        return output_vars
@@ -0,0 +1,449 @@
+"""Action de génération de charge HTTP (utilisateurs virtuels, débit cible, percentiles)."""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+import requests
+from plugins.actions.action_base import ActionBase
+from plugins.actions.http_request_action import get_http_settings, create_session, DEFAULT_TIMEOUT
+from utils.config import get_config
+from utils.latency_histogram import LatencyHistogram
+from utils.run_context import current_scope
+
+DEFAULT_VIRTUAL_USERS = 10
+DEFAULT_MAX_VIRTUAL_USERS = 200
+DEFAULT_MAX_DURATION = 3600  # secondes
+DEFAULT_PROGRESS_INTERVAL = 1.0  # secondes
+METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+
+def get_load_settings():
+    """Retourne la configuration de la génération de charge (connections.http_load)."""
+    return get_config().get('connections', {}).get('http_load', {})
+
+
+def _number(value, cast, default=None):
+    """Convertit une valeur saisie (éventuellement vide) en nombre."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    return cast(value)
+
+
+class _UserStats:
+    """Mesures d'un utilisateur virtuel (fusionnées en fin de tir)."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.completed = 0
+        self.status_codes = {}
+        self.errors = {}
+
+    def add_error(self, label):
+        """Comptabilise une erreur (code HTTP hors 2xx ou exception)."""
+        self.errors[label] = self.errors.get(label, 0) + 1
+
+
+class _Schedule:
+    """
+    Distribue les créneaux d'envoi entre les utilisateurs virtuels.
+
+    Avec un débit cible, la requête n°i est prévue à start + i / rate pour
+    l'ensemble des utilisateurs (pas de rafale après un ralentissement du
+    serveur) ; sans débit cible, chaque utilisateur enchaîne ses requêtes.
+    Le tir s'arrête au nombre de requêtes ou à la durée atteints.
+    """
+
+    def __init__(self, rate, total_requests, duration):
+        self.rate = rate
+        self.total_requests = total_requests
+        self.start = time.perf_counter()
+        self.deadline = self.start + duration if duration else None
+        self.issued = 0
+        self.stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def next_slot(self):
+        """
+        Réserve le créneau de la prochaine requête.
+
+        Returns:
+            float: Instant prévu d'envoi (perf_counter) ou None si le tir est terminé
+        """
+        with self._lock:
+            if self.stop.is_set() or (self.total_requests and self.issued >= self.total_requests):
+                return None
+            slot = self.start + self.issued / self.rate if self.rate else time.perf_counter()
+            if self.deadline is not None and max(slot, time.perf_counter()) >= self.deadline:
+                return None
+            self.issued += 1
+            return slot
+
+
+class HTTPLoadAction(ActionBase):
+    """Action de génération de charge HTTP (utilisateurs virtuels concurrents)."""
+
+    # Métadonnées du plugin
+    plugin_name = "http_load"
+    label = "HTTP Load"
+    version = "1.0.0"
+    author = "TestGyver Team"
+
+    def get_metadata(self):
+        """Retourne les métadonnées de l'action."""
+        return {
+            "name": self.plugin_name,
+            "version": self.version,
+            "author": self.author,
+            "description": "Envoie une charge HTTP (utilisateurs virtuels, débit cible) et mesure les percentiles de latence"
+        }
+
+    def validate_config(self, config):
+        """Valide la configuration de l'action."""
+        if 'url' not in config or not config['url']:
+            return (False, "L'URL est obligatoire")
+        if 'method' not in config or not config['method']:
+            return (False, "La méthode HTTP est obligatoire")
+        if config['method'].upper() not in METHODS:
+            return (False, f"Méthode HTTP non supportée: {config['method']}")
+        try:
+            self._load_parameters(config, get_load_settings())
+        except ValueError as e:
+            return (False, str(e))
+        return (True, "")
+
+    def get_input_mask(self):
+        """Retourne le masque de saisie de la génération de charge."""
+        return [
+            {
+                "name": "method",
+                "type": "select",
+                "label": "Méthode HTTP",
+                "options": list(METHODS),
+                "required": True
+            },
+            {
+                "name": "url",
+                "type": "string",
+                "label": "URL",
+                "placeholder": "https://example.com/api/endpoint",
+                "required": True
+            },
+            {
+                "name": "headers",
+                "type": "textarea",
+                "label": "En-têtes HTTP (JSON)",
+                "placeholder": '{"Content-Type": "application/json"}',
+                "required": False
+            },
+            {
+                "name": "body",
+                "type": "textarea",
+                "label": "Corps de la requête (pour POST/PUT)",
+                "placeholder": '{"key": "value"}',
+                "required": False
+            },
+            {
+                "name": "virtual_users",
+                "type": "number",
+                "label": "Utilisateurs virtuels (requêtes simultanées)",
+                "placeholder": str(DEFAULT_VIRTUAL_USERS),
+                "required": False
+            },
+            {
+                "name": "duration",
+                "type": "number",
+                "label": "Durée du tir (secondes)",
+                "placeholder": "30",
+                "required": False
+            },
+            {
+                "name": "requests",
+                "type": "number",
+                "label": "Nombre total de requêtes",
+                "placeholder": "1000",
+                "required": False
+            },
+            {
+                "name": "rate",
+                "type": "number",
+                "label": "Débit cible (requêtes/s, vide = maximum)",
+                "placeholder": "200",
+                "required": False
+            }
+        ]
+
+    def get_output_variables(self):
+        """Retourne la liste des variables de sortie de la génération de charge."""
+        return [
+            {
+                "name": "http_load_requests",
+                "description": "Nombre de requêtes envoyées",
+                "type": "number"
+            },
+            {
+                "name": "http_load_errors",
+                "description": "Nombre de requêtes en erreur (code hors 2xx, timeout, connexion)",
+                "type": "number"
+            },
+            {
+                "name": "http_load_error_rate",
+                "description": "Pourcentage de requêtes en erreur",
+                "type": "number"
+            },
+            {
+                "name": "http_load_rps",
+                "description": "Débit mesuré en requêtes par seconde",
+                "type": "number"
+            },
+            {
+                "name": "http_load_p50",
+                "description": "Latence médiane en millisecondes",
+                "type": "number"
+            },
+            {
+                "name": "http_load_p90",
+                "description": "90e percentile de latence en millisecondes",
+                "type": "number"
+            },
+            {
+                "name": "http_load_p99",
+                "description": "99e percentile de latence en millisecondes",
+                "type": "number"
+            },
+            {
+                "name": "http_load_max",
+                "description": "Latence maximale en millisecondes",
+                "type": "number"
+            },
+            {
+                "name": "http_load_error_breakdown",
+                "description": "Nombre d'erreurs par type (JSON, ex: {\"HTTP 503\": 12, \"Timeout\": 3})",
+                "type": "string"
+            }
+        ]
+
+    @staticmethod
+    def _load_parameters(action_context, settings):
+        """
+        Lit et vérifie les paramètres du tir.
+
+        Args:
+            action_context: Paramètres de l'action
+            settings: Configuration connections.http_load
+
+        Returns:
+            tuple: (utilisateurs virtuels, durée, nombre de requêtes, débit cible)
+
+        Raises:
+            ValueError: Paramètre invalide
+        """
+        virtual_users = _number(action_context.get('virtual_users'), int, DEFAULT_VIRTUAL_USERS)
+        duration = _number(action_context.get('duration'), float)
+        total_requests = _number(action_context.get('requests'), int)
+        rate = _number(action_context.get('rate'), float)
+
+        max_virtual_users = int(settings.get('max_virtual_users', DEFAULT_MAX_VIRTUAL_USERS))
+        max_duration = float(settings.get('max_duration', DEFAULT_MAX_DURATION))
+
+        if not 1 <= virtual_users <= max_virtual_users:
+            raise ValueError(f"Le nombre d'utilisateurs virtuels doit être compris entre 1 et {max_virtual_users}")
+        if not duration and not total_requests:
+            raise ValueError("La durée ou le nombre de requêtes est obligatoire")
+        if duration is not None and not 0 <= duration <= max_duration:
+            raise ValueError(f"La durée doit être comprise entre 0 et {max_duration:g} secondes")
+        if total_requests is not None and total_requests < 0:
+            raise ValueError("Le nombre de requêtes doit être positif")
+        if rate is not None and rate < 0:
+            raise ValueError("Le débit cible doit être positif")
+
+        return virtual_users, duration or None, total_requests or None, rate or None
+
+    @staticmethod
+    def _run_user(schedule, send, stats):
+        """
+        Boucle d'un utilisateur virtuel : envoie une requête par créneau.
+
+        Avec un débit cible, la latence est mesurée depuis l'instant prévu
+        d'envoi : une requête retardée parce que les utilisateurs sont tous
+        occupés compte son attente (pas d'omission coordonnée).
+
+        Args:
+            schedule: _Schedule partagé
+            send: Fonction envoyant une requête et renvoyant la réponse
+            stats: _UserStats de l'utilisateur
+        """
+        while True:
+            slot = schedule.next_slot()
+            if slot is None:
+                return
+
+            delay = slot - time.perf_counter()
+            if delay > 0 and schedule.stop.wait(delay):
+                return
+
+            begin = slot if schedule.rate else time.perf_counter()
+            try:
+                response = send()
+            except requests.exceptions.Timeout:
+                stats.add_error("Timeout")
+            except requests.exceptions.ConnectionError:
+                stats.add_error("ConnectionError")
+            except requests.exceptions.RequestException as e:
+                stats.add_error(type(e).__name__)
+            else:
+                stats.histogram.record(time.perf_counter() - begin)
+                status = str(response.status_code)
+                stats.status_codes[status] = stats.status_codes.get(status, 0) + 1
+                if not 200 <= response.status_code < 300:
+                    stats.add_error(f"HTTP {status}")
+            stats.completed += 1
+
+    def execute(self, action_context):
+        """
+        Exécute un tir de charge HTTP.
+
+        Chaque utilisateur virtuel est un thread disposant de sa propre
+        session keep-alive ; les requêtes sont envoyées jusqu'au nombre de
+        requêtes ou à la durée demandés, au débit cible s'il est renseigné.
+        Les latences des réponses reçues (tous codes HTTP) sont enregistrées
+        dans un histogramme (utils/latency_histogram.py).
+
+        Args:
+            action_context: Dictionnaire contenant method, url, headers, body,
+                virtual_users, duration, requests, rate
+        """
+        try:
+            method = action_context.get('method', 'GET').upper()
+            url = action_context.get('url')
+            headers = action_context.get('headers', {})
+            body = action_context.get('body')
+
+            if isinstance(headers, str):
+                headers = json.loads(headers) if headers else {}
+            if isinstance(body, str) and body:
+                body = json.loads(body)
+
+            if method not in METHODS:
+                self.set_code(1)
+                self.add_trace(f"Méthode HTTP non supportée: {method}")
+                return self.get_result()
+
+            load_settings = get_load_settings()
+            try:
+                virtual_users, duration, total_requests, rate = self._load_parameters(action_context, load_settings)
+            except ValueError as e:
+                self.set_code(1)
+                self.add_trace(str(e))
+                return self.get_result()
+
+            # Pas de reprise automatique : une erreur doit être comptée, pas masquée
+            http_settings = dict(get_http_settings(), retries=0, pool_connections=1, pool_maxsize=1)
+            timeout = http_settings.get('timeout', DEFAULT_TIMEOUT)
+            payload = body if method in ('POST', 'PUT') else None
+
+            limits = []
+            if total_requests:
+                limits.append(f"{total_requests} requêtes")
+            if duration:
+                limits.append(f"{duration:g}s")
+            self.add_trace(
+                f"Tir {method} {url} : {virtual_users} utilisateurs virtuels, "
+                f"{' / '.join(limits)}, débit cible {f'{rate:g} req/s' if rate else 'maximal'}"
+            )
+
+            scope = current_scope()
+            live_log = scope.live_log if scope is not None else None
+            progress_interval = float(load_settings.get('progress_interval', DEFAULT_PROGRESS_INTERVAL))
+
+            sessions = [create_session(http_settings) for _ in range(virtual_users)]
+            users = [_UserStats() for _ in range(virtual_users)]
+            schedule = _Schedule(rate, total_requests, duration)
+
+            try:
+                with ThreadPoolExecutor(max_workers=virtual_users, thread_name_prefix='http-load') as executor:
+                    futures = [
+                        executor.submit(
+                            self._run_user, schedule,
+                            lambda session=session: session.request(method, url, headers=headers, json=payload, timeout=timeout),
+                            stats
+                        )
+                        for session, stats in zip(sessions, users)
+                    ]
+                    try:
+                        while True:
+                            done, pending = wait(futures, timeout=progress_interval, return_when=FIRST_EXCEPTION)
+                            if not pending or any(future.exception() for future in done):
+                                break
+                            if live_log is not None:
+                                completed = sum(stats.completed for stats in users)
+                                errors = sum(sum(stats.errors.values()) for stats in users)
+                                elapsed = time.perf_counter() - schedule.start
+                                live_log([f"[http_load] {completed} requêtes, {completed / elapsed:.1f} req/s, {errors} erreurs"])
+                    finally:
+                        schedule.stop.set()
+                    for future in futures:
+                        future.result()
+            finally:
+                for session in sessions:
+                    session.close()
+
+            elapsed = time.perf_counter() - schedule.start
+
+            histogram = LatencyHistogram()
+            status_codes, error_breakdown = {}, {}
+            for stats in users:
+                histogram.merge(stats.histogram)
+                for status, count in stats.status_codes.items():
+                    status_codes[status] = status_codes.get(status, 0) + count
+                for label, count in stats.errors.items():
+                    error_breakdown[label] = error_breakdown.get(label, 0) + count
+
+            completed = sum(stats.completed for stats in users)
+            errors = sum(error_breakdown.values())
+            rps = round(completed / elapsed, 2) if elapsed > 0 else 0.0
+            error_rate = round(100.0 * errors / completed, 2) if completed else 0.0
+            latency = histogram.summary((50, 90, 99))
+
+            self.add_trace(f"{completed} requêtes en {elapsed:.2f}s ({rps} req/s), {errors} erreurs ({error_rate}%)")
+            self.add_trace(
+                f"Latences (ms) : p50={latency['p50']} p90={latency['p90']} "
+                f"p99={latency['p99']} max={latency['max']}"
+            )
+            for label, count in sorted(error_breakdown.items(), key=lambda item: -item[1]):
+                self.add_trace(f"Erreur {label} : {count}")
+            if rate and rps < 0.95 * rate:
+                self.add_trace(f"⚠ Débit cible de {rate:g} req/s non atteint (augmenter le nombre d'utilisateurs virtuels)")
+
+            output_vars = {
+                "http_load_requests": completed,
+                "http_load_errors": errors,
+                "http_load_error_rate": error_rate,
+                "http_load_rps": rps,
+                "http_load_p50": latency['p50'],
+                "http_load_p90": latency['p90'],
+                "http_load_p99": latency['p99'],
+                "http_load_max": latency['max'],
+                "http_load_error_breakdown": json.dumps(error_breakdown)
+            }
+            result_data = {
+                "duration": round(elapsed, 3),
+                "requests": completed,
+                "rps": rps,
+                "latency_ms": latency,
+                "status_codes": status_codes,
+                "errors": error_breakdown,
+                "histogram_us": histogram.buckets()
+            }
+
+            if completed and errors < completed:
+                self.set_code(0)
+                self.add_trace("Tir de charge terminé")
+            else:
+                self.set_code(1)
+                self.add_trace("Aucune requête réussie")
+            return self.get_result(result_data, output_vars)
+
+        except Exception as e:
+            self.set_code(1)
+            self.add_trace(f"Erreur lors de l'exécution: {str(e)}")
+            return self.get_result()
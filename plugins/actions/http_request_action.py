@@ -1,6 +1,71 @@
 """Action pour effectuer des requêtes HTTP."""
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from plugins.actions.action_base import ActionBase
+from utils.config import get_config
+from utils.run_context import current_scope
+
+DEFAULT_TIMEOUT = 30  # secondes
+DEFAULT_POOL_SIZE = 10
+
+
+def get_http_settings():
+    """Retourne la configuration des connexions HTTP (connections.http)."""
+    return get_config().get('connections', {}).get('http', {})
+
+
+def create_session(settings=None):
+    """
+    Crée une session HTTP keep-alive avec pool de connexions et reprises.
+
+    Les cookies reçus ne sont pas conservés entre deux actions : chaque
+    requête reste indépendante, seule la connexion est réutilisée.
+
+    Args:
+        settings: Configuration connections.http (lue si None)
+
+    Returns:
+        requests.Session: Session configurée
+    """
+    settings = get_http_settings() if settings is None else settings
+    retries = int(settings.get('retries', 0))
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=float(settings.get('backoff_factor', 0.3)),
+        status_forcelist=tuple(settings.get('status_forcelist', (502, 503, 504))),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=int(settings.get('pool_connections', DEFAULT_POOL_SIZE)),
+        pool_maxsize=int(settings.get('pool_maxsize', DEFAULT_POOL_SIZE)),
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    # Nombre de connexions ouvertes par pool, pour détecter les réutilisations
+    session.connection_counts = {}
+    return session
+
+
+def _count_new_connections(session, response):
+    """Retourne le nombre de connexions ouvertes pour cette réponse (None si inconnu)."""
+    pool = getattr(response.raw, '_pool', None)
+    if pool is None or not hasattr(pool, 'num_connections'):
+        return None
+
+    previous = session.connection_counts.get(id(pool), 0)
+    session.connection_counts[id(pool)] = pool.num_connections
+    return pool.num_connections - previous
 
 
 class HTTPRequestAction(ActionBase):
@@ -114,23 +179,49 @@ class HTTPRequestAction(ActionBase):
                 import json
                 body = json.loads(body)
             
-            # Effectuer la requête
-            if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
-            elif method == 'POST':
-                response = requests.post(url, headers=headers, json=body, timeout=30)
-            elif method == 'PUT':
-                response = requests.put(url, headers=headers, json=body, timeout=30)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, timeout=30)
-            else:
+            if method not in ('GET', 'POST', 'PUT', 'DELETE'):
                 self.set_code(1)
                 self.add_trace(f"Méthode HTTP non supportée: {method}")
                 return self.get_result()
             
+            # Session keep-alive partagée par les actions de l'exécution en
+            # cours pour le même schéma + hôte (voir utils/run_context.py)
+            settings = get_http_settings()
+            timeout = settings.get('timeout', DEFAULT_TIMEOUT)
+            scope = current_scope()
+            parts = urlsplit(url)
+            
+            if scope is not None:
+                session, previous_uses = scope.get_or_create(
+                    'http.session',
+                    (parts.scheme, parts.netloc),
+                    lambda: create_session(settings),
+                    close=lambda pooled_session: pooled_session.close()
+                )
+            else:
+                session, previous_uses = create_session(settings), 0
+            
+            try:
+                if method in ('POST', 'PUT'):
+                    response = session.request(method, url, headers=headers, json=body, timeout=timeout)
+                else:
+                    response = session.request(method, url, headers=headers, timeout=timeout)
+                new_connections = _count_new_connections(session, response)
+            finally:
+                if scope is None:
+                    session.close()
+            
             self.add_trace(f"Statut de la réponse: {response.status_code}")
             self.add_trace(f"Temps de réponse: {response.elapsed.total_seconds()}s")
             
+            connection_reused = new_connections == 0
+            if new_connections is None:
+                self.add_trace(f"Connexion: session {parts.netloc} utilisée {previous_uses + 1} fois")
+            elif connection_reused:
+                self.add_trace(f"Connexion réutilisée vers {parts.netloc} (keep-alive, requête n°{previous_uses + 1} de la session)")
+            else:
+                self.add_trace(f"Nouvelle connexion vers {parts.netloc}")
+            
             # Préparer les variables de sortie
             output_vars = {
                 "http_status_code": response.status_code,
@@ -146,7 +237,8 @@ class HTTPRequestAction(ActionBase):
                 result_data = {
                     "status_code": response.status_code,
                     "headers": dict(response.headers),
-                    "body": response.text[:1000]  # Limiter la taille
+                    "body": response.text[:1000],  # Limiter la taille
+                    "connection_reused": connection_reused
                 }
                 
                 return self.get_result(result_data, output_vars)
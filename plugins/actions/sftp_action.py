@@ -1,7 +1,20 @@
 """Action pour effectuer des opérations SFTP."""
 import paramiko
 import io
+import os
+import posixpath
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 from plugins.actions.action_base import ActionBase
+from utils.run_context import current_scope
+from utils.ssh_utils import get_sftp_settings, open_sftp, ssh_connection
+from utils.workdir import open_download, resolve_local_path
+
+DEFAULT_PARALLEL_TRANSFERS = 4
+DEFAULT_PREFETCH_REQUESTS = 64
 
 
 class SFTPAction(ActionBase):
@@ -37,7 +50,7 @@ class SFTPAction(ActionBase):
                 "name": "method",
                 "type": "select",
                 "label": "Méthode SFTP",
-                "options": ["GET", "PUT", "DELETE", "LIST"],
+                "options": ["GET", "PUT", "DELETE", "LIST", "DOWNLOAD", "UPLOAD", "DOWNLOAD_DIR", "UPLOAD_DIR"],
                 "required": True
             },
             {
@@ -81,6 +94,13 @@ class SFTPAction(ActionBase):
                 "label": "Contenu du fichier (pour PUT)",
                 "placeholder": "Contenu à uploader",
                 "required": False
+            },
+            {
+                "name": "local_path",
+                "type": "string",
+                "label": "Chemin local (DOWNLOAD : relatif à test.work_dir, UPLOAD : relatif à test.files_dir)",
+                "placeholder": "export/archive.tar.gz",
+                "required": False
             }
         ]
     
@@ -106,6 +126,21 @@ class SFTPAction(ActionBase):
                 "name": "sftp_operation_success",
                 "description": "Indique si l'opération a réussi (true/false)",
                 "type": "string"
+            },
+            {
+                "name": "sftp_local_path",
+                "description": "Chemin local du fichier ou répertoire transféré (pour DOWNLOAD/UPLOAD)",
+                "type": "string"
+            },
+            {
+                "name": "sftp_file_count",
+                "description": "Nombre de fichiers transférés (pour DOWNLOAD/UPLOAD)",
+                "type": "number"
+            },
+            {
+                "name": "sftp_throughput",
+                "description": "Débit du transfert en octets par seconde (pour DOWNLOAD/UPLOAD)",
+                "type": "number"
             }
         ]
     
@@ -114,11 +149,8 @@ class SFTPAction(ActionBase):
         Exécute une opération SFTP.
         
         Args:
-            action_context: Dictionnaire contenant method, host, port, username, password, remote_path, content
+            action_context: Dictionnaire contenant method, host, port, username, password, remote_path, content, local_path
         """
-        ssh_client = None
-        sftp = None
-        
         try:
             method = action_context.get('method', 'GET').upper()
             host = action_context.get('host')
@@ -130,100 +162,25 @@ class SFTPAction(ActionBase):
             
             self.add_trace(f"Connexion SFTP à {username}@{host}:{port}")
             
-            # Créer le client SSH
-            ssh_client = paramiko.SSHClient()
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            # Se connecter
-            ssh_client.connect(
-                hostname=host,
-                port=port,
-                username=username,
-                password=password,
-                timeout=30
-            )
-            
-            # Ouvrir la session SFTP
-            sftp = ssh_client.open_sftp()
-            
-            self.add_trace("Connexion SFTP établie")
-            
-            # Exécuter l'opération demandée
-            if method == 'GET':
-                self.add_trace(f"Téléchargement du fichier: {remote_path}")
-                
-                # Télécharger le fichier
-                with sftp.file(remote_path, 'r') as remote_file:
-                    file_content = remote_file.read().decode('utf-8', errors='replace')
-                
-                file_stats = sftp.stat(remote_path)
-                
-                self.set_code(0)
-                self.add_trace(f"Fichier téléchargé avec succès ({file_stats.st_size} octets)")
-                
-                return self.get_result({
-                    "content": file_content[:1000],  # Limiter la taille
-                    "size": file_stats.st_size
-                })
-            
-            elif method == 'PUT':
-                self.add_trace(f"Upload du fichier vers: {remote_path}")
-                
-                # Uploader le fichier
-                with sftp.file(remote_path, 'w') as remote_file:
-                    remote_file.write(content.encode('utf-8'))
+            # Le transport SSH est partagé avec les actions ssh/sftp du test ;
+            # seule la session SFTP (un canal) est propre à cette action
+            with ssh_connection(host, port, username, password) as (connection, reused):
+                if reused:
+                    self.add_trace("Connexion SSH réutilisée")
                 
-                self.set_code(0)
-                self.add_trace(f"Fichier uploadé avec succès ({len(content)} octets)")
+                sftp = open_sftp(connection.client)
+                self.add_trace("Connexion SFTP établie")
                 
-                return self.get_result({
-                    "uploaded": True,
-                    "size": len(content)
-                })
-            
-            elif method == 'DELETE':
-                self.add_trace(f"Suppression du fichier: {remote_path}")
-                
-                # Supprimer le fichier
-                sftp.remove(remote_path)
-                
-                self.set_code(0)
-                self.add_trace("Fichier supprimé avec succès")
-                
-                return self.get_result({"deleted": True})
-            
-            elif method == 'LIST':
-                self.add_trace(f"Liste des fichiers dans: {remote_path}")
-                
-                # Lister les fichiers
-                files = sftp.listdir(remote_path)
-                
-                # Obtenir des détails pour chaque fichier
-                file_details = []
-                for filename in files[:50]:  # Limiter à 50 fichiers
+                try:
+                    if method in ('DOWNLOAD', 'UPLOAD', 'DOWNLOAD_DIR', 'UPLOAD_DIR'):
+                        return self._transfer(connection, sftp, method, remote_path, action_context.get('local_path'))
+                    return self._execute_method(sftp, method, remote_path, content)
+                finally:
                     try:
-                        full_path = f"{remote_path.rstrip('/')}/{filename}"
-                        stats = sftp.stat(full_path)
-                        file_details.append({
-                            "name": filename,
-                            "size": stats.st_size,
-                            "is_dir": paramiko.sftp_attr.S_ISDIR(stats.st_mode)
-                        })
-                    except:
-                        file_details.append({"name": filename})
-                
-                self.set_code(0)
-                self.add_trace(f"Liste récupérée ({len(files)} entrées)")
-                
-                return self.get_result({
-                    "files": file_details,
-                    "count": len(files)
-                })
-            
-            else:
-                self.set_code(1)
-                self.add_trace(f"Méthode SFTP non supportée: {method}")
-                return self.get_result()
+                        sftp.close()
+                        self.add_trace("Session SFTP fermée")
+                    except Exception:
+                        pass
         
         except paramiko.AuthenticationException:
             self.set_code(1)
@@ -244,17 +201,346 @@ class SFTPAction(ActionBase):
             self.set_code(1)
             self.add_trace(f"Erreur inattendue: {str(e)}")
             return self.get_result()
+    
+    def _execute_method(self, sftp, method, remote_path, content):
+        """
+        Exécute l'opération SFTP demandée sur une session ouverte.
         
-        finally:
-            if sftp:
+        Args:
+            sftp: paramiko.SFTPClient
+            method: GET, PUT, DELETE ou LIST
+            remote_path: Chemin distant
+            content: Contenu à uploader (PUT)
+        
+        Returns:
+            dict: Résultat de l'action
+        """
+        # Exécuter l'opération demandée
+        if method == 'GET':
+            self.add_trace(f"Téléchargement du fichier: {remote_path}")
+            
+            # Télécharger le fichier
+            with sftp.file(remote_path, 'r') as remote_file:
+                file_content = remote_file.read().decode('utf-8', errors='replace')
+            
+            file_stats = sftp.stat(remote_path)
+            
+            self.set_code(0)
+            self.add_trace(f"Fichier téléchargé avec succès ({file_stats.st_size} octets)")
+            
+            return self.get_result({
+                "content": file_content[:1000],  # Limiter la taille
+                "size": file_stats.st_size
+            })
+        
+        elif method == 'PUT':
+            self.add_trace(f"Upload du fichier vers: {remote_path}")
+            
+            # Uploader le fichier
+            with sftp.file(remote_path, 'w') as remote_file:
+                remote_file.write(content.encode('utf-8'))
+            
+            self.set_code(0)
+            self.add_trace(f"Fichier uploadé avec succès ({len(content)} octets)")
+            
+            return self.get_result({
+                "uploaded": True,
+                "size": len(content)
+            })
+        
+        elif method == 'DELETE':
+            self.add_trace(f"Suppression du fichier: {remote_path}")
+            
+            # Supprimer le fichier
+            sftp.remove(remote_path)
+            
+            self.set_code(0)
+            self.add_trace("Fichier supprimé avec succès")
+            
+            return self.get_result({"deleted": True})
+        
+        elif method == 'LIST':
+            self.add_trace(f"Liste des fichiers dans: {remote_path}")
+            
+            # Lister les fichiers
+            files = sftp.listdir(remote_path)
+            
+            # Obtenir des détails pour chaque fichier
+            file_details = []
+            for filename in files[:50]:  # Limiter à 50 fichiers
                 try:
-                    sftp.close()
-                    self.add_trace("Session SFTP fermée")
+                    full_path = f"{remote_path.rstrip('/')}/{filename}"
+                    stats = sftp.stat(full_path)
+                    file_details.append({
+                        "name": filename,
+                        "size": stats.st_size,
+                        "is_dir": paramiko.sftp_attr.S_ISDIR(stats.st_mode)
+                    })
                 except:
-                    pass
+                    file_details.append({"name": filename})
+            
+            self.set_code(0)
+            self.add_trace(f"Liste récupérée ({len(files)} entrées)")
             
-            if ssh_client:
+            return self.get_result({
+                "files": file_details,
+                "count": len(files)
+            })
+        
+        else:
+            self.set_code(1)
+            self.add_trace(f"Méthode SFTP non supportée: {method}")
+            return self.get_result()
+    
+    
+    def _transfer(self, connection, sftp, method, remote_path, local_path):
+        """
+        Transfère un fichier ou un répertoire entre le serveur et le disque local.
+        
+        Les fichiers sont transférés par blocs (lecture anticipée pour les
+        téléchargements) sans être chargés en mémoire. Les répertoires sont
+        parcourus récursivement et leurs fichiers transférés en parallèle
+        (`connections.sftp.parallel_transfers` sessions SFTP sur la même connexion).
+        
+        Args:
+            connection: SSHConnection (canal de `sftp` déjà réservé)
+            sftp: Session SFTP ouverte
+            method: DOWNLOAD, UPLOAD, DOWNLOAD_DIR ou UPLOAD_DIR
+            remote_path: Chemin distant
+            local_path: Chemin local (relatif au répertoire de la campagne, ou absolu dans celui-ci)
+        
+        Returns:
+            dict: Résultat de l'action
+        """
+        if not remote_path or not local_path:
+            self.set_code(1)
+            self.add_trace(f"Les champs 'remote_path' et 'local_path' sont obligatoires pour {method}")
+            return self.get_result()
+        
+        scope = current_scope()
+        download = method.startswith('DOWNLOAD')
+        base_dir = None
+        if scope is not None:
+            base_dir = scope.work_dir if download else scope.files_dir
+        path = resolve_local_path(local_path, base_dir)
+        settings = get_sftp_settings()
+        
+        started = time.monotonic()
+        
+        if method == 'DOWNLOAD':
+            self.add_trace(f"Téléchargement de {remote_path} vers {path}")
+            jobs = [(remote_path, path)]
+        elif method == 'UPLOAD':
+            if not path.is_file():
+                self.set_code(1)
+                self.add_trace(f"Fichier local introuvable: {path}")
+                return self.get_result()
+            self.add_trace(f"Upload de {path} vers {remote_path}")
+            jobs = [(remote_path, path)]
+        elif method == 'DOWNLOAD_DIR':
+            self.add_trace(f"Téléchargement du répertoire {remote_path} vers {path}")
+            jobs = self._list_remote_tree(sftp, remote_path, path)
+        else:
+            if not path.is_dir():
+                self.set_code(1)
+                self.add_trace(f"Répertoire local introuvable: {path}")
+                return self.get_result()
+            self.add_trace(f"Upload du répertoire {path} vers {remote_path}")
+            jobs = self._prepare_remote_tree(sftp, path, remote_path)
+        
+        if method in ('DOWNLOAD', 'UPLOAD'):
+            # Un seul fichier : transfert sur la session déjà ouverte
+            transferred = self._transfer_file(sftp, download, jobs[0][0], jobs[0][1], settings)
+            errors = []
+        else:
+            transferred, errors = self._transfer_parallel(connection, sftp, download, jobs, settings)
+        
+        duration = time.monotonic() - started
+        throughput = int(transferred / duration) if duration > 0 else transferred
+        file_count = len(jobs) - len(errors)
+        
+        for error in errors[:10]:
+            self.add_trace(f"Échec du transfert: {error}")
+        if len(errors) > 10:
+            self.add_trace(f"... {len(errors) - 10} autre(s) échec(s)")
+        
+        self.add_trace(f"{file_count} fichier(s), {transferred} octets transférés en {duration:.2f} s "
+                       f"({throughput / 1024 / 1024:.2f} Mo/s)")
+        self.set_code(1 if errors else 0)
+        
+        output_vars = {
+            "sftp_file_content": "",
+            "sftp_file_size": transferred,
+            "sftp_file_list": "",
+            "sftp_operation_success": "false" if errors else "true",
+            "sftp_local_path": str(path),
+            "sftp_file_count": file_count,
+            "sftp_throughput": throughput
+        }
+        
+        return self.get_result({
+            "local_path": str(path),
+            "files": file_count,
+            "failed": len(errors),
+            "size": transferred,
+            "duration": round(duration, 3),
+            "throughput": throughput
+        }, output_vars)
+    
+    @staticmethod
+    def _transfer_file(sftp, download, remote_path, local_path, settings):
+        """
+        Transfère un fichier par blocs.
+        
+        Args:
+            sftp: Session SFTP
+            download: True pour télécharger, False pour uploader
+            remote_path: Chemin distant
+            local_path: Chemin local (Path)
+            settings: Configuration connections.sftp
+        
+        Returns:
+            int: Nombre d'octets transférés
+        """
+        if download:
+            # Fichier temporaire renommé en fin de transfert : un échec ne laisse
+            # pas de fichier tronqué (DOWNLOAD_DIR poursuit les autres fichiers)
+            with open_download(local_path) as local_file:
+                return sftp.getfo(
+                    remote_path, local_file, prefetch=True,
+                    max_concurrent_prefetch_requests=settings.get('max_concurrent_prefetch_requests', DEFAULT_PREFETCH_REQUESTS)
+                )
+        
+        file_size = os.path.getsize(local_path)
+        with open(local_path, 'rb') as local_file:
+            sftp.putfo(local_file, remote_path, file_size=file_size)
+        return file_size
+    
+    def _transfer_parallel(self, connection, primary_sftp, download, jobs, settings):
+        """
+        Transfère une liste de fichiers avec un nombre borné de sessions SFTP.
+        
+        La session de l'action est utilisée par l'un des threads ; les sessions
+        supplémentaires ne sont ouvertes que sur les canaux libres de la
+        connexion (`connections.ssh.max_sessions`, partagé avec les autres
+        actions), réservés sans attente.
+        
+        Args:
+            connection: SSHConnection
+            primary_sftp: Session SFTP de l'action
+            download: True pour télécharger, False pour uploader
+            jobs: Liste de (chemin distant, chemin local)
+            settings: Configuration connections.sftp
+        
+        Returns:
+            tuple: (octets transférés, liste des erreurs)
+        """
+        if not jobs:
+            return 0, []
+        
+        wanted = max(1, min(int(settings.get('parallel_transfers', DEFAULT_PARALLEL_TRANSFERS)), len(jobs)))
+        extra_slots = connection.try_acquire(wanted - 1)
+        workers = 1 + extra_slots
+        if workers < wanted:
+            self.add_trace(f"Canaux SSH disponibles : {workers} transfert(s) simultané(s) au lieu de {wanted}")
+        
+        local = threading.local()
+        free_sessions = [primary_sftp]
+        sessions = []
+        sessions_lock = threading.Lock()
+        
+        def run(remote_path, local_path):
+            """Transfère un fichier avec la session SFTP du thread."""
+            sftp = getattr(local, 'sftp', None)
+            if sftp is None:
+                with sessions_lock:
+                    sftp = free_sessions.pop() if free_sessions else None
+                if sftp is None:
+                    # Canal réservé par try_acquire (au plus un par thread supplémentaire)
+                    sftp = open_sftp(connection.client, settings)
+                    with sessions_lock:
+                        sessions.append(sftp)
+                local.sftp = sftp
+            return self._transfer_file(sftp, download, remote_path, local_path, settings)
+        
+        transferred = 0
+        errors = []
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sftp') as pool:
+                futures = {pool.submit(run, remote_path, local_path): remote_path for remote_path, local_path in jobs}
+                for future in as_completed(futures):
+                    try:
+                        transferred += future.result()
+                    except Exception as e:
+                        errors.append(f"{futures[future]}: {e}")
+        finally:
+            for sftp in sessions:
                 try:
-                    ssh_client.close()
-                except:
+                    sftp.close()
+                except Exception:
                     pass
+            connection.release(extra_slots)
+        
+        return transferred, errors
+    
+    @staticmethod
+    def _list_remote_tree(sftp, remote_root, local_root):
+        """
+        Parcourt récursivement un répertoire distant.
+        
+        Args:
+            sftp: Session SFTP
+            remote_root: Répertoire distant
+            local_root: Répertoire local de destination (Path)
+        
+        Returns:
+            list: Liste de (chemin distant, chemin local) des fichiers réguliers
+        """
+        jobs = []
+        pending = ['']
+        local_root.mkdir(parents=True, exist_ok=True)
+        
+        while pending:
+            relative_dir = pending.pop()
+            remote_dir = posixpath.join(remote_root, relative_dir) if relative_dir else remote_root
+            for attr in sftp.listdir_attr(remote_dir):
+                relative_path = posixpath.join(relative_dir, attr.filename) if relative_dir else attr.filename
+                if stat.S_ISDIR(attr.st_mode):
+                    (local_root / relative_path).mkdir(parents=True, exist_ok=True)
+                    pending.append(relative_path)
+                elif stat.S_ISREG(attr.st_mode):
+                    jobs.append((posixpath.join(remote_root, relative_path), local_root / relative_path))
+        
+        return jobs
+    
+    @staticmethod
+    def _prepare_remote_tree(sftp, local_root, remote_root):
+        """
+        Crée l'arborescence distante d'un répertoire local et liste ses fichiers.
+        
+        Args:
+            sftp: Session SFTP
+            local_root: Répertoire local (Path)
+            remote_root: Répertoire distant de destination
+        
+        Returns:
+            list: Liste de (chemin distant, chemin local) des fichiers réguliers
+        """
+        jobs = []
+        
+        for current_dir, dirnames, filenames in os.walk(local_root):
+            relative_dir = Path(current_dir).relative_to(local_root).as_posix()
+            remote_dir = remote_root if relative_dir == '.' else posixpath.join(remote_root, relative_dir)
+            
+            # Les répertoires parents sont créés avant leurs enfants (parcours descendant)
+            try:
+                sftp.stat(remote_dir)
+            except IOError:
+                sftp.mkdir(remote_dir)
+            
+            for filename in filenames:
+                local_file = Path(current_dir) / filename
+                if local_file.is_file():
+                    jobs.append((posixpath.join(remote_dir, filename), local_file))
+        
+        return jobs
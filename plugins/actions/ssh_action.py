@@ -1,6 +1,8 @@
 """Action pour effectuer des commandes SSH."""
 import paramiko
 from plugins.actions.action_base import ActionBase
+from utils.run_context import current_scope
+from utils.ssh_utils import run_command, ssh_connection
 
 
 class SSHAction(ActionBase):
@@ -86,6 +88,16 @@ class SSHAction(ActionBase):
                 "name": "ssh_error",
                 "description": "Sortie d'erreur de la commande",
                 "type": "string"
+            },
+            {
+                "name": "ssh_output_file",
+                "description": "Fichier contenant la sortie standard complète (si enregistrée)",
+                "type": "string"
+            },
+            {
+                "name": "ssh_error_file",
+                "description": "Fichier contenant la sortie d'erreur complète (si enregistrée)",
+                "type": "string"
             }
         ]
     
@@ -93,11 +105,13 @@ class SSHAction(ActionBase):
         """
         Exécute une commande SSH.
         
+        Dans un test ou une campagne, la connexion SSH est conservée et
+        réutilisée par les actions suivantes vers le même hôte et utilisateur
+        (nouveau canal par commande, voir utils/ssh_utils.py).
+        
         Args:
             action_context: Dictionnaire contenant host, port, username, password, command
         """
-        ssh_client = None
-        
         try:
             host = action_context.get('host')
             port = int(action_context.get('port', 22))
@@ -107,37 +121,49 @@ class SSHAction(ActionBase):
             
             self.add_trace(f"Connexion SSH à {username}@{host}:{port}")
             
-            # Créer le client SSH
-            ssh_client = paramiko.SSHClient()
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            # Se connecter
-            ssh_client.connect(
-                hostname=host,
-                port=port,
-                username=username,
-                password=password,
-                timeout=30
-            )
+            scope = current_scope()
+            live_log = scope.live_log if scope is not None else None
+            on_lines = None
+            if live_log is not None:
+                def on_lines(stream, lines):
+                    """Affiche en direct les lignes reçues (préfixe stderr)."""
+                    prefix = '[stderr] ' if stream == 'stderr' else ''
+                    live_log([f"{prefix}{line}" for line in lines])
             
-            self.add_trace("Connexion établie")
-            self.add_trace(f"Exécution de la commande: {command}")
-            
-            # Exécuter la commande
-            stdin, stdout, stderr = ssh_client.exec_command(command)
+            with ssh_connection(host, port, username, password) as (connection, reused):
+                self.add_trace("Connexion SSH réutilisée" if reused else "Connexion établie")
+                self.add_trace(f"Exécution de la commande: {command}")
+                
+                # Exécuter la commande (nouveau canal sur le transport), stdout et
+                # stderr lus en parallèle, sortie complète écrite dans le répertoire
+                # de travail si elle dépasse la taille conservée en mémoire
+                run = run_command(
+                    connection.client, command,
+                    spill_dir=scope.work_dir if scope is not None else None,
+                    on_lines=on_lines
+                )
             
-            # Lire les résultats
-            output = stdout.read().decode('utf-8')
-            error_output = stderr.read().decode('utf-8')
-            exit_code = stdout.channel.recv_exit_status()
+            exit_code = run['exit_code']
+            stdout, stderr = run['stdout'], run['stderr']
+            output = stdout.text()
+            error_output = stderr.text()
+            output_file = stdout.spill_path if stdout.spilled else ""
+            error_file = stderr.spill_path if stderr.spilled else ""
             
-            self.add_trace(f"Code de sortie: {exit_code}")
+            self.add_trace(f"Code de sortie: {exit_code} ({run['duration']:.2f} s)")
+            for name, capture, path in (("standard", stdout, output_file), ("d'erreur", stderr, error_file)):
+                if capture.truncated:
+                    self.add_trace(f"Sortie {name} tronquée ({capture.total} octets)" + (f", complète dans {path}" if path else ""))
+                elif path:
+                    self.add_trace(f"Sortie {name} enregistrée dans {path}")
             
             # Préparer les variables de sortie
             output_vars = {
                 "ssh_exit_code": exit_code,
                 "ssh_output": output,
-                "ssh_error": error_output if error_output else ""
+                "ssh_error": error_output if error_output else "",
+                "ssh_output_file": output_file,
+                "ssh_error_file": error_file
             }
             
             if exit_code == 0:
@@ -147,7 +173,11 @@ class SSHAction(ActionBase):
                 result_data = {
                     "exit_code": exit_code,
                     "output": output[:1000],  # Limiter la taille
-                    "error": error_output[:500] if error_output else None
+                    "error": error_output[:500] if error_output else None,
+                    "output_size": stdout.total,
+                    "error_size": stderr.total,
+                    "truncated": stdout.truncated or stderr.truncated,
+                    "connection_reused": reused
                 }
                 
                 return self.get_result(result_data, output_vars)
@@ -158,7 +188,11 @@ class SSHAction(ActionBase):
                 return self.get_result({
                     "exit_code": exit_code,
                     "output": output[:500],
-                    "error": error_output[:500]
+                    "error": error_output[:500],
+                    "output_size": stdout.total,
+                    "error_size": stderr.total,
+                    "truncated": stdout.truncated or stderr.truncated,
+                    "connection_reused": reused
                 }, output_vars)
         
         except paramiko.AuthenticationException:
@@ -175,8 +209,3 @@ class SSHAction(ActionBase):
             self.set_code(1)
             self.add_trace(f"Erreur lors de l'exécution: {str(e)}")
             return self.get_result()
-        
-        finally:
-            if ssh_client:
-                ssh_client.close()
-                self.add_trace("Connexion SSH fermée")
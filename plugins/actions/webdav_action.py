@@ -1,7 +1,8 @@
 """Action pour effectuer des opérations WebDAV."""
 import os
+from email.utils import parsedate_to_datetime
 from plugins.actions.action_base import ActionBase
-from utils.webdav_utils import WebDAVClient
+from utils.webdav_utils import webdav_client
 
 class WebdavAction(ActionBase):
     """Action pour effectuer des opérations WebDAV sur un serveur distant."""
@@ -86,6 +87,13 @@ class WebdavAction(ActionBase):
                 "label": "Fichier cible/chemin",
                 "placeholder": "pour move, download, upload",
                 "required": False
+            },
+            {
+                "name": "skipUnchanged",
+                "type": "select",
+                "label": "Ignorer les fichiers inchangés (upload d'un répertoire)",
+                "options": ["false", "true"],
+                "required": False
             }
         ]
     
@@ -115,98 +123,177 @@ class WebdavAction(ActionBase):
             
             self.add_trace(f"Préparation de l'opération WebDAV {action} vers {url}")
             
-            # Utiliser notre client WebDAV personnalisé
-            client = WebDAVClient(url, username, password)
-            
-            if action == "CHECK":
-                exists = client.exists(src_file)
-                status_text = 'existe' if exists else "n'existe pas"
-                self.add_trace(f"Vérification de l'existence de {src_file}: {status_text}")
-                return self.get_result( True, { "webdav_response": exists })
-            if action == "INFO":
-                info = client.info(src_file)
-                self.add_trace(f"Informations sur {src_file}: {info}")
-                return self.get_result( True, { "webdav_response": info })
-            if action == "LIST":
-                listing = client.list_directory(src_file)
-                self.add_trace(f"Liste des fichiers dans {src_file}: {listing}")
-                return self.get_result( True, { "webdav_response": listing })
-            if action == "MKDIR":
-                # Créer récursivement les répertoires si nécessaire
-                self._mkdir_recursive(client, src_file)
-                self.add_trace(f"Répertoire créé: {src_file}")
-                return self.get_result( True, { "webdav_response": True } )
-            if action == "REMOVE":
-                # Utiliser la méthode delete avec récursivité
-                client.delete(src_file, recursive=True)
-                self.add_trace(f"Ressource supprimée: {src_file}")
-                return self.get_result( True, { "webdav_response": True } )
-            if action == "MOVE":
-                client.move(src_file, targ_file)
-                self.add_trace(f"Fichier déplacé de {src_file} à {targ_file}")
-                return self.get_result( True, { "webdav_response": True } )
-            if action == "DOWNLOAD":
-                local_path = targ_file
-                client.download_file(remote_path=src_file, local_path=local_path)
-                self.add_trace(f"Fichier téléchargé de {src_file} à {local_path}")
-                return self.get_result( True, { "webdav_response": True } )
-            if action == "UPLOAD":
-                
-                local_path = src_file
+            # Client WebDAV dont la session est partagée avec les actions précédentes du test
+            with webdav_client(url, username, password) as (client, reused):
+                if reused:
+                    self.add_trace("Connexion WebDAV réutilisée")
                 
-                # Vérifier si src_file est un fichier ou un répertoire
-                if os.path.isfile(local_path):
-                    # Upload d'un seul fichier
-                    client.upload_file(local_path=local_path, remote_path=targ_file)
-                    self.add_trace(f"Fichier uploadé de {local_path} à {targ_file}")
-                elif os.path.isdir(local_path):
-                    # Upload récursif d'un répertoire
-                    self._upload_directory_recursive(client, local_path, targ_file)
-                    self.add_trace(f"Répertoire uploadé de {local_path} à {targ_file}")
-                else:
-                    raise ValueError(f"Le chemin local '{local_path}' n'existe pas ou n'est ni un fichier ni un répertoire")
+                if action == "CHECK":
+                    exists = client.exists(src_file)
+                    status_text = 'existe' if exists else "n'existe pas"
+                    self.add_trace(f"Vérification de l'existence de {src_file}: {status_text}")
+                    return self.get_result( True, { "webdav_response": exists })
+                if action == "INFO":
+                    info = client.info(src_file)
+                    self.add_trace(f"Informations sur {src_file}: {info}")
+                    return self.get_result( True, { "webdav_response": info })
+                if action == "LIST":
+                    listing = client.list_directory(src_file)
+                    self.add_trace(f"Liste des fichiers dans {src_file}: {listing}")
+                    return self.get_result( True, { "webdav_response": listing })
+                if action == "MKDIR":
+                    # Créer récursivement les répertoires si nécessaire
+                    self._mkdir_recursive(client, src_file)
+                    self.add_trace(f"Répertoire créé: {src_file}")
+                    return self.get_result( True, { "webdav_response": True } )
+                if action == "REMOVE":
+                    # Utiliser la méthode delete avec récursivité
+                    client.delete(src_file, recursive=True)
+                    self.add_trace(f"Ressource supprimée: {src_file}")
+                    return self.get_result( True, { "webdav_response": True } )
+                if action == "MOVE":
+                    client.move(src_file, targ_file)
+                    self.add_trace(f"Fichier déplacé de {src_file} à {targ_file}")
+                    return self.get_result( True, { "webdav_response": True } )
+                if action == "DOWNLOAD":
+                    local_path = targ_file
+                    client.download_file(remote_path=src_file, local_path=local_path)
+                    self.add_trace(f"Fichier téléchargé de {src_file} à {local_path}")
+                    return self.get_result( True, { "webdav_response": True } )
+                if action == "UPLOAD":
+                    
+                    local_path = src_file
+                    
+                    # Vérifier si src_file est un fichier ou un répertoire
+                    if os.path.isfile(local_path):
+                        # Upload d'un seul fichier
+                        client.upload_file(local_path=local_path, remote_path=targ_file)
+                        self.add_trace(f"Fichier uploadé de {local_path} à {targ_file}")
+                    elif os.path.isdir(local_path):
+                        # Upload récursif d'un répertoire
+                        skip_unchanged = str(action_context.get('skipUnchanged', 'false')).lower() == 'true'
+                        stats = self._upload_directory_recursive(client, local_path, targ_file, skip_unchanged)
+                        self.add_trace(f"Répertoire uploadé de {local_path} à {targ_file}")
+                        return self.get_result( True, { "webdav_response": stats } )
+                    else:
+                        raise ValueError(f"Le chemin local '{local_path}' n'existe pas ou n'est ni un fichier ni un répertoire")
+                    
+                    return self.get_result( True, None )
                 
-                return self.get_result( True, None )
-
-            raise ValueError(f"Action WebDAV inconnue: {action}")
+                raise ValueError(f"Action WebDAV inconnue: {action}")
         
         except Exception as e:
             self.set_code(1)
             self.add_trace(f"Erreur inattendue: {str(e)}")
             return self.get_result( False, None )
     
-    def _upload_directory_recursive(self, client, local_dir, remote_dir):
+    def _upload_directory_recursive(self, client, local_dir, remote_dir, skip_unchanged=False):
         """
         Upload récursif d'un répertoire local vers WebDAV.
         
+        L'arborescence distante est lue une seule fois (PROPFIND, voir
+        WebDAVClient.walk), les répertoires manquants sont créés niveau par
+        niveau puis les fichiers sont uploadés en parallèle sur la session
+        du client.
+        
         Args:
             client: Instance du client WebDAV
             local_dir: Chemin local du répertoire à uploader
             remote_dir: Chemin distant WebDAV de destination
+            skip_unchanged: Ne pas renvoyer les fichiers de même taille déjà présents
+                et modifiés sur le serveur après le fichier local
+        
+        Returns:
+            dict: Nombre de répertoires créés, de fichiers uploadés et ignorés
         """
         
         # Normaliser les chemins
         local_dir = local_dir.rstrip(os.sep)
         remote_dir = remote_dir.rstrip('/')
         
-        # Créer le répertoire distant s'il n'existe pas
+        # État distant en une requête ; créer le répertoire distant s'il n'existe pas
         # WebDAV nécessite un slash final pour les collections/répertoires
-        remote_dir_with_slash = remote_dir + '/'
-        if not self._is_directory(client, remote_dir_with_slash):
+        if self._is_directory(client, remote_dir + '/'):
+            remote_items = {item['relative']: item for item in client.walk(remote_dir)}
+        else:
             self._mkdir_recursive(client, remote_dir)
+            remote_items = {}
         
-        # Parcourir tous les fichiers et sous-répertoires
-        for item in os.listdir(local_dir):
-            local_path = os.path.join(local_dir, item)
-            remote_path = f"{remote_dir}/{item}"
-            
-            if os.path.isfile(local_path):
-                # Upload du fichier
-                client.upload_file(local_path=local_path, remote_path=remote_path)
-                self.add_trace(f"Fichier uploadé: {local_path} -> {remote_path}")
-            elif os.path.isdir(local_path):
-                # Appel récursif pour le sous-répertoire
-                self._upload_directory_recursive(client, local_path, remote_path)
+        # Parcourir tous les fichiers et sous-répertoires locaux
+        directories = []
+        files = []
+        for current_dir, dirnames, filenames in os.walk(local_dir):
+            relative_dir = os.path.relpath(current_dir, local_dir)
+            relative_dir = '' if relative_dir == '.' else relative_dir.replace(os.sep, '/')
+            for dirname in dirnames:
+                directories.append(f"{relative_dir}/{dirname}" if relative_dir else dirname)
+            for filename in filenames:
+                local_path = os.path.join(current_dir, filename)
+                if os.path.isfile(local_path):
+                    files.append((f"{relative_dir}/{filename}" if relative_dir else filename, local_path))
+        
+        # Créer les répertoires manquants, les parents avant leurs enfants
+        levels = {}
+        for relative_path in directories:
+            if remote_items.get(relative_path, {}).get('type') != 'directory':
+                levels.setdefault(relative_path.count('/'), []).append(f"{remote_dir}/{relative_path}")
+        for depth in sorted(levels):
+            client.run_parallel(client.mkdir, levels[depth])
+        created = sum(len(paths) for paths in levels.values())
+        if created:
+            self.add_trace(f"{created} sous-répertoire(s) créé(s)")
+        
+        # Fichiers à envoyer
+        if skip_unchanged:
+            uploads = [(relative_path, local_path) for relative_path, local_path in files
+                       if not self._is_unchanged(remote_items.get(relative_path), local_path)]
+        else:
+            uploads = files
+        skipped = len(files) - len(uploads)
+        
+        client.run_parallel(
+            lambda upload: client.upload_file(local_path=upload[1], remote_path=f"{remote_dir}/{upload[0]}"),
+            uploads
+        )
+        
+        self.add_trace(f"{len(uploads)} fichier(s) uploadé(s)" + (f", {skipped} inchangé(s) ignoré(s)" if skipped else ""))
+        
+        return {
+            "directories_created": created,
+            "files_uploaded": len(uploads),
+            "files_skipped": skipped
+        }
+    
+    @staticmethod
+    def _is_unchanged(remote_item, local_path):
+        """
+        Indique si un fichier distant correspond déjà au fichier local.
+        
+        La comparaison porte sur la taille et la date de modification : l'etag
+        WebDAV est opaque (propre au serveur) et ne peut pas être calculé pour
+        le fichier local. Le fichier est considéré inchangé si la taille est
+        identique et que la version distante n'est pas plus ancienne que le
+        fichier local ; sans date de modification distante, il est renvoyé.
+        
+        Args:
+            remote_item: Ressource distante (voir WebDAVClient.walk) ou None
+            local_path: Chemin du fichier local
+        
+        Returns:
+            bool: True si l'upload peut être ignoré
+        """
+        if not remote_item or remote_item['type'] != 'file':
+            return False
+        if remote_item.get('size') != os.path.getsize(local_path):
+            return False
+        if not remote_item.get('modified'):
+            # Taille seule insuffisante (ex: numéro de version modifié)
+            return False
+        try:
+            remote_modified = parsedate_to_datetime(remote_item['modified']).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return remote_modified >= os.path.getmtime(local_path)
     
     def _mkdir_recursive(self, client, path):
         """
@@ -1,7 +1,9 @@
 """Gestionnaire de plugins générique pour TestGyver."""
 import os
+import sys
 import importlib
 import inspect
+import threading
 import traceback
 from datetime import datetime
 from abc import ABC
@@ -25,15 +27,24 @@ class PluginManager:
         self.base_class = base_class
         self.plugins = {}
         self.errors = []  # Liste des erreurs de chargement
+        self.generation = 0  # Incrémenté à chaque (re)chargement
+        self._descriptors = {}  # Cache des descripteurs {nom: {...}}
+        self._lock = threading.RLock()
         self._plugin_dir = os.path.join(
             os.path.dirname(__file__),
             plugin_type
         )
     
-    def discover_plugins(self):
+    def discover_plugins(self, reload_modules=False):
         """
         Découvre et charge automatiquement tous les plugins du type spécifié.
         
+        Le dictionnaire des plugins est remplacé d'un seul bloc (même objet),
+        les références déjà distribuées restent donc à jour.
+        
+        Args:
+            reload_modules (bool): Ré-exécuter les modules déjà importés (importlib.reload)
+        
         Returns:
             dict: Dictionnaire des plugins chargés {nom: classe}
         """
@@ -41,36 +52,56 @@ class PluginManager:
             print(f"Le répertoire de plugins {self._plugin_dir} n'existe pas")
             return {}
         
+        plugins = {}
+        errors = []
+        
         # Parcourir tous les fichiers Python dans le répertoire
-        for filename in os.listdir(self._plugin_dir):
+        for filename in sorted(os.listdir(self._plugin_dir)):
             if filename.endswith('.py') and not filename.startswith('_'):
                 module_name = filename[:-3]  # Retirer .py
-                self._load_plugin_from_module(module_name)
+                self._load_plugin_from_module(module_name, plugins, errors, reload_modules)
+        
+        with self._lock:
+            self.plugins.clear()
+            self.plugins.update(plugins)
+            self.errors.extend(errors)
+            self._descriptors.clear()
+            self.generation += 1
         
         return self.plugins
     
-    def _load_plugin_from_module(self, module_name):
+    def _load_plugin_from_module(self, module_name, plugins, errors, reload_module=False):
         """
         Charge un plugin depuis un module Python.
         
         Args:
             module_name (str): Nom du module à charger
+            plugins (dict): Plugins trouvés, complété par cette méthode
+            errors (list): Erreurs de chargement, complétée par cette méthode
+            reload_module (bool): Ré-exécuter le module s'il est déjà importé
         """
         try:
             # Importer le module
             module_path = f'plugins.{self.plugin_type}.{module_name}'
-            module = importlib.import_module(module_path)
+            # Le module de la classe de base n'est jamais rechargé : une nouvelle
+            # classe de base invaliderait tous les contrôles issubclass
+            if reload_module and module_path in sys.modules and module_path != self.base_class.__module__:
+                module = importlib.reload(sys.modules[module_path])
+            else:
+                module = importlib.import_module(module_path)
             
             # Trouver toutes les classes qui héritent de la classe de base
             for name, obj in inspect.getmembers(module, inspect.isclass):
                 # Vérifier que c'est une sous-classe (pas la classe de base elle-même)
+                # définie dans ce module (et non importée depuis un autre plugin)
                 if (issubclass(obj, self.base_class) and 
                     obj is not self.base_class and
+                    obj.__module__ == module.__name__ and
                     not inspect.isabstract(obj)):
                     
                     # Utiliser le nom du module comme clé
                     plugin_key = self._get_plugin_key(obj, module_name)
-                    self.plugins[plugin_key] = obj
+                    plugins[plugin_key] = obj
                     print(f"Plugin '{plugin_key}' chargé avec succès ({obj.__name__})")
         
         except Exception as e:
@@ -81,7 +112,7 @@ class PluginManager:
                 'traceback': traceback.format_exc(),
                 'timestamp': datetime.now().isoformat()
             }
-            self.errors.append(error_info)
+            errors.append(error_info)
             print(f"❌ Erreur lors du chargement du plugin {module_name}: {str(e)}")
             print(f"   Détails: {traceback.format_exc()}")
     
@@ -114,11 +145,57 @@ class PluginManager:
         Returns:
             Instance du plugin ou None si non trouvé
         """
-        plugin_class = self.plugins.get(plugin_name)
+        with self._lock:
+            plugin_class = self.plugins.get(plugin_name)
         if plugin_class:
             return plugin_class()
         return None
     
+    def get_descriptor(self, plugin_name):
+        """
+        Retourne la description d'un plugin, calculée une seule fois par chargement.
+        
+        La description regroupe les métadonnées et, lorsque le plugin les fournit,
+        le masque de saisie et les variables de sortie. L'objet retourné est
+        partagé : il ne doit pas être modifié.
+        
+        Args:
+            plugin_name (str): Nom du plugin
+        
+        Returns:
+            dict: {'class', 'label', 'metadata', 'mask', 'output_variables'} ou None
+        """
+        with self._lock:
+            descriptor = self._descriptors.get(plugin_name)
+            if descriptor is not None:
+                return descriptor
+            
+            plugin_class = self.plugins.get(plugin_name)
+            if not plugin_class:
+                return None
+            
+            instance = plugin_class()
+            descriptor = {
+                'class': plugin_class.__name__,
+                'label': getattr(plugin_class, 'label', None) or plugin_name.replace('_', ' ').replace('-', ' ').title(),
+                'metadata': instance.get_metadata(),
+                'mask': instance.get_input_mask() if hasattr(instance, 'get_input_mask') else None,
+                'output_variables': instance.get_output_variables() if hasattr(instance, 'get_output_variables') else None
+            }
+            self._descriptors[plugin_name] = descriptor
+            return descriptor
+    
+    def get_descriptors(self):
+        """
+        Retourne les descriptions de tous les plugins chargés.
+        
+        Returns:
+            dict: Dictionnaire {nom: description}
+        """
+        with self._lock:
+            names = list(self.plugins.keys())
+        return {name: self.get_descriptor(name) for name in names}
+    
     def get_all_plugins(self):
         """
         Retourne tous les plugins disponibles.
@@ -151,10 +228,15 @@ class PluginManager:
         self.errors.clear()
     
     def reload_plugins(self):
-        """Recharge tous les plugins (utile pour le développement)."""
-        self.plugins.clear()
-        self.errors.clear()
-        return self.discover_plugins()
+        """
+        Recharge tous les plugins (utile pour le développement).
+        
+        Les modules déjà importés sont ré-exécutés afin que les modifications
+        du code soient prises en compte par tous les utilisateurs du gestionnaire.
+        """
+        with self._lock:
+            self.errors.clear()
+        return self.discover_plugins(reload_modules=True)
     
     def register_plugin(self, plugin_name, plugin_class):
         """
@@ -171,7 +253,10 @@ class PluginManager:
             print(f"Erreur: {plugin_class.__name__} n'hérite pas de {self.base_class.__name__}")
             return False
         
-        self.plugins[plugin_name] = plugin_class
+        with self._lock:
+            self.plugins[plugin_name] = plugin_class
+            self._descriptors.pop(plugin_name, None)
+            self.generation += 1
         print(f"Plugin '{plugin_name}' enregistré manuellement")
         return True
     
@@ -185,8 +270,12 @@ class PluginManager:
         Returns:
             bool: True si désenregistré avec succès
         """
-        if plugin_name in self.plugins:
-            del self.plugins[plugin_name]
+        with self._lock:
+            removed = self.plugins.pop(plugin_name, None) is not None
+            if removed:
+                self._descriptors.pop(plugin_name, None)
+                self.generation += 1
+        if removed:
             print(f"Plugin '{plugin_name}' désenregistré")
             return True
         return False
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """Routes API pour la gestion des masques de saisie des actions."""
 from flask import Blueprint, jsonify
-from plugins.actions import get_action, get_all_actions, ACTION_REGISTRY
+from plugins.actions import get_action_descriptor, get_action_descriptors
 
 actions_bp = Blueprint('actions_api', __name__, url_prefix='/api/actions')
 
@@ -9,12 +9,12 @@ actions_bp = Blueprint('actions_api', __name__, url_prefix='/api/actions')
 def get_all_masks():
     """Récupère tous les masques de saisie pour tous les types d'actions."""
     try:
-        # Utiliser le nouveau système de plugins
-        actions = get_all_actions()
+        # Descriptions calculées une seule fois par chargement des plugins
+        actions = get_action_descriptors()
         masks = {}
         
-        for action_type, action_info in actions.items():
-            masks[action_type] = action_info['mask']
+        for action_type, descriptor in actions.items():
+            masks[action_type] = descriptor['mask']
         
         return jsonify(masks), 200
     except Exception as e:
@@ -24,15 +24,12 @@ def get_all_masks():
 def get_mask(action_type):
     """Récupère le masque de saisie pour un type d'action spécifique."""
     try:
-        # Utiliser le nouveau système de plugins
-        action = get_action(action_type)
+        descriptor = get_action_descriptor(action_type)
         
-        if not action:
+        if not descriptor:
             return jsonify({'message': f'Type d\'action non supporté: {action_type}'}), 400
         
-        mask = action.get_input_mask()
-        
-        return jsonify({'type': action_type, 'mask': mask}), 200
+        return jsonify({'type': action_type, 'mask': descriptor['mask']}), 200
     except Exception as e:
         return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
 
@@ -40,13 +37,11 @@ def get_mask(action_type):
 def get_all_output_variables():
     """Récupère toutes les variables de sortie pour tous les types d'actions."""
     try:
-        actions = get_all_actions()
+        actions = get_action_descriptors()
         output_variables = {}
         
-        for action_type, action_info in actions.items():
-            action_instance = get_action(action_type)
-            if action_instance:
-                output_variables[action_type] = action_instance.get_output_variables()
+        for action_type, descriptor in actions.items():
+            output_variables[action_type] = descriptor['output_variables']
         
         return jsonify(output_variables), 200
     except Exception as e:
@@ -56,14 +51,12 @@ def get_all_output_variables():
 def get_output_variables(action_type):
     """Récupère les variables de sortie pour un type d'action spécifique."""
     try:
-        action = get_action(action_type)
+        descriptor = get_action_descriptor(action_type)
         
-        if not action:
+        if not descriptor:
             return jsonify({'message': f'Type d\'action non supporté: {action_type}'}), 400
         
-        output_vars = action.get_output_variables()
-        
-        return jsonify({'type': action_type, 'output_variables': output_vars}), 200
+        return jsonify({'type': action_type, 'output_variables': descriptor['output_variables']}), 200
     except Exception as e:
         return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
 
@@ -71,18 +64,10 @@ def get_output_variables(action_type):
 def get_all_labels():
     """Récupère tous les labels d'affichage pour tous les types d'actions."""
     try:
-        actions = get_all_actions()
-        labels = {}
+        actions = get_action_descriptors()
         
-        for action_type, action_info in actions.items():
-            action_instance = get_action(action_type)
-            if action_instance:
-                # Utiliser le label de la classe ou générer un label par défaut
-                if hasattr(action_instance, 'label') and action_instance.label:
-                    labels[action_type] = action_instance.label
-                else:
-                    # Fallback: capitaliser le type d'action
-                    labels[action_type] = action_type.replace('_', ' ').replace('-', ' ').title()
+        # Le label de la classe, ou à défaut le type d'action capitalisé
+        labels = {action_type: descriptor['label'] for action_type, descriptor in actions.items()}
         
         return jsonify(labels), 200
     except Exception as e:
@@ -3,7 +3,7 @@ from flask import Blueprint, request, jsonify, send_file, current_app
 from werkzeug.utils import secure_filename
 from models.campain import Campain
 from utils.auth import token_required
-from utils.pagination import get_pagination_params, paginate_results
+from utils.pagination import get_pagination_params, get_pagination_cursor
 from utils.validation import validate_required_fields
 from utils.workdir import create_campain_workdir, delete_campain_workdir, get_campain_workdir
 from pathlib import Path
@@ -28,12 +28,13 @@ def emit_files_updated(campain_id):
 def get_campains():
     """Récupère la liste des campagnes."""
     try:
-        campains = Campain.get_all()
         page, page_size = get_pagination_params(request)
-        result = paginate_results(campains, page, page_size)
+        result = Campain.get_page(page, page_size, after=get_pagination_cursor(request))
         
         return jsonify(result), 200
     
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
 
@@ -1,12 +1,17 @@
 """Routes API pour la gestion des rapports."""
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from datetime import datetime
+import re
+from pymongo.errors import DuplicateKeyError
 from models.rapport import Rapport
+from models.rapport_log import RapportLog
 from models.campain import Campain
 from models.test import Test
 from models.variable import Variable
 from utils.auth import token_required
-from utils.pagination import get_pagination_params, paginate_results
+from utils.db import load_config
+from utils.pagination import get_pagination_params, get_pagination_cursor
+from utils.projection import build_projection, get_fields_param
 from utils.validation import validate_required_fields
 
 rapports_bp = Blueprint('rapports_api', __name__, url_prefix='/api/rapports')
@@ -33,6 +38,18 @@ def execute_campain():
         filiere = data['filiere']
         stop_on_failure = data.get('stop_on_failure', False)
         
+        # Nombre de tests exécutés en parallèle (borné par la configuration)
+        try:
+            concurrency = int(data.get('concurrency', 1))
+        except (ValueError, TypeError):
+            return jsonify({'message': 'Le niveau de parallélisme doit être un entier'}), 400
+        
+        if concurrency < 1:
+            return jsonify({'message': 'Le niveau de parallélisme doit être supérieur ou égal à 1'}), 400
+        
+        max_concurrency = load_config().get('execution', {}).get('max_concurrency', 10)
+        concurrency = min(concurrency, max_concurrency)
+        
         # Vérifier l'unicité du nom
         existing = Rapport.get_by_name(rapport_name)
         if existing:
@@ -54,15 +71,17 @@ def execute_campain():
             tests=[],
             status='pending',
             progress=0,
-            stop_on_failure=stop_on_failure
+            stop_on_failure=stop_on_failure,
+            concurrency=concurrency
         )
         
-        # Lancer l'exécution en arrière-plan
-        executor.execute_campain(rapport_id, campain_id, filiere, test_ids, stop_on_failure)
+        # Placer l'exécution dans la file d'attente (prise en charge par un worker)
+        job_id = executor.execute_campain(rapport_id, campain_id, filiere, test_ids, stop_on_failure, concurrency)
         
         return jsonify({
             'message': 'Exécution de la campagne lancée',
-            'rapport_id': rapport_id
+            'rapport_id': rapport_id,
+            'job_id': job_id
         }), 201
     
     except Exception as e:
@@ -108,17 +127,23 @@ def get_rapports():
     """Récupère la liste des rapports."""
     try:
         campain_id = request.args.get('campain_id')
+        page, page_size = get_pagination_params(request)
         
-        if campain_id:
-            rapports = Rapport.get_by_campain(campain_id)
-        else:
-            rapports = Rapport.get_all()
+        # Projection résumée par défaut, documents complets avec ?fields=*
+        projection = build_projection(get_fields_param(request), Rapport.SUMMARY_FIELDS, Rapport.COMPUTED_FIELDS)
         
-        page, page_size = get_pagination_params(request)
-        result = paginate_results(rapports, page, page_size)
+        result = Rapport.get_page(
+            campain_id=campain_id,
+            page=page,
+            page_size=page_size,
+            after=get_pagination_cursor(request),
+            projection=projection
+        )
         
         return jsonify(result), 200
     
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
 
@@ -134,6 +159,10 @@ def create_rapport():
         if not is_valid:
             return jsonify({'message': message}), 400
         
+        # Vérifier l'unicité du nom (index unique sur les noms non vides)
+        if data.get('details') and Rapport.get_by_name(data['details']):
+            return jsonify({'message': 'Un rapport avec ce nom existe déjà'}), 400
+        
         rapport_id = Rapport.create(
             campain_id=data['campain_id'],
             result=data['result'],
@@ -147,6 +176,9 @@ def create_rapport():
             'rapport_id': rapport_id
         }), 201
     
+    except DuplicateKeyError:
+        # Création concurrente avec le même nom
+        return jsonify({'message': 'Un rapport avec ce nom existe déjà'}), 400
     except Exception as e:
         return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
 
@@ -176,6 +208,8 @@ def update_rapport(rapport_id):
         
         return jsonify({'message': 'Rapport mis à jour avec succès'}), 200
     
+    except DuplicateKeyError:
+        return jsonify({'message': 'Un rapport avec ce nom existe déjà'}), 400
     except Exception as e:
         return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
 
@@ -193,3 +227,103 @@ def delete_rapport(rapport_id):
     
     except Exception as e:
         return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
+
+
+def _parse_logs_range(size):
+    """
+    Détermine la plage d'octets demandée pour la lecture des logs.
+    
+    Accepte l'en-tête HTTP `Range: bytes=debut-fin` (y compris `bytes=-N` pour
+    les N derniers octets) ou les paramètres `offset` et `length`.
+    
+    Args:
+        size: Taille totale des logs en octets
+    
+    Returns:
+        tuple: (debut, fin exclue, plage partielle) ou None si la plage est invalide
+    """
+    range_header = request.headers.get('Range')
+    
+    if range_header:
+        match = re.fullmatch(r'\s*bytes=(\d*)-(\d*)\s*', range_header)
+        if not match or (not match.group(1) and not match.group(2)):
+            return None
+        
+        if match.group(1):
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else size
+        else:
+            # Suffixe : les N derniers octets
+            start = max(size - int(match.group(2)), 0)
+            end = size
+    else:
+        try:
+            start = int(request.args.get('offset', 0))
+            length = request.args.get('length')
+            end = start + int(length) if length is not None else size
+        except ValueError:
+            return None
+        
+        if start < 0 or end < start:
+            return None
+        
+        if start == 0 and end >= size:
+            return 0, size, False
+    
+    end = min(end, size)
+    if start >= size or end <= start:
+        return None
+    
+    return start, end, True
+
+@rapports_bp.route('/<rapport_id>/tests/<test_id>/logs', methods=['GET'])
+@token_required
+def get_test_logs(rapport_id, test_id):
+    """Diffuse les logs d'exécution d'un test d'un rapport (lecture partielle possible)."""
+    try:
+        rapport = Rapport.find_by_id(rapport_id)
+        if not rapport:
+            return jsonify({'message': 'Rapport non trouvé'}), 404
+        
+        test = next((t for t in rapport.get('tests', []) if t.get('testId') == test_id), None)
+        if not test:
+            return jsonify({'message': 'Test non trouvé dans ce rapport'}), 404
+        
+        if 'logsRef' in test:
+            size = test['logsRef'].get('size', 0)
+            
+            def read_range(start, end):
+                return RapportLog.iter_range(rapport_id, test_id, start, end)
+        else:
+            # Rapports antérieurs : logs embarqués dans le document
+            inline_logs = (test.get('logs') or '').encode('utf-8')
+            size = len(inline_logs)
+            
+            def read_range(start, end):
+                yield inline_logs[start:end]
+        
+        if size == 0:
+            return Response(b'', status=200, mimetype='text/plain', headers={'Accept-Ranges': 'bytes'})
+        
+        byte_range = _parse_logs_range(size)
+        if byte_range is None:
+            return Response(status=416, headers={'Content-Range': f'bytes */{size}'})
+        
+        start, end, partial = byte_range
+        headers = {
+            'Accept-Ranges': 'bytes',
+            'Content-Length': str(end - start),
+            'X-Logs-Size': str(size)
+        }
+        if partial:
+            headers['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+        
+        return Response(
+            stream_with_context(read_range(start, end)),
+            status=206 if partial else 200,
+            mimetype='text/plain',
+            headers=headers
+        )
+    
+    except Exception as e:
+        return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
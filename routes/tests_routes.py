@@ -3,7 +3,8 @@ from flask import Blueprint, request, jsonify, current_app
 from models.test import Test
 from models.variable import Variable
 from utils.auth import token_required
-from utils.pagination import get_pagination_params, paginate_results
+from utils.pagination import get_pagination_params, get_pagination_cursor
+from utils.projection import build_projection, get_fields_param
 from utils.validation import validate_required_fields
 
 tests_bp = Blueprint('tests_api', __name__, url_prefix='/api/tests')
@@ -14,17 +15,23 @@ def get_tests():
     """Récupère la liste des tests."""
     try:
         campain_id = request.args.get('campain_id')
+        page, page_size = get_pagination_params(request)
         
-        if campain_id:
-            tests = Test.get_by_campain(campain_id)
-        else:
-            tests = Test.get_all()
+        # Projection résumée par défaut, documents complets avec ?fields=*
+        projection = build_projection(get_fields_param(request), Test.SUMMARY_FIELDS, Test.COMPUTED_FIELDS)
         
-        page, page_size = get_pagination_params(request)
-        result = paginate_results(tests, page, page_size)
+        result = Test.get_page(
+            campain_id=campain_id,
+            page=page,
+            page_size=page_size,
+            after=get_pagination_cursor(request),
+            projection=projection
+        )
         
         return jsonify(result), 200
     
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
 
@@ -2,7 +2,7 @@
 from flask import Blueprint, request, jsonify
 from models.variable import Variable
 from utils.auth import token_required, admin_required
-from utils.pagination import get_pagination_params, paginate_results
+from utils.pagination import get_pagination_params, get_pagination_cursor
 from utils.validation import validate_required_fields
 
 variables_bp = Blueprint('variables_api', __name__, url_prefix='/api/variables')
@@ -20,22 +20,23 @@ def get_variables():
         if grouped:
             variables = Variable.get_grouped_by_filiere()
             return jsonify(variables), 200
-        elif filiere:
-            variables = Variable.get_by_filiere(filiere)
-        else:
-            variables = Variable.get_all()
         
         # Filtrer par isRoot si spécifié
-        if is_root == 'true':
-            variables = [v for v in variables if v.get('isRoot') is True]
-        elif is_root == 'false':
-            variables = [v for v in variables if v.get('isRoot') is not True]
+        root_filter = {'true': True, 'false': False}.get(is_root)
         
         page, page_size = get_pagination_params(request)
-        result = paginate_results(variables, page, page_size)
+        result = Variable.get_page(
+            filiere=filiere,
+            is_root=root_filter,
+            page=page,
+            page_size=page_size,
+            after=get_pagination_cursor(request)
+        )
         
         return jsonify(result), 200
     
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Erreur serveur: {str(e)}'}), 500
 
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serveur de production eventlet de TestGyver (sans gunicorn).
+
+Applique le monkey patching eventlet avant tout import, puis sert
+l'application avec socketio.run() sur un seul processus :
+
+    python3 serve.py
+"""
+import eventlet
+
+eventlet.monkey_patch()
+
+import os  # noqa: E402
+import signal  # noqa: E402
+import sys  # noqa: E402
+from app import app, socketio  # noqa: E402
+from utils.db import load_config  # noqa: E402
+from utils.workdir import ensure_workdir_exists  # noqa: E402
+
+
+def handle_stop(signum, frame):
+    """Interrompt le serveur (le worker d'exécution est vidé dans main)."""
+    raise SystemExit(0)
+
+
+def main():
+    """Démarre le serveur et vide le worker d'exécution à l'arrêt."""
+    config = load_config()
+    server_config = config.get('server', {})
+
+    ensure_workdir_exists()
+    signal.signal(signal.SIGTERM, handle_stop)
+
+    try:
+        socketio.run(
+            app,
+            host=os.environ.get('FLASK_HOST', config['app']['host']),
+            port=int(os.environ.get('FLASK_PORT', config['app']['port'])),
+            debug=False,
+            use_reloader=False,
+            log_output=True,
+            # Nombre maximum de connexions simultanées (eventlet.wsgi.server)
+            max_size=int(server_config.get('worker_connections', 1000))
+        )
+    finally:
+        print("ℹ Arrêt du serveur, vidage du worker d'exécution...")
+        app.config['JOB_WORKER'].stop(timeout=int(server_config.get('graceful_timeout', 30)))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
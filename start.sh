@@ -2,12 +2,36 @@
 set -euo pipefail
 
 # Allow overriding the bind address and port through environment variables
-APP_HOST="${FLASK_HOST:-0.0.0.0}"
-APP_PORT="${FLASK_PORT:-5000}"
+export FLASK_HOST="${FLASK_HOST:-0.0.0.0}"
+export FLASK_PORT="${FLASK_PORT:-5000}"
 
 if [ -f "/app/.env" ]; then
     # shellcheck disable=SC1091
     source /app/.env
 fi
 
-exec flask run --host="${APP_HOST}" --port="${APP_PORT}"
+# Launch mode:
+#   gunicorn (default) - production server, eventlet workers (gunicorn.conf.py)
+#   eventlet           - single-process production server (socketio.run)
+#   worker             - campaign execution worker only (worker.py)
+#   dev                - Flask development server (flask run)
+SERVER_MODE="${SERVER_MODE:-gunicorn}"
+
+case "${SERVER_MODE}" in
+    gunicorn)
+        exec gunicorn --config gunicorn.conf.py app:app
+        ;;
+    eventlet)
+        exec python3 serve.py
+        ;;
+    worker)
+        exec python3 worker.py
+        ;;
+    dev)
+        exec flask run --host="${FLASK_HOST}" --port="${FLASK_PORT}"
+        ;;
+    *)
+        echo "Unknown SERVER_MODE '${SERVER_MODE}' (expected: gunicorn, eventlet, worker, dev)" >&2
+        exit 1
+        ;;
+esac
@@ -1,13 +1,19 @@
 """Package utils pour TestGyver."""
-from .db import get_db_connection, get_collection, load_config
+from .config import get_config, reload_config
+from .db import get_db_connection, get_collection, load_config, get_client, close_client, get_pool_stats
 from .auth import generate_token, decode_token, token_required, admin_required
 from .validation import validate_email, validate_password, validate_required_fields, sanitize_string
-from .pagination import paginate_results, get_pagination_params
+from .pagination import paginate_results, paginate_query, get_pagination_params, get_pagination_cursor
 
 __all__ = [
+    'get_config',
+    'reload_config',
     'get_db_connection',
     'get_collection',
     'load_config',
+    'get_client',
+    'close_client',
+    'get_pool_stats',
     'generate_token',
     'decode_token',
     'token_required',
@@ -17,5 +23,7 @@ __all__ = [
     'validate_required_fields',
     'sanitize_string',
     'paginate_results',
-    'get_pagination_params'
+    'paginate_query',
+    'get_pagination_params',
+    'get_pagination_cursor'
 ]
@@ -1,30 +1,45 @@
 """Module pour l'exécution des campagnes de tests en arrière-plan."""
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from bson import ObjectId
+from models.job import Job
 from models.test import Test
 from models.rapport import Rapport
+from models.rapport_log import RapportLog
 from models.variable import Variable
-from plugins.plugin_manager import PluginManager
-from plugins.actions.action_base import ActionBase
+from plugins.actions import action_manager
+from utils.db import load_config
+from utils.run_context import RunScope, SCOPE_CAMPAIN, SCOPE_TEST, run_scope
+from utils.template_engine import resolve_variables
 from utils.workdir import get_campain_workdir
 import traceback
-import re
 
 class CampainExecutor:
     """Classe pour exécuter une campagne de tests."""
     
-    def __init__(self, socketio):
-        """Initialise l'exécuteur de campagne."""
+    def __init__(self, socketio, events=None):
+        """
+        Initialise l'exécuteur de campagne.
+        
+        Args:
+            socketio: Instance Flask-SocketIO (None dans un processus worker)
+            events: Émetteur des événements (voir utils.event_bus), socketio par défaut
+        """
         self.socketio = socketio
-        self.plugin_manager = PluginManager('actions', ActionBase)
-        # Charger les plugins d'actions
-        self.plugin_manager.discover_plugins()
+        self.events = events if events is not None else socketio
+        # Registre des plugins d'actions partagé par tout le processus
+        self.plugin_manager = action_manager
+        # Worker local à réveiller lors d'un ajout dans la file (voir JobWorker)
+        self.job_worker = None
     
-    def execute_campain(self, rapport_id, campain_id, filiere, tests, stop_on_failure):
+    def execute_campain(self, rapport_id, campain_id, filiere, tests, stop_on_failure, concurrency=1):
         """
-        Exécute une campagne de tests en arrière-plan.
+        Place l'exécution d'une campagne dans la file d'attente des jobs.
+        
+        L'exécution est réalisée par un JobWorker (dans l'application ou dans
+        un processus dédié) : elle survit à un redémarrage du serveur.
         
         Args:
             rapport_id: ID du rapport à mettre à jour
@@ -32,33 +47,107 @@ class CampainExecutor:
             filiere: Filière/environnement sélectionné
             tests: Liste des tests à exécuter
             stop_on_failure: Arrêter l'exécution au premier échec
+            concurrency: Nombre maximum de tests exécutés en parallèle
+        
+        Returns:
+            str: ID du job créé
+        """
+        worker_config = load_config().get('execution', {}).get('worker', {})
+        
+        job_id = Job.enqueue('campain', rapport_id, {
+            'campainId': str(campain_id),
+            'filiere': filiere,
+            'tests': [str(test_id) for test_id in tests],
+            'stopOnFailure': bool(stop_on_failure),
+            'concurrency': concurrency
+        }, max_attempts=worker_config.get('max_attempts', 3))
+        
+        # Réveiller le worker local pour une prise en charge immédiate
+        if self.job_worker:
+            self.job_worker.notify()
+        
+        return job_id
+    
+    def run_job(self, job, cancel_event=None):
+        """
+        Exécute un job de campagne pris en charge par un worker.
+        
+        Args:
+            job: Job (voir models.job.Job.claim)
+            cancel_event: Signal d'interruption (bail perdu, arrêt du worker)
+        
+        Returns:
+            bool: True si le rapport a été finalisé
         """
-        # Lancer l'exécution dans un thread séparé
-        thread = threading.Thread(
-            target=self._run_campain,
-            args=(rapport_id, campain_id, filiere, tests, stop_on_failure)
+        payload = job['payload']
+        return self._run_campain(
+            job['rapportId'],
+            payload['campainId'],
+            payload['filiere'],
+            list(payload['tests']),
+            payload.get('stopOnFailure', False),
+            payload.get('concurrency', 1),
+            cancel_event=cancel_event,
+            resume=job.get('attempts', 1) > 1
         )
-        thread.daemon = True
-        thread.start()
     
-    def _run_campain(self, rapport_id, campain_id, filiere, tests, stop_on_failure):
-        """Exécute la campagne de tests."""
+    def _run_campain(self, rapport_id, campain_id, filiere, tests, stop_on_failure, concurrency=1, cancel_event=None, resume=False):
+        """
+        Exécute la campagne de tests.
+        
+        Les tests sont répartis sur un pool borné de `concurrency` threads.
+        Chaque test travaille sur sa propre copie des variables. Chaque résultat
+        est ajouté au rapport dès la fin du test (avec son index dans la
+        campagne), sans réécrire les résultats déjà enregistrés.
+        
+        Lors d'une reprise (`resume`), les tests dont le résultat figure déjà
+        dans le rapport ne sont pas rejoués. Si `cancel_event` est positionné,
+        plus aucun test n'est démarré et le rapport n'est pas finalisé : il
+        sera repris par le prochain worker.
+        
+        Returns:
+            bool: True si le rapport a été finalisé
+        """
+        cancel_event = cancel_event or threading.Event()
+        
+        # Connexions (HTTP, SSH...) partagées par tous les tests de la campagne
+        # si connections.scope vaut "campain", sinon une portée par test
+        connections_scope = load_config().get('connections', {}).get('scope', SCOPE_TEST)
+        campain_scope = RunScope(f'campain:{rapport_id}') if connections_scope == SCOPE_CAMPAIN else None
+        
         try:
+            total_tests = len(tests)
+            results = [None] * total_tests
+            completed_count = 0
+            global_success = True
+            
+            # Résultats déjà enregistrés par une exécution précédente
+            if resume:
+                rapport = Rapport.find_by_id(rapport_id)
+                for test_result in (rapport or {}).get('tests', []):
+                    index = test_result.get('index')
+                    if isinstance(index, int) and 0 <= index < total_tests and results[index] is None:
+                        results[index] = test_result
+                        completed_count += 1
+                        if test_result.get('status') != 'passed':
+                            global_success = False
+            
             # Mettre à jour le statut à "running"
-            Rapport.update(rapport_id, {
+            Rapport.update(rapport_id, {'status': 'running'} if resume else {
                 'status': 'running',
                 'progress': 0
             })
             
             # Émettre l'événement de démarrage
-            self.socketio.emit('campain_started', {
+            self.events.emit('campain_started', {
                 'rapport_id': rapport_id,
-                'campain_id': campain_id
+                'campain_id': campain_id,
+                'resumed': resume
             }, room=f'rapport_{rapport_id}')
             
             # Récupérer les variables de l'environnement
             variables = Variable.get_by_filiere(filiere)
-            variables_dict = {var['key']: var['value'] for var in variables}
+            base_variables = {var['key']: var['value'] for var in variables}
             
             # Récupérer les chemins du workdir de la campagne
             campain_workdir = Path(get_campain_workdir(campain_id))
@@ -66,69 +155,128 @@ class CampainExecutor:
             work_dir = str(campain_workdir / "work")
             
             # Ajouter les variables de collection
-            variables_dict['test.test_id'] = None  # Sera mis à jour pour chaque test
-            variables_dict['test.campain_id'] = campain_id
-            variables_dict['test.files_dir'] = files_dir
-            variables_dict['test.work_dir'] = work_dir
+            base_variables['test.test_id'] = None  # Sera mis à jour pour chaque test
+            base_variables['test.campain_id'] = campain_id
+            base_variables['test.files_dir'] = files_dir
+            base_variables['test.work_dir'] = work_dir
             
-            total_tests = len(tests)
-            executed_tests = []
-            global_success = True
+            # Signal d'arrêt partagé par les workers (stop_on_failure)
+            stop_event = threading.Event()
+            if stop_on_failure and not global_success:
+                stop_event.set()
             
-            for index, test_id in enumerate(tests):
-                # Vérifier si on doit arrêter
-                if stop_on_failure and not global_success:
-                    # Marquer les tests restants comme "skipped"
-                    for remaining_test_id in tests[index:]:
-                        executed_tests.append({
-                            'testId': ObjectId(remaining_test_id),
-                            'status': 'skipped',
-                            'logs': 'Test ignoré après un échec précédent'
-                        })
-                    break
+            def run_test(test_id):
+                """Exécute un test dans un thread du pool (None si annulé)."""
+                if stop_event.is_set() or cancel_event.is_set():
+                    return None
+                
+                # Logs partiels d'une exécution interrompue
+                if resume:
+                    RapportLog.delete_by_test(rapport_id, test_id)
                 
-                # Mettre à jour la variable test_id
+                # Copie des variables propre au test
+                variables_dict = dict(base_variables)
                 variables_dict['test.test_id'] = test_id
                 
                 # Émettre l'événement de démarrage du test
-                self.socketio.emit('test_started', {
+                self.events.emit('test_started', {
                     'rapport_id': rapport_id,
                     'test_id': test_id
                 }, room=f'rapport_{rapport_id}')
                 
-                # Récupérer les variables du test
-                test = Test.find_by_id(test_id)
-                if 'variables' in test:
-                    for var_name in test['variables']:
-                        variables_dict['app.' + var_name] = None
+                with run_scope(f'test:{test_id}', parent=campain_scope, work_dir=work_dir, files_dir=files_dir):
+                    test_result = self._execute_test(test_id, variables_dict, filiere)
                 
-                # Exécuter le test
-                test_result = self._execute_test(test_id, variables_dict, filiere)
-                executed_tests.append(test_result)
-                
-                # Vérifier le résultat
-                if test_result['status'] != 'passed':
-                    global_success = False
+                # Stocker les logs hors du document rapport (blocs compressés)
+                try:
+                    test_result['logsRef'] = RapportLog.write(rapport_id, test_id, test_result['logs'])
+                except Exception as e:
+                    print(f"⚠ Impossible de stocker les logs du test {test_id}, conservation dans le rapport: {e}")
                 
-                # Mettre à jour la progression
-                progress = int(((index + 1) / total_tests) * 100)
-                Rapport.update(rapport_id, {
-                    'progress': progress,
-                    'tests': executed_tests
-                })
+                # Positionner le signal avant de rendre la main au pool pour que
+                # les tests suivants ne démarrent pas
+                if stop_on_failure and test_result['status'] != 'passed':
+                    stop_event.set()
                 
-                # Émettre l'événement de progression
-                self.socketio.emit('test_completed', {
-                    'rapport_id': rapport_id,
-                    'test_id': test_id,
-                    'status': test_result['status'],
-                    'logs': test_result['logs']
-                }, room=f'rapport_{rapport_id}')
+                return test_result
+            
+            concurrency = max(1, min(int(concurrency or 1), max(total_tests, 1)))
+            
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f'campain-{rapport_id}') as pool:
+                futures = {
+                    pool.submit(run_test, test_id): index
+                    for index, test_id in enumerate(tests)
+                    if results[index] is None
+                }
                 
-                self.socketio.emit('campain_progress', {
-                    'rapport_id': rapport_id,
-                    'progress': progress
-                }, room=f'rapport_{rapport_id}')
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    
+                    test_result = future.result()
+                    if test_result is None:
+                        # Test non démarré suite à un échec précédent
+                        continue
+                    
+                    if cancel_event.is_set():
+                        # Exécution interrompue : le résultat n'est pas enregistré
+                        # et les tests en attente ne sont pas démarrés
+                        for pending in futures:
+                            pending.cancel()
+                        continue
+                    
+                    index = futures[future]
+                    test_result['index'] = index
+                    
+                    # Les logs stockés à part ne sont plus embarqués dans le rapport
+                    if 'logsRef' in test_result:
+                        logs = test_result.pop('logs')
+                    else:
+                        logs = test_result['logs']
+                    results[index] = test_result
+                    completed_count += 1
+                    
+                    # Vérifier le résultat
+                    if test_result['status'] != 'passed':
+                        global_success = False
+                        if stop_on_failure:
+                            # Annuler les tests qui n'ont pas encore démarré
+                            for pending in futures:
+                                pending.cancel()
+                    
+                    # Ajouter le résultat au rapport et mettre à jour la progression
+                    progress = int((completed_count / total_tests) * 100)
+                    Rapport.push_tests(rapport_id, [test_result], progress)
+                    
+                    # Émettre l'événement de progression
+                    self.events.emit('test_completed', {
+                        'rapport_id': rapport_id,
+                        'test_id': tests[index],
+                        'status': test_result['status'],
+                        'logs': logs
+                    }, room=f'rapport_{rapport_id}')
+                    
+                    self.events.emit('campain_progress', {
+                        'rapport_id': rapport_id,
+                        'progress': progress
+                    }, room=f'rapport_{rapport_id}')
+            
+            if cancel_event.is_set():
+                return False
+            
+            # Marquer les tests non exécutés comme "skipped"
+            skipped_tests = [
+                {
+                    'testId': ObjectId(test_id),
+                    'index': index,
+                    'status': 'skipped',
+                    'logs': 'Test ignoré après un échec précédent'
+                }
+                for index, test_id in enumerate(tests)
+                if results[index] is None
+            ]
+            if skipped_tests:
+                Rapport.push_tests(rapport_id, skipped_tests)
             
             # Finaliser le rapport
             final_status = 'completed' if global_success else 'failed'
@@ -137,31 +285,38 @@ class CampainExecutor:
             Rapport.update(rapport_id, {
                 'status': final_status,
                 'result': final_result,
-                'progress': 100,
-                'tests': executed_tests
+                'progress': 100
             })
             
             # Émettre l'événement de fin
-            self.socketio.emit('campain_completed', {
+            self.events.emit('campain_completed', {
                 'rapport_id': rapport_id,
                 'status': final_status,
                 'result': final_result
             }, room=f'rapport_{rapport_id}')
             
+            return True
+            
         except Exception as e:
-            # En cas d'erreur, mettre à jour le rapport
+            # En cas d'erreur, mettre à jour le rapport (le nom, unique, est conservé)
             error_msg = f"Erreur lors de l'exécution: {str(e)}\n{traceback.format_exc()}"
             
             Rapport.update(rapport_id, {
                 'status': 'failed',
                 'result': 'failure',
-                'details': error_msg
+                'error': error_msg
             })
             
-            self.socketio.emit('campain_error', {
+            self.events.emit('campain_error', {
                 'rapport_id': rapport_id,
                 'error': error_msg
             }, room=f'rapport_{rapport_id}')
+            
+            return True
+        
+        finally:
+            if campain_scope is not None:
+                campain_scope.close()
     
     def _execute_test(self, test_id, variables_dict, filiere):
         """
@@ -206,7 +361,10 @@ class CampainExecutor:
                 logs.append(f"[{datetime.now().strftime('%H:%M:%S')}] Exécution de l'action {action_index + 1}/{len(actions)}: {action_type}")
                 
                 # Remplacer les variables dans les valeurs de l'action
-                resolved_value = self._resolve_variables(action_value, variables_dict, test_variables)
+                resolved_value = self._resolve_variables(
+                    action_value, variables_dict, test_variables,
+                    cache_key=(str(test_id), test.get('revision', 0), action_index)
+                )
                 
                 # Merge les variables de retour de l'action
                 
@@ -274,7 +432,7 @@ class CampainExecutor:
             'logs': '\n'.join(logs)
         }
     
-    def _resolve_variables(self, value, variables_dict, test_variables):
+    def _resolve_variables(self, value, variables_dict, test_variables, cache_key=None):
         """
         Remplace les variables dans une valeur.
         
@@ -282,39 +440,9 @@ class CampainExecutor:
             value: Valeur à traiter (peut être string, dict, list)
             variables_dict: Dictionnaire des variables TestGyver et collection
             test_variables: Dictionnaire des variables du test
+            cache_key: Clé du plan compilé en cache (test_id, révision, index de l'action)
         
         Returns:
             Valeur avec les variables remplacées
         """
-        if isinstance(value, str):
-            # Remplacer les variables TestGyver {{variable_name}}
-            def replace_testgyver(match):
-                var_name = match.group(1)
-                return str(variables_dict.get(var_name, match.group(0)))
-            
-            # Remplacer les variables de test {{app.variable_name}}
-            def replace_test(match):
-                var_name = match.group(1)
-                full_key = f"app.{var_name}"
-                return str(test_variables.get(full_key, match.group(0)))
-            
-            # Remplacer les variables de collection {{test.variable_name}}
-            def replace_collection(match):
-                var_name = match.group(1)
-                full_key = f"test.{var_name}"
-                return str(variables_dict.get(full_key, match.group(0)))
-            
-            value = re.sub(r'\{\{([^.}]+)\}\}', replace_testgyver, value)
-            value = re.sub(r'\{\{app\.([^}]+)\}\}', replace_test, value)
-            value = re.sub(r'\{\{test\.([^}]+)\}\}', replace_collection, value)
-            
-            return value
-        
-        elif isinstance(value, dict):
-            return {k: self._resolve_variables(v, variables_dict, test_variables) for k, v in value.items()}
-        
-        elif isinstance(value, list):
-            return [self._resolve_variables(v, variables_dict, test_variables) for v in value]
-        
-        else:
-            return value
+        return resolve_variables(value, variables_dict, test_variables, cache_key)
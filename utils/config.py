@@ -0,0 +1,208 @@
+"""Chargement et mise en cache de la configuration (configuration.json)."""
+import json
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+
+# Fichier de configuration (surchargeable pour les conteneurs)
+CONFIG_PATH = Path(os.environ.get('TESTGYVER_CONFIG', Path(__file__).parent.parent / 'configuration.json'))
+
+# Préfixe des variables d'environnement surchargeant la configuration :
+# TESTGYVER__MONGO__HOST=mongo -> config['mongo']['host'] = "mongo"
+ENV_PREFIX = 'TESTGYVER__'
+
+# Intervalle minimal (secondes) entre deux vérifications de la date de
+# modification du fichier ; 0 désactive le rechargement automatique
+RELOAD_CHECK_INTERVAL = float(os.environ.get('TESTGYVER_CONFIG_RELOAD_INTERVAL', '2'))
+
+_config = None
+_config_mtime = None
+_last_check = 0.0
+_reload_requested = False
+_config_lock = threading.Lock()
+
+
+def _freeze(value):
+    """Rend une valeur de configuration immuable (dict -> mappingproxy, list -> tuple)."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# Clé absente de configuration.json (distincte d'une valeur null)
+_MISSING = object()
+
+
+def _parse_env_value(name, raw, current):
+    """
+    Convertit la valeur d'une variable d'environnement dans le type de la valeur
+    qu'elle remplace.
+
+    Une clé texte ou absente du fichier reçoit le texte brut : un secret tel que
+    "123456", "true" ou "1e3" n'est jamais converti. Les autres types (nombre,
+    booléen, objet, liste) sont lus en JSON ; une clé à null (type inconnu,
+    ex: socket_timeout_ms) est lue en JSON si possible, en texte sinon.
+
+    Args:
+        name: Nom de la variable d'environnement (messages d'erreur)
+        raw: Valeur brute
+        current: Valeur actuelle dans configuration.json (_MISSING si absente)
+
+    Returns:
+        Valeur convertie
+
+    Raises:
+        ValueError: Valeur incompatible avec le type de la clé
+    """
+    if current is _MISSING or isinstance(current, str):
+        return raw
+
+    if current is None:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return raw
+
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        raise ValueError(f"{name}: valeur JSON invalide '{raw}'") from None
+
+    if isinstance(current, bool):
+        expected = (bool,)
+    elif isinstance(current, (int, float)):
+        expected = (int, float)
+    else:
+        expected = (dict, list)
+    if not isinstance(value, expected) or (bool not in expected and isinstance(value, bool)):
+        raise ValueError(f"{name}: {type(current).__name__} attendu, '{raw}' reçu")
+    return value
+
+
+def _apply_env_overrides(config, environ=None):
+    """
+    Applique les surcharges TESTGYVER__SECTION__CLE à la configuration.
+
+    Args:
+        config: Configuration brute (dict modifiable)
+        environ: Variables d'environnement (os.environ par défaut)
+
+    Returns:
+        dict: Configuration surchargée
+    """
+    environ = os.environ if environ is None else environ
+
+    for name in sorted(environ):
+        if not name.startswith(ENV_PREFIX):
+            continue
+
+        path = [part.lower() for part in name[len(ENV_PREFIX):].split('__') if part]
+        if not path:
+            continue
+
+        section = config
+        for key in path[:-1]:
+            if not isinstance(section.get(key), dict):
+                section[key] = {}
+            section = section[key]
+        section[path[-1]] = _parse_env_value(name, environ[name], section.get(path[-1], _MISSING))
+
+    return config
+
+
+def _read_config():
+    """Lit le fichier de configuration et applique les surcharges d'environnement."""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return _freeze(_apply_env_overrides(config))
+
+
+def _get_mtime():
+    """Date de modification du fichier de configuration (None s'il est absent)."""
+    try:
+        return CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def reload_config():
+    """
+    Recharge la configuration depuis le fichier.
+
+    En cas d'erreur de lecture, la configuration précédente est conservée.
+
+    Returns:
+        Mapping: Configuration courante
+    """
+    global _config, _config_mtime, _last_check, _reload_requested
+
+    with _config_lock:
+        mtime = _get_mtime()
+        try:
+            config = _read_config()
+        except (OSError, ValueError) as e:
+            if _config is None:
+                raise
+            print(f"⚠ Configuration non rechargée, conservation de la précédente: {e}")
+        else:
+            if _config is not None:
+                print(f"ℹ Configuration rechargée depuis {CONFIG_PATH}")
+            _config = config
+        _config_mtime = mtime
+        _last_check = time.monotonic()
+        _reload_requested = False
+        return _config
+
+
+def get_config():
+    """
+    Retourne la configuration de l'application (objet immuable partagé).
+
+    Le fichier n'est lu qu'au premier appel, puis relu uniquement si sa date
+    de modification change (vérifiée au plus toutes les RELOAD_CHECK_INTERVAL
+    secondes) ou après réception de SIGHUP.
+
+    Returns:
+        Mapping: Configuration en lecture seule
+    """
+    global _last_check
+
+    if _config is None or _reload_requested:
+        return reload_config()
+
+    if RELOAD_CHECK_INTERVAL > 0:
+        now = time.monotonic()
+        if now - _last_check >= RELOAD_CHECK_INTERVAL:
+            _last_check = now
+            if _get_mtime() != _config_mtime:
+                return reload_config()
+
+    return _config
+
+
+def _handle_sighup(signum, frame):
+    """Demande un rechargement de la configuration au prochain accès."""
+    global _reload_requested
+    _reload_requested = True
+
+
+def install_reload_signal():
+    """
+    Installe le rechargement de la configuration sur SIGHUP.
+
+    Returns:
+        bool: True si le gestionnaire a été installé
+    """
+    if not hasattr(signal, 'SIGHUP'):
+        return False
+    try:
+        signal.signal(signal.SIGHUP, _handle_sighup)
+    except ValueError:
+        # signal.signal n'est utilisable que depuis le thread principal
+        return False
+    return True
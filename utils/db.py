@@ -1,28 +1,268 @@
 """Utilitaires pour la gestion de la base de données MongoDB."""
-import json
-from pymongo import MongoClient
+import os
+import threading
+import time
+from pymongo import MongoClient, monitoring
 from pymongo.errors import ConnectionFailure
+from utils.config import get_config
+
+# Client MongoDB partagé par tout le processus (créé à la demande)
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Écouteur des événements du pool de connexions MongoDB.
+    Collecte les statistiques exposées par get_pool_stats().
+    """
+
+    def __init__(self):
+        """Initialise les compteurs du pool."""
+        self._lock = threading.Lock()
+        self._checkout_started = {}
+        self.reset()
+
+    def reset(self):
+        """Remet à zéro tous les compteurs."""
+        with self._lock:
+            self._checkout_started.clear()
+            self.connections_open = 0
+            self.checked_out = 0
+            self.total_checkouts = 0
+            self.checkout_failures = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.pool_clears = 0
+
+    def _start_wait(self):
+        """Mémorise le début d'attente d'une connexion pour le thread courant."""
+        self._checkout_started[threading.get_ident()] = time.perf_counter()
+
+    def _end_wait(self):
+        """Retourne la durée d'attente (ms) du thread courant."""
+        started = self._checkout_started.pop(threading.get_ident(), None)
+        if started is None:
+            return 0.0
+        return (time.perf_counter() - started) * 1000
+
+    def pool_created(self, event):
+        """Création du pool (non suivi)."""
+        pass
+
+    def pool_ready(self, event):
+        """Pool prêt (non suivi)."""
+        pass
+
+    def pool_cleared(self, event):
+        """Comptabilise les vidages du pool (erreurs réseau, élection...)."""
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        """Fermeture du pool (non suivi)."""
+        pass
+
+    def connection_created(self, event):
+        """Comptabilise une nouvelle connexion ouverte."""
+        with self._lock:
+            self.connections_open += 1
+
+    def connection_ready(self, event):
+        """Connexion authentifiée (non suivi)."""
+        pass
+
+    def connection_closed(self, event):
+        """Comptabilise une connexion fermée."""
+        with self._lock:
+            self.connections_open = max(0, self.connections_open - 1)
+
+    def connection_check_out_started(self, event):
+        """Début d'attente d'une connexion."""
+        with self._lock:
+            self._start_wait()
+
+    def connection_check_out_failed(self, event):
+        """Échec d'obtention d'une connexion (timeout de la file d'attente)."""
+        with self._lock:
+            self._end_wait()
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        """Connexion empruntée : enregistre le temps d'attente."""
+        with self._lock:
+            wait_ms = self._end_wait()
+            self.checked_out += 1
+            self.total_checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def connection_checked_in(self, event):
+        """Connexion rendue au pool."""
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self):
+        """
+        Retourne une photographie des statistiques du pool.
+
+        Returns:
+            dict: Compteurs du pool de connexions
+        """
+        with self._lock:
+            avg_wait = self.total_wait_ms / self.total_checkouts if self.total_checkouts else 0.0
+            return {
+                'connections_open': self.connections_open,
+                'checked_out': self.checked_out,
+                'total_checkouts': self.total_checkouts,
+                'checkout_failures': self.checkout_failures,
+                'avg_wait_ms': round(avg_wait, 3),
+                'max_wait_ms': round(self.max_wait_ms, 3),
+                'pool_clears': self.pool_clears
+            }
+
+
+# Écouteur unique, réutilisé par chaque client créé dans le processus
+_pool_stats = PoolStatsListener()
+
 
 def load_config():
-    """Charge la configuration depuis le fichier configuration.json."""
-    with open('configuration.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """
+    Retourne la configuration de l'application (configuration.json).
+
+    La configuration est mise en cache et en lecture seule (voir utils.config).
+    """
+    return get_config()
+
+
+def _get_client_options(mongo_config):
+    """
+    Construit les options du MongoClient à partir de la section 'mongo.pool'.
+
+    Args:
+        mongo_config: Section 'mongo' de la configuration
+
+    Returns:
+        dict: Arguments nommés à passer au MongoClient
+    """
+    pool_config = mongo_config.get('pool', {})
+
+    options = {
+        'maxPoolSize': pool_config.get('max_pool_size', 100),
+        'minPoolSize': pool_config.get('min_pool_size', 0),
+        'maxIdleTimeMS': pool_config.get('max_idle_time_ms'),
+        'waitQueueTimeoutMS': pool_config.get('wait_queue_timeout_ms'),
+        'serverSelectionTimeoutMS': pool_config.get('server_selection_timeout_ms', 5000),
+        'connectTimeoutMS': pool_config.get('connect_timeout_ms', 20000),
+        'socketTimeoutMS': pool_config.get('socket_timeout_ms'),
+        'event_listeners': [_pool_stats]
+    }
+
+    compressors = pool_config.get('compressors')
+    if compressors:
+        if isinstance(compressors, str):
+            compressors = [c.strip() for c in compressors.split(',') if c.strip()]
+        options['compressors'] = list(compressors)
+
+    # Ne pas transmettre les options non définies (valeurs par défaut de pymongo)
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def _reset_client():
+    """Oublie le client courant sans le fermer."""
+    global _client, _client_pid
+    _client = None
+    _client_pid = None
+    _pool_stats.reset()
+
+
+def _after_fork_in_child():
+    """
+    Réinitialise l'état MongoDB dans le processus enfant après un fork.
+    Les verrous sont recréés car ils ont pu être copiés dans un état verrouillé.
+    """
+    global _client, _client_pid, _client_lock, _pool_stats
+    _client = None
+    _client_pid = None
+    _client_lock = threading.Lock()
+    _pool_stats = PoolStatsListener()
+
+
+# Un MongoClient ne doit pas être partagé entre processus : après un fork
+# (gunicorn, multiprocessing...), l'enfant recrée son propre client.
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_client():
+    """
+    Retourne le MongoClient partagé du processus, créé à la première demande.
+
+    Le client gère lui-même un pool de connexions thread-safe ; la connexion
+    n'est vérifiée (ping) qu'à sa création.
+
+    Returns:
+        MongoClient: Client MongoDB du processus courant
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _client_lock:
+        if _client is not None and _client_pid == pid:
+            return _client
+
+        config = load_config()
+        mongo_config = config['mongo']
+
+        connection_string = f"mongodb://{mongo_config['user']}:{mongo_config['pass']}@{mongo_config['host']}:{mongo_config['port']}/"
+
+        client = MongoClient(connection_string, **_get_client_options(mongo_config))
+        try:
+            # Tester la connexion
+            client.admin.command('ping')
+        except ConnectionFailure as e:
+            client.close()
+            raise Exception(f"Impossible de se connecter à MongoDB: {e}")
+
+        _client = client
+        _client_pid = pid
+        return _client
+
+
+def close_client():
+    """Ferme le client partagé du processus (arrêt de l'application, tests)."""
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _reset_client()
+
+
+def get_pool_stats():
+    """
+    Retourne les statistiques du pool de connexions MongoDB.
+
+    Returns:
+        dict: Connexions ouvertes, empruntées, temps d'attente, etc.
+    """
+    stats = _pool_stats.snapshot()
+    stats['client_initialized'] = _client is not None and _client_pid == os.getpid()
+    stats['pid'] = os.getpid()
+
+    if stats['client_initialized']:
+        stats['max_pool_size'] = _client.options.pool_options.max_pool_size
+
+    return stats
+
 
 def get_db_connection():
-    """Établit et retourne une connexion à la base de données MongoDB."""
+    """Retourne la base de données MongoDB du client partagé."""
     config = load_config()
-    mongo_config = config['mongo']
-    
-    connection_string = f"mongodb://{mongo_config['user']}:{mongo_config['pass']}@{mongo_config['host']}:{mongo_config['port']}/"
-    
-    try:
-        client = MongoClient(connection_string, serverSelectionTimeoutMS=5000)
-        # Tester la connexion
-        client.admin.command('ping')
-        db = client[mongo_config['bdd']]
-        return db
-    except ConnectionFailure as e:
-        raise Exception(f"Impossible de se connecter à MongoDB: {e}")
+    return get_client()[config['mongo']['bdd']]
+
 
 def get_collection(collection_name):
     """Retourne une collection MongoDB spécifique."""
@@ -0,0 +1,263 @@
+"""Diffusion des événements Socket.IO entre processus (workers d'exécution, serveurs web)."""
+import os
+import socket
+import threading
+from datetime import datetime
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+from utils.db import get_db_connection, load_config
+
+try:
+    import redis
+except ImportError:  # File de messages Redis optionnelle
+    redis = None
+
+# Modes de diffusion des événements (configuration events.backend) :
+#   mongo : collection plafonnée relayée par chaque serveur web (défaut)
+#   redis : message_queue Flask-SocketIO (nécessite le paquet redis)
+#   local : émission directe, limitée à un seul processus
+BACKEND_MONGO = 'mongo'
+BACKEND_REDIS = 'redis'
+BACKEND_LOCAL = 'local'
+BACKENDS = (BACKEND_MONGO, BACKEND_REDIS, BACKEND_LOCAL)
+
+DEFAULT_COLLECTION = 'socketio_events'
+DEFAULT_SIZE_MB = 64
+DEFAULT_REDIS_URL = 'redis://localhost:6379/0'
+DEFAULT_CHANNEL = 'flask-socketio'
+RETRY_DELAY = 1.0  # secondes
+
+
+def get_backend():
+    """
+    Retourne le mode de diffusion des événements configuré.
+
+    Le mode Redis est remplacé par le mode MongoDB si le paquet redis
+    n'est pas installé.
+
+    Returns:
+        str: 'mongo', 'redis' ou 'local'
+    """
+    backend = load_config().get('events', {}).get('backend', BACKEND_MONGO)
+
+    if backend not in BACKENDS:
+        print(f"⚠ Mode de diffusion des événements inconnu '{backend}', utilisation de '{BACKEND_MONGO}'")
+        return BACKEND_MONGO
+
+    if backend == BACKEND_REDIS and redis is None:
+        print(f"⚠ Paquet redis non installé, utilisation de '{BACKEND_MONGO}' pour la diffusion des événements")
+        return BACKEND_MONGO
+
+    return backend
+
+
+def get_socketio_options(backend=None):
+    """
+    Retourne les options de SocketIO propres au mode de diffusion.
+
+    Args:
+        backend: Mode de diffusion (par défaut celui de la configuration)
+
+    Returns:
+        dict: Options à passer à SocketIO (message_queue et channel en mode Redis)
+    """
+    backend = backend or get_backend()
+    if backend != BACKEND_REDIS:
+        return {}
+
+    events_config = load_config().get('events', {})
+    return {
+        'message_queue': events_config.get('redis_url', DEFAULT_REDIS_URL),
+        'channel': events_config.get('channel', DEFAULT_CHANNEL)
+    }
+
+
+def create_event_emitter(socketio=None, backend=None):
+    """
+    Retourne l'émetteur à utiliser par les exécuteurs.
+
+    Args:
+        socketio: Instance Flask-SocketIO du serveur web (None dans un worker)
+        backend: Mode de diffusion (par défaut celui de la configuration)
+
+    Returns:
+        Objet exposant emit(event, data, room=...)
+
+    Raises:
+        ValueError: Mode local sans instance SocketIO (processus worker)
+    """
+    backend = backend or get_backend()
+
+    if backend == BACKEND_MONGO:
+        return MongoEventPublisher()
+
+    if backend == BACKEND_REDIS:
+        if socketio is not None:
+            return socketio
+        # Émetteur externe : publie dans la file Redis sans servir de clients
+        from flask_socketio import SocketIO
+        return SocketIO(**get_socketio_options(backend))
+
+    if socketio is None:
+        raise ValueError("Le mode de diffusion 'local' ne permet pas d'émettre depuis un processus worker")
+    return socketio
+
+
+def _get_settings():
+    """Retourne (collection, taille en octets) du bus depuis la configuration."""
+    events_config = load_config().get('events', {})
+    collection_name = events_config.get('collection', DEFAULT_COLLECTION)
+    size_bytes = int(events_config.get('size_mb', DEFAULT_SIZE_MB)) * 1024 * 1024
+    return collection_name, size_bytes
+
+
+def ensure_event_collection(db=None):
+    """
+    Crée la collection plafonnée (capped) du bus si elle n'existe pas.
+
+    Args:
+        db: Base MongoDB (par défaut celle de la configuration)
+
+    Returns:
+        Collection: Collection du bus
+    """
+    if db is None:
+        db = get_db_connection()
+
+    collection_name, size_bytes = _get_settings()
+
+    if collection_name not in db.list_collection_names():
+        try:
+            db.create_collection(collection_name, capped=True, size=size_bytes)
+        except CollectionInvalid:
+            # Créée entre-temps par un autre processus
+            pass
+
+    collection = db[collection_name]
+    if not collection.options().get('capped'):
+        print(f"⚠ La collection {collection_name} n'est pas plafonnée : le relais des événements est impossible")
+
+    return collection
+
+
+class MongoEventPublisher:
+    """
+    Émetteur d'événements Socket.IO via MongoDB.
+
+    Expose la même méthode emit() que Flask-SocketIO : les exécuteurs et le
+    LogChannel l'utilisent sans modification. Chaque événement est inséré dans
+    la collection plafonnée, puis relayé par MongoEventRelay aux clients de
+    chaque serveur web, quel que soit le processus émetteur.
+    """
+
+    def __init__(self):
+        """Initialise l'émetteur (la collection est créée à la demande)."""
+        self.source = f"{socket.gethostname()}:{os.getpid()}"
+        self._collection = None
+
+    def _get_collection(self):
+        """Retourne la collection du bus (créée au premier appel)."""
+        if self._collection is None:
+            self._collection = ensure_event_collection()
+        return self._collection
+
+    def emit(self, event, data=None, room=None, **kwargs):
+        """
+        Publie un événement.
+
+        Args:
+            event: Nom de l'événement Socket.IO
+            data: Données de l'événement
+            room: Room destinataire (None pour tous les clients)
+        """
+        try:
+            self._get_collection().insert_one({
+                'event': event,
+                'data': data,
+                'room': room,
+                'source': self.source,
+                'dateCreated': datetime.utcnow()
+            })
+        except PyMongoError as e:
+            print(f"⚠ Événement {event} non publié: {e}")
+
+
+class MongoEventRelay:
+    """
+    Relaie vers les clients Socket.IO les événements publiés dans le bus.
+
+    Un curseur "tailable" suit la collection plafonnée : chaque nouvel
+    événement est émis dans sa room par l'instance Socket.IO locale.
+    Seuls les événements publiés après le démarrage sont relayés.
+    """
+
+    def __init__(self, socketio):
+        """
+        Initialise le relais.
+
+        Args:
+            socketio: Instance Flask-SocketIO du serveur web
+        """
+        self.socketio = socketio
+        self.relayed = 0
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Démarre le relais dans un thread dédié."""
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name='event-relay', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête le relais (au plus tard après la prochaine attente du curseur)."""
+        self._stopping.set()
+
+    def _run(self):
+        """Suit la collection et relaie les événements, en se reconnectant si besoin."""
+        # Les ObjectId commencent par leur date de création (à la seconde près) :
+        # la reprise après une coupure repart du début de la dernière seconde vue
+        # et ignore les événements déjà relayés dans cette seconde.
+        resume_from = ObjectId.from_datetime(datetime.utcnow())
+        seen = set()
+
+        while not self._stopping.is_set():
+            try:
+                collection = ensure_event_collection()
+                cursor = collection.find(
+                    {'_id': {'$gte': resume_from}},
+                    cursor_type=CursorType.TAILABLE_AWAIT,
+                    max_await_time_ms=1000
+                )
+
+                while cursor.alive and not self._stopping.is_set():
+                    event = cursor.try_next()
+                    if event is None:
+                        continue
+
+                    second = ObjectId.from_datetime(event['_id'].generation_time)
+                    if second > resume_from:
+                        resume_from = second
+                        seen = set()
+                    if second == resume_from:
+                        if event['_id'] in seen:
+                            continue
+                        seen.add(event['_id'])
+
+                    self._relay(event)
+            except PyMongoError as e:
+                print(f"⚠ Relais des événements interrompu, nouvelle tentative: {e}")
+
+            # Curseur fermé (collection vide, coupure réseau...) : nouvelle tentative
+            self._stopping.wait(RETRY_DELAY)
+
+    def _relay(self, event):
+        """Émet un événement du bus via Socket.IO."""
+        try:
+            self.socketio.emit(event['event'], event.get('data'), room=event.get('room'))
+            self.relayed += 1
+        except Exception as e:
+            print(f"⚠ Événement {event.get('event')} non relayé: {e}")
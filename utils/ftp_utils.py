@@ -0,0 +1,209 @@
+"""Connexions FTP partagées par les actions d'une exécution (plugin ftp)."""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from ftplib import FTP, all_errors, error_perm
+from utils.config import get_config
+from utils.run_context import current_scope
+
+FTP_RESOURCE = 'ftp.pool'
+
+DEFAULT_CONNECT_TIMEOUT = 30  # secondes
+DEFAULT_IDLE_TIMEOUT = 300  # secondes
+DEFAULT_NOOP_AFTER = 15  # secondes
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def get_ftp_settings():
+    """Retourne la configuration des connexions FTP (connections.ftp)."""
+    return get_config().get('connections', {}).get('ftp', {})
+
+
+def connect(host, port, username, password, settings=None):
+    """
+    Ouvre une connexion FTP authentifiée (mode passif).
+
+    Args:
+        host: Hôte
+        port: Port
+        username: Nom d'utilisateur
+        password: Mot de passe
+        settings: Configuration connections.ftp (lue si None)
+
+    Returns:
+        FTP: Connexion établie
+    """
+    settings = get_ftp_settings() if settings is None else settings
+
+    ftp = FTP()
+    ftp.connect(host, port, timeout=settings.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT))
+    try:
+        ftp.login(username, password)
+    except Exception:
+        ftp.close()
+        raise
+    return ftp
+
+
+def close(ftp):
+    """Ferme une connexion FTP (QUIT, puis fermeture du socket si le serveur ne répond pas)."""
+    try:
+        ftp.quit()
+    except all_errors:
+        ftp.close()
+
+
+class FTPPool:
+    """
+    Connexions FTP inactives vers un même serveur et un même compte.
+
+    Une connexion FTP ne transfère qu'un fichier à la fois : chaque action
+    emprunte une connexion libre (ou en ouvre une nouvelle) et la rend à la
+    fin de l'action. Les tests d'une campagne exécutés en parallèle disposent
+    ainsi chacun de leur connexion.
+    """
+
+    def __init__(self, factory, idle_timeout=DEFAULT_IDLE_TIMEOUT, noop_after=DEFAULT_NOOP_AFTER):
+        """
+        Initialise le pool.
+
+        Args:
+            factory: Fonction sans argument ouvrant une connexion
+            idle_timeout: Durée (secondes) au-delà de laquelle une connexion inactive est fermée
+            noop_after: Inactivité (secondes) au-delà de laquelle une connexion est vérifiée (NOOP)
+        """
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self._idle = []  # [(ftp, dernière utilisation)]
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def in_use(self):
+        """Indique si une connexion du pool est empruntée."""
+        return self.active > 0
+
+    def acquire(self):
+        """
+        Emprunte une connexion.
+
+        Returns:
+            tuple: (FTP, True si la connexion a été réutilisée)
+        """
+        now = time.monotonic()
+
+        while True:
+            with self._lock:
+                expired = [ftp for ftp, last_used in self._idle if now - last_used > self.idle_timeout]
+                self._idle = [(ftp, last_used) for ftp, last_used in self._idle if now - last_used <= self.idle_timeout]
+                candidate = self._idle.pop() if self._idle else None
+                self.active += 1
+
+            for ftp in expired:
+                close(ftp)
+
+            if candidate is None:
+                break
+
+            ftp, last_used = candidate
+            if now - last_used <= self.noop_after:
+                return ftp, True
+            try:
+                # Connexion restée inactive : le serveur a pu la fermer
+                ftp.voidcmd('NOOP')
+                return ftp, True
+            except all_errors:
+                ftp.close()
+                with self._lock:
+                    self.active -= 1
+
+        try:
+            return self.factory(), False
+        except Exception:
+            with self._lock:
+                self.active -= 1
+            raise
+
+    def release(self, ftp, reusable=True):
+        """
+        Rend une connexion empruntée.
+
+        Args:
+            ftp: Connexion
+            reusable: False pour fermer la connexion (erreur réseau ou protocole)
+        """
+        with self._lock:
+            self.active -= 1
+            if reusable:
+                self._idle.append((ftp, time.monotonic()))
+                return
+        ftp.close()
+
+    def close(self):
+        """Ferme les connexions inactives du pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for ftp, _ in idle:
+            close(ftp)
+
+
+@contextmanager
+def ftp_connection(host, port, username, password):
+    """
+    Fournit une connexion FTP, réutilisée au sein de l'exécution en cours.
+
+    Dans une portée d'exécution (voir utils/run_context.py), les connexions
+    sont regroupées par hôte, port, utilisateur et empreinte du mot de passe,
+    et conservées jusqu'à la fin de la portée ou `connections.ftp.idle_timeout`
+    secondes d'inactivité. Une connexion ayant subi une erreur autre qu'un
+    refus du serveur (5xx) est fermée. Hors portée, la connexion est fermée
+    en sortie de bloc.
+
+    Args:
+        host: Hôte
+        port: Port
+        username: Nom d'utilisateur
+        password: Mot de passe
+
+    Yields:
+        tuple: (FTP, True si la connexion a été réutilisée)
+    """
+    settings = get_ftp_settings()
+    scope = current_scope()
+
+    if scope is None:
+        ftp = connect(host, port, username, password, settings)
+        try:
+            yield ftp, False
+        finally:
+            close(ftp)
+        return
+
+    idle_timeout = settings.get('idle_timeout', DEFAULT_IDLE_TIMEOUT)
+    scope.evict_idle(FTP_RESOURCE, idle_timeout, in_use=FTPPool.in_use)
+
+    key = (host, port, username, hashlib.sha256((password or '').encode('utf-8')).hexdigest())
+    pool, _ = scope.get_or_create(
+        FTP_RESOURCE, key,
+        lambda: FTPPool(
+            lambda: connect(host, port, username, password, settings),
+            idle_timeout=idle_timeout,
+            noop_after=settings.get('noop_after', DEFAULT_NOOP_AFTER)
+        ),
+        close=FTPPool.close
+    )
+
+    ftp, reused = pool.acquire()
+    reusable = True
+    try:
+        yield ftp, reused
+    except (error_perm, ValueError):
+        # Refus du serveur (fichier absent, droits) ou paramètre invalide : la
+        # connexion reste utilisable
+        raise
+    except BaseException:
+        reusable = False
+        raise
+    finally:
+        pool.release(ftp, reusable)
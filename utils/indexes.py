@@ -0,0 +1,156 @@
+"""Provisionnement et diagnostic des index MongoDB de TestGyver."""
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from utils.db import get_db_connection
+
+# Index attendus par collection : (clés, options)
+# Les noms par défaut de MongoDB sont conservés pour rester compatibles avec
+# les index déjà créés par init/init_database.py.
+INDEX_SPECS = {
+    'users': [
+        ([('email', ASCENDING)], {'unique': True}),
+    ],
+    'variables': [
+        ([('key', ASCENDING), ('filiere', ASCENDING)], {'unique': True}),
+        ([('filiere', ASCENDING), ('_id', ASCENDING)], {}),
+        ([('isRoot', ASCENDING), ('key', ASCENDING)], {}),
+    ],
+    'campains': [
+        ([('dateCreated', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('userCreated', ASCENDING), ('dateCreated', DESCENDING)], {}),
+    ],
+    'tests': [
+        ([('campainId', ASCENDING), ('dateCreated', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('dateCreated', DESCENDING), ('_id', DESCENDING)], {}),
+    ],
+    'rapports': [
+        ([('campainId', ASCENDING), ('dateCreated', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('dateCreated', DESCENDING), ('_id', DESCENDING)], {}),
+        # Le nom d'un rapport est unique (vérifié par les routes de création, voir
+        # Rapport.get_by_name) ; les noms vides sont exclus. Les erreurs d'exécution
+        # sont écrites dans le champ error, jamais dans le nom
+        ([('details', ASCENDING)], {'unique': True, 'partialFilterExpression': {'details': {'$gt': ''}}}),
+    ],
+    'rapport_logs': [
+        ([('rapportId', ASCENDING), ('testId', ASCENDING), ('offset', ASCENDING)], {}),
+    ],
+    'jobs': [
+        ([('status', ASCENDING), ('dateCreated', ASCENDING)], {}),
+        ([('status', ASCENDING), ('leaseExpiresAt', ASCENDING)], {}),
+        ([('rapportId', ASCENDING)], {}),
+    ],
+}
+
+# Requêtes représentatives des modèles, vérifiées par explain_queries()
+# (collection, description, filtre, tri)
+MODEL_QUERIES = [
+    ('users', 'User.find_by_email', {'email': 'admin@example.com'}, None),
+    ('variables', 'Variable.create (unicité key + filiere)', {'key': 'api_url', 'filiere': 'DEV'}, None),
+    ('variables', 'Variable.get_page (filiere)', {'filiere': 'DEV'}, [('_id', ASCENDING)]),
+    ('variables', 'Variable.find_by_key_and_root', {'key': 'api_url', 'isRoot': True}, None),
+    ('variables', 'Variable.get_root_variables', {'isRoot': True}, None),
+    ('campains', 'Campain.get_page', {}, [('dateCreated', DESCENDING), ('_id', DESCENDING)]),
+    ('campains', 'Campain.get_by_user', {'userCreated': ObjectId()}, [('dateCreated', DESCENDING)]),
+    ('tests', 'Test.get_page (campagne)', {'campainId': ObjectId()}, [('dateCreated', DESCENDING), ('_id', DESCENDING)]),
+    ('tests', 'Test.get_page', {}, [('dateCreated', DESCENDING), ('_id', DESCENDING)]),
+    ('rapports', 'Rapport.get_page (campagne)', {'campainId': ObjectId()}, [('dateCreated', DESCENDING), ('_id', DESCENDING)]),
+    ('rapports', 'Rapport.get_page', {}, [('dateCreated', DESCENDING), ('_id', DESCENDING)]),
+    ('rapports', 'Rapport.get_by_name', {'details': 'Octobre 2025'}, None),
+    ('rapport_logs', 'RapportLog.iter_range', {'rapportId': ObjectId(), 'testId': ObjectId(), 'end': {'$gt': 0}}, [('offset', ASCENDING)]),
+    ('rapport_logs', 'RapportLog.delete_by_rapport', {'rapportId': ObjectId()}, None),
+    ('jobs', 'Job.claim (file d\'attente)', {'status': 'queued'}, [('dateCreated', ASCENDING)]),
+    ('jobs', 'Job.claim (baux expirés)', {'status': 'running', 'leaseExpiresAt': {'$lt': datetime.utcnow()}}, None),
+]
+
+
+def ensure_indexes(db=None):
+    """
+    Crée les index attendus sur toutes les collections (opération idempotente).
+
+    Un index déjà présent avec la même définition n'est pas recréé. Un conflit
+    (doublons empêchant un index unique, options différentes) est signalé
+    sans interrompre le provisionnement des autres index.
+
+    Args:
+        db: Base MongoDB (par défaut celle de la configuration)
+
+    Returns:
+        list: Résultat par index {'collection', 'keys', 'name', 'status', 'error'}
+    """
+    if db is None:
+        db = get_db_connection()
+
+    report = []
+    for collection_name, specs in INDEX_SPECS.items():
+        for keys, options in specs:
+            entry = {
+                'collection': collection_name,
+                'keys': keys,
+                'name': None,
+                'status': 'ok',
+                'error': None
+            }
+            try:
+                entry['name'] = db[collection_name].create_index(keys, **options)
+            except OperationFailure as e:
+                entry['status'] = 'error'
+                entry['error'] = str(e)
+                print(f"⚠ Index {collection_name} {keys} non créé: {e}")
+            report.append(entry)
+
+    return report
+
+
+def _collect_stages(plan):
+    """Retourne la liste des étapes (stage) d'un plan d'exécution."""
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for key in ('inputStage', 'queryPlan'):
+            stages.extend(_collect_stages(plan.get(key)))
+        for child in plan.get('inputStages', []):
+            stages.extend(_collect_stages(child))
+    return stages
+
+
+def explain_queries(db=None):
+    """
+    Exécute explain() sur les requêtes des modèles et signale les parcours complets.
+
+    Args:
+        db: Base MongoDB (par défaut celle de la configuration)
+
+    Returns:
+        list: Résultat par requête {'collection', 'query', 'stages', 'index', 'collscan'}
+    """
+    if db is None:
+        db = get_db_connection()
+
+    results = []
+    for collection_name, description, query_filter, sort in MODEL_QUERIES:
+        cursor = db[collection_name].find(query_filter)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        plan = cursor.limit(20).explain().get('queryPlanner', {}).get('winningPlan', {})
+        stages = _collect_stages(plan)
+
+        index_names = []
+        node = plan
+        while isinstance(node, dict):
+            if node.get('indexName'):
+                index_names.append(node['indexName'])
+            node = node.get('inputStage') or node.get('queryPlan')
+
+        results.append({
+            'collection': collection_name,
+            'query': description,
+            'stages': stages,
+            'index': index_names[0] if index_names else None,
+            'collscan': 'COLLSCAN' in stages
+        })
+
+    return results
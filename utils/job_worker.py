@@ -0,0 +1,260 @@
+"""Worker consommant la file d'attente persistante des exécutions."""
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from models.job import Job
+from models.rapport import Rapport
+from utils.db import load_config
+
+DEFAULT_MAX_RUNNING = 2
+DEFAULT_POLL_INTERVAL = 2.0  # secondes
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class JobWorker:
+    """
+    Consomme les jobs de la collection `jobs` et exécute les campagnes
+    (et les tests seuls si `execution.worker.queue_tests` est activé).
+
+    Au plus `max_running` jobs sont exécutés en même temps par ce
+    processus. Le bail de chaque job en cours est renouvelé toutes les
+    `lease_seconds / 3` secondes ; un job dont le bail a expiré (processus
+    arrêté) est repris par le premier worker disponible, qui rejoue
+    uniquement les tests absents du rapport.
+    """
+
+    def __init__(self, campain_executor, test_executor=None, max_running=None, poll_interval=None, lease_seconds=None, max_attempts=None):
+        """
+        Initialise le worker.
+
+        Args:
+            campain_executor: Instance de CampainExecutor
+            test_executor: Instance de TestExecutor (jobs de type 'test')
+            max_running: Nombre maximum de jobs exécutés simultanément
+            poll_interval: Délai (secondes) entre deux consultations de la file vide
+            lease_seconds: Durée du bail d'un job
+            max_attempts: Nombre maximum de prises en charge d'un job (si le job ne le précise pas)
+        """
+        worker_config = load_config().get('execution', {}).get('worker', {})
+
+        self.campain_executor = campain_executor
+        self.test_executor = test_executor
+        self.max_running = max(1, int(max_running or worker_config.get('max_running_campains', DEFAULT_MAX_RUNNING)))
+        self.poll_interval = float(poll_interval or worker_config.get('poll_interval', DEFAULT_POLL_INTERVAL))
+        self.lease_seconds = int(lease_seconds or worker_config.get('lease_seconds', DEFAULT_LEASE_SECONDS))
+        self.max_attempts = int(max_attempts or worker_config.get('max_attempts', DEFAULT_MAX_ATTEMPTS))
+        self.heartbeat_interval = max(1.0, self.lease_seconds / 3)
+
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._active = {}  # {job_id: signal d'interruption}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pool = None
+
+        # Exécuteur de chaque type de job
+        self.handlers = {'campain': campain_executor}
+        if test_executor is not None:
+            self.handlers['test'] = test_executor
+
+        for executor in self.handlers.values():
+            executor.job_worker = self
+
+    def start(self):
+        """Démarre la boucle du worker dans un thread dédié."""
+        if self._thread is not None:
+            return
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_running, thread_name_prefix='job-worker')
+        self._thread = threading.Thread(target=self._loop, name='job-worker-loop', daemon=True)
+        self._thread.start()
+        print(f"✓ Worker d'exécution démarré ({self.owner}, {self.max_running} job(s) simultané(s))")
+
+    def notify(self):
+        """Réveille la boucle (un job vient d'être ajouté)."""
+        self._wakeup.set()
+
+    def stop(self, timeout=10):
+        """
+        Arrête le worker.
+
+        Plus aucun job n'est pris en charge et les campagnes en cours cessent
+        de démarrer de nouveaux tests ; leurs jobs sont remis en file pour
+        être repris (sans rejouer les tests terminés).
+
+        Args:
+            timeout: Délai maximal (secondes) d'attente des tests en cours
+
+        Returns:
+            bool: True si toutes les campagnes en cours ont été interrompues
+        """
+        self._stopping.set()
+        self._wakeup.set()
+
+        with self._lock:
+            for cancel_event in self._active.values():
+                cancel_event.set()
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._active:
+                    return True
+            time.sleep(0.1)
+
+        with self._lock:
+            return not self._active
+
+    def get_stats(self):
+        """
+        Retourne l'état du worker.
+
+        Returns:
+            dict: Identifiant, capacité et jobs en cours
+        """
+        with self._lock:
+            active = list(self._active)
+        return {
+            'owner': self.owner,
+            'running': self._thread is not None and not self._stopping.is_set(),
+            'max_running': self.max_running,
+            'active_jobs': active
+        }
+
+    def _loop(self):
+        """Boucle principale : prise en charge des jobs et renouvellement des baux."""
+        try:
+            self.recover_orphans()
+        except Exception as e:
+            print(f"⚠ Récupération des rapports orphelins impossible: {e}")
+
+        next_heartbeat = time.monotonic() + self.heartbeat_interval
+
+        while not self._stopping.is_set():
+            try:
+                if time.monotonic() >= next_heartbeat:
+                    self._heartbeat()
+                    next_heartbeat = time.monotonic() + self.heartbeat_interval
+
+                claimed = False
+                with self._lock:
+                    has_slot = len(self._active) < self.max_running
+
+                if has_slot:
+                    job = Job.claim(self.owner, self.lease_seconds)
+                    if job:
+                        claimed = True
+                        self._start_job(job)
+            except Exception as e:
+                print(f"⚠ Erreur du worker d'exécution: {e}")
+                claimed = False
+
+            if claimed:
+                # Tenter immédiatement de remplir les emplacements restants
+                continue
+
+            self._wakeup.wait(min(self.poll_interval, max(0.0, next_heartbeat - time.monotonic())))
+            self._wakeup.clear()
+
+    def _heartbeat(self):
+        """Renouvelle le bail des jobs en cours ; interrompt ceux qui ont été perdus."""
+        with self._lock:
+            active = list(self._active.items())
+
+        for job_id, cancel_event in active:
+            if not Job.heartbeat(job_id, self.owner, self.lease_seconds):
+                print(f"⚠ Bail perdu pour le job {job_id}, interruption de l'exécution")
+                cancel_event.set()
+
+    def _start_job(self, job):
+        """Soumet un job pris en charge au pool d'exécution."""
+        if job['attempts'] > job.get('maxAttempts', self.max_attempts):
+            self._abandon_job(job)
+            return
+
+        cancel_event = threading.Event()
+        with self._lock:
+            self._active[job['_id']] = cancel_event
+
+        self._pool.submit(self._run_job, job, cancel_event)
+
+    def _run_job(self, job, cancel_event):
+        """Exécute un job dans un thread du pool puis met à jour son statut."""
+        job_id = job['_id']
+        try:
+            executor = self.handlers.get(job.get('type'))
+            if executor is None:
+                raise ValueError(f"Type de job inconnu: {job.get('type')}")
+
+            finalized = executor.run_job(job, cancel_event)
+
+            if finalized:
+                Job.finish(job_id, self.owner)
+            elif self._stopping.is_set():
+                # Arrêt du worker : le job est repris par le prochain worker
+                Job.release(job_id, self.owner)
+        except Exception as e:
+            print(f"✗ Erreur lors de l'exécution du job {job_id}: {e}")
+            Job.finish(job_id, self.owner, Job.STATUS_FAILED, f"{e}\n{traceback.format_exc()}")
+        finally:
+            with self._lock:
+                self._active.pop(job_id, None)
+            self._wakeup.set()
+
+    def _abandon_job(self, job):
+        """Marque en échec un job repris trop de fois ainsi que son rapport."""
+        error = f"Exécution abandonnée après {job['attempts'] - 1} tentative(s) interrompue(s)"
+        print(f"✗ Job {job['_id']}: {error}")
+
+        Job.finish(job['_id'], self.owner, Job.STATUS_FAILED, error)
+
+        if job.get('type') == 'test' and self.test_executor is not None:
+            test_id = job['payload']['testId']
+            self.test_executor.events.emit('test_completed', {
+                'test_id': test_id,
+                'status': 'failed'
+            }, room=f'test_{test_id}')
+            return
+
+        if job.get('rapportId'):
+            Rapport.update(job['rapportId'], {'status': 'failed', 'result': 'failure'})
+            self.campain_executor.events.emit('campain_error', {
+                'rapport_id': job['rapportId'],
+                'error': error
+            }, room=f"rapport_{job['rapportId']}")
+
+    def recover_orphans(self):
+        """
+        Marque en échec les rapports en cours sans job actif.
+
+        Ces rapports proviennent d'exécutions lancées avant la mise en place
+        de la file d'attente ou dont le job a été supprimé. Les rapports
+        récents sont ignorés (job en cours de création).
+
+        Returns:
+            list: IDs des rapports marqués en échec
+        """
+        created_before = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        active_rapports = Job.get_active_rapport_ids()
+
+        orphans = [
+            rapport_id
+            for rapport_id in Rapport.get_unfinished_ids(created_before)
+            if rapport_id not in active_rapports
+        ]
+
+        for rapport_id in orphans:
+            Rapport.update(rapport_id, {'status': 'failed', 'result': 'failure'})
+
+        if orphans:
+            print(f"ℹ {len(orphans)} rapport(s) interrompu(s) sans job marqué(s) en échec")
+
+        return orphans
@@ -0,0 +1,147 @@
+"""Histogramme de latences à précision relative bornée (style HDR Histogram)."""
+import math
+
+DEFAULT_PRECISION_BITS = 7  # erreur relative < 2^-6 (1,6 %)
+
+
+class LatencyHistogram:
+    """
+    Histogramme de latences en microsecondes.
+
+    Les valeurs sont regroupées dans des intervalles dont la largeur croît
+    avec la valeur (log-linéaire, comme HDR Histogram) : la mémoire utilisée
+    ne dépend pas du nombre de mesures et l'erreur relative d'un percentile
+    est inférieure à 2^-(precision_bits - 1). Les mesures exactes du minimum,
+    du maximum et de la moyenne sont conservées à part.
+
+    Un histogramme n'est pas protégé contre les accès concurrents : chaque
+    thread enregistre dans son propre histogramme, fusionnés avec merge().
+    """
+
+    def __init__(self, precision_bits=DEFAULT_PRECISION_BITS):
+        """
+        Initialise l'histogramme.
+
+        Args:
+            precision_bits: Nombre de bits significatifs conservés par valeur
+        """
+        self.precision_bits = precision_bits
+        self.counts = {}  # {(exposant, mantisse): nombre de mesures}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        """Retourne l'intervalle (exposant, mantisse) d'une valeur entière."""
+        shift = max(0, value.bit_length() - self.precision_bits)
+        return shift, value >> shift
+
+    @staticmethod
+    def _bucket_bounds(bucket):
+        """Retourne les bornes (incluses) d'un intervalle."""
+        shift, mantissa = bucket
+        lower = mantissa << shift
+        return lower, lower + (1 << shift) - 1
+
+    def record(self, seconds):
+        """
+        Enregistre une latence.
+
+        Args:
+            seconds: Latence en secondes
+        """
+        self.record_us(int(round(seconds * 1000000)))
+
+    def record_us(self, value, count=1):
+        """
+        Enregistre une latence en microsecondes.
+
+        Args:
+            value: Latence (microsecondes, entier positif)
+            count: Nombre de mesures de cette valeur
+        """
+        value = max(0, int(value))
+        bucket = self._bucket(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """
+        Ajoute les mesures d'un autre histogramme.
+
+        Args:
+            other: LatencyHistogram de même précision
+        """
+        if other.precision_bits != self.precision_bits:
+            raise ValueError("Histogrammes de précisions différentes")
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, percent):
+        """
+        Retourne la latence sous laquelle se trouvent `percent` % des mesures.
+
+        La valeur renvoyée est la borne haute de l'intervalle contenant le
+        percentile (jamais supérieure au maximum mesuré), comme HDR Histogram.
+
+        Args:
+            percent: Percentile (0 à 100)
+
+        Returns:
+            int: Latence en microsecondes (0 si aucune mesure)
+        """
+        if not self.count:
+            return 0
+
+        percent = min(max(percent, 0.0), 100.0)
+        # Arrondi préalable : 99.9 % de 20000 ne doit pas devenir 19980,000000000004
+        target = max(1, int(math.ceil(round(percent * self.count / 100.0, 6))))
+
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(self._bucket_bounds(bucket)[1], self.max)
+        return self.max
+
+    def mean(self):
+        """Retourne la latence moyenne en microsecondes (0 si aucune mesure)."""
+        return self.total / self.count if self.count else 0.0
+
+    def buckets(self):
+        """
+        Retourne la distribution des mesures.
+
+        Returns:
+            list: Liste de (borne basse, borne haute, nombre) en microsecondes, triée
+        """
+        return [self._bucket_bounds(bucket) + (self.counts[bucket],) for bucket in sorted(self.counts)]
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        Retourne un résumé des latences en millisecondes.
+
+        Args:
+            percentiles: Percentiles à calculer
+
+        Returns:
+            dict: count, min, mean, max et pXX (ms)
+        """
+        result = {
+            'count': self.count,
+            'min': (self.min or 0) / 1000.0,
+            'mean': round(self.mean() / 1000.0, 3),
+            'max': (self.max or 0) / 1000.0
+        }
+        for percent in percentiles:
+            result[f'p{percent:g}'] = self.percentile(percent) / 1000.0
+        return result
@@ -0,0 +1,94 @@
+"""Canal d'émission groupée des logs d'exécution via Socket.IO."""
+import threading
+import time
+
+DEFAULT_FLUSH_INTERVAL = 0.1  # secondes
+DEFAULT_MAX_LINES = 500
+DEFAULT_MAX_BYTES = 64 * 1024
+
+
+class LogChannel:
+    """
+    Regroupe les lignes de logs par room et les émet par lots.
+
+    Au lieu d'un événement Socket.IO par ligne, les lignes sont mises en
+    tampon puis envoyées dans un seul événement (`test_log_batch` par défaut)
+    dès que le lot atteint `max_lines` lignes ou `max_bytes` octets, ou que
+    la ligne la plus ancienne attend depuis plus de `flush_interval` secondes.
+
+    L'émetteur appelle flush() avant toute opération bloquante (exécution
+    d'une action) et avant l'événement de fin : les lignes d'une room sont
+    ainsi toujours émises dans l'ordre, sans tâche d'arrière-plan.
+    """
+
+    def __init__(self, socketio, event='test_log_batch', key_field='test_id',
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, max_lines=DEFAULT_MAX_LINES, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialise le canal.
+
+        Args:
+            socketio: Instance Flask-SocketIO
+            event: Nom de l'événement émis pour chaque lot
+            key_field: Nom du champ identifiant la source dans l'événement (ex: test_id)
+            flush_interval: Délai maximal (secondes) de mise en attente d'une ligne
+            max_lines: Nombre de lignes déclenchant un envoi immédiat
+            max_bytes: Taille (caractères) déclenchant un envoi immédiat
+        """
+        self.socketio = socketio
+        self.event = event
+        self.key_field = key_field
+        self.flush_interval = flush_interval
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self._buffers = {}  # {room: {'key': ..., 'lines': [...], 'bytes': int, 'since': float}}
+        self._lock = threading.Lock()
+
+    def write(self, room, key, line):
+        """
+        Ajoute une ligne au lot de la room (émis si un seuil est atteint).
+
+        Args:
+            room: Room Socket.IO destinataire
+            key: Identifiant de la source (ex: ID du test)
+            line: Ligne de log
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            buffer = self._buffers.get(room)
+            if buffer is None:
+                buffer = self._buffers[room] = {'key': key, 'lines': [], 'bytes': 0, 'since': now}
+            buffer['lines'].append(line)
+            buffer['bytes'] += len(line)
+
+            full = len(buffer['lines']) >= self.max_lines or buffer['bytes'] >= self.max_bytes
+            expired = now - buffer['since'] >= self.flush_interval
+            batch = self._buffers.pop(room) if full or expired else None
+
+        if batch:
+            self._emit(room, batch)
+
+    def flush(self, room=None):
+        """
+        Émet immédiatement les lignes en attente.
+
+        Args:
+            room: Room à vider (None pour toutes les rooms)
+        """
+        with self._lock:
+            if room is None:
+                batches = self._buffers
+                self._buffers = {}
+            else:
+                batch = self._buffers.pop(room, None)
+                batches = {room: batch} if batch else {}
+
+        for batch_room, batch in batches.items():
+            self._emit(batch_room, batch)
+
+    def _emit(self, room, batch):
+        """Émet un lot de lignes dans une room."""
+        self.socketio.emit(self.event, {
+            self.key_field: batch['key'],
+            'logs': batch['lines']
+        }, room=room)
@@ -1,6 +1,26 @@
 """Utilitaires pour la pagination des résultats."""
+import base64
+from bson import json_util
 from utils.db import load_config
 
+def _resolve_page_size(page_size):
+    """
+    Détermine la taille de page effective à partir de la configuration.
+    
+    Args:
+        page_size: Taille demandée (None pour la valeur par défaut)
+    
+    Returns:
+        int: Taille de page bornée par le maximum configuré
+    """
+    config = load_config()
+    
+    if page_size is None or page_size < 1:
+        page_size = config['pagination']['page_size']
+    
+    # Limiter la taille de page au maximum configuré
+    return min(page_size, config['pagination']['max_page_size'])
+
 def paginate_results(query_results, page=1, page_size=None):
     """
     Pagine les résultats d'une requête.
@@ -13,15 +33,7 @@ def paginate_results(query_results, page=1, page_size=None):
     Returns:
         dict: Dictionnaire contenant les résultats paginés et les métadonnées
     """
-    config = load_config()
-    
-    if page_size is None:
-        page_size = config['pagination']['page_size']
-    
-    # Limiter la taille de page au maximum configuré
-    max_page_size = config['pagination']['max_page_size']
-    if page_size > max_page_size:
-        page_size = max_page_size
+    page_size = _resolve_page_size(page_size)
     
     # Convertir en liste si nécessaire
     results = list(query_results)
@@ -53,6 +65,142 @@ def paginate_results(query_results, page=1, page_size=None):
         }
     }
 
+def encode_cursor(document, sort):
+    """
+    Construit un curseur opaque à partir des champs de tri d'un document.
+    
+    Args:
+        document: Document MongoDB brut (avant conversion pour l'API)
+        sort: Liste des tris [(champ, direction), ...]
+    
+    Returns:
+        str: Curseur encodé en base64 (URL-safe)
+    """
+    values = [document.get(field) for field, _ in sort]
+    raw = json_util.dumps(values).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor, sort):
+    """
+    Décode un curseur produit par encode_cursor.
+    
+    Args:
+        cursor: Curseur opaque
+        sort: Liste des tris attendue
+    
+    Returns:
+        list: Valeurs des champs de tri
+    
+    Raises:
+        ValueError: Si le curseur est invalide
+    """
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError("Curseur de pagination invalide")
+    
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("Curseur de pagination invalide")
+    
+    return values
+
+def _keyset_filter(sort, values):
+    """
+    Construit le filtre sélectionnant les documents situés après le curseur.
+    
+    Pour un tri (a, b) décroissant : a < va OU (a = va ET b < vb).
+    """
+    clauses = []
+    for position, (field, direction) in enumerate(sort):
+        clause = {sort[i][0]: values[i] for i in range(position)}
+        clause[field] = {'$lt' if direction < 0 else '$gt': values[position]}
+        clauses.append(clause)
+    return {'$or': clauses}
+
+def paginate_query(collection, query=None, page=1, page_size=None, sort=None, after=None, transform=None, stages=None, projection=None):
+    """
+    Pagine une requête directement dans MongoDB (skip/limit ou curseur).
+    
+    Seule la fenêtre demandée est lue en base. Le dernier champ de tri doit
+    être unique (typiquement _id) pour que le curseur soit stable.
+    
+    Args:
+        collection: Collection MongoDB
+        query: Filtre de la requête
+        page: Numéro de la page (commence à 1), ignoré si `after` est fourni
+        page_size: Nombre d'éléments par page
+        sort: Liste des tris [(champ, direction), ...]
+        after: Curseur opaque (pagination par clé, sans skip)
+        transform: Fonction appliquée à chaque document avant retour
+        stages: Étapes d'agrégation supplémentaires appliquées à la page
+        projection: Champs à retourner ($project), None pour les documents complets
+    
+    Returns:
+        dict: Même structure que paginate_results, avec 'next_cursor' en plus
+    
+    Raises:
+        ValueError: Si le curseur est invalide
+    """
+    query = query or {}
+    sort = sort or [('_id', 1)]
+    page_size = _resolve_page_size(page_size)
+    
+    # Compter sans parcourir les documents (estimation si aucun filtre)
+    if query:
+        total_items = collection.count_documents(query)
+    else:
+        total_items = collection.estimated_document_count()
+    total_pages = (total_items + page_size - 1) // page_size  # Division arrondie au supérieur
+    
+    match = query
+    skip = 0
+    
+    if after:
+        keyset = _keyset_filter(sort, decode_cursor(after, sort))
+        match = {'$and': [query, keyset]} if query else keyset
+    else:
+        # Vérifier que la page demandée est valide
+        if page < 1:
+            page = 1
+        if page > total_pages and total_pages > 0:
+            page = total_pages
+        skip = (page - 1) * page_size
+    
+    pipeline = [{'$match': match}, {'$sort': dict(sort)}]
+    if skip:
+        pipeline.append({'$skip': skip})
+    # Un élément de plus pour savoir s'il existe une page suivante
+    pipeline.append({'$limit': page_size + 1})
+    if projection:
+        # Les champs de tri restent nécessaires pour construire le curseur
+        projection = dict(projection)
+        for field, _ in sort:
+            projection.setdefault(field, 1)
+        pipeline.append({'$project': projection})
+    pipeline.extend(stages or [])
+    
+    documents = list(collection.aggregate(pipeline))
+    has_next = len(documents) > page_size
+    documents = documents[:page_size]
+    
+    next_cursor = encode_cursor(documents[-1], sort) if has_next else None
+    
+    if transform:
+        documents = [transform(document) for document in documents]
+    
+    return {
+        'data': documents,
+        'pagination': {
+            'current_page': page,
+            'page_size': page_size,
+            'total_items': total_items,
+            'total_pages': total_pages,
+            'has_next': has_next,
+            'has_prev': bool(after) or page > 1,
+            'next_cursor': next_cursor
+        }
+    }
+
 def get_pagination_params(request):
     """Extrait les paramètres de pagination de la requête."""
     try:
@@ -66,3 +214,7 @@ def get_pagination_params(request):
         page_size = None
     
     return page, page_size
+
+def get_pagination_cursor(request):
+    """Extrait le curseur de pagination ('after') de la requête."""
+    return request.args.get('after') or None
@@ -0,0 +1,51 @@
+"""Utilitaires pour la sélection des champs retournés par les listes."""
+import re
+
+# Valeurs du paramètre 'fields' demandant les documents complets
+ALL_FIELDS = ('*', 'all')
+
+FIELD_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)*$')
+
+
+def build_projection(fields=None, summary_fields=(), computed_fields=None):
+    """
+    Construit la projection MongoDB d'une liste à partir du paramètre 'fields'.
+    
+    Args:
+        fields: Valeur brute du paramètre (ex: "details,status,testsCount"),
+                None pour la projection résumée, "*" ou "all" pour les documents complets
+        summary_fields: Champs retournés par défaut
+        computed_fields: Champs calculés {nom: expression d'agrégation}, inclus
+                         par défaut et sélectionnables par leur nom
+    
+    Returns:
+        dict: Projection à appliquer, None pour les documents complets
+    
+    Raises:
+        ValueError: Si un nom de champ est invalide
+    """
+    computed_fields = computed_fields or {}
+    
+    if fields is None or not fields.strip():
+        projection = {field: 1 for field in summary_fields}
+        projection.update(computed_fields)
+        return projection
+    
+    if fields.strip().lower() in ALL_FIELDS:
+        return None
+    
+    projection = {}
+    for name in fields.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if not FIELD_NAME_PATTERN.match(name):
+            raise ValueError(f"Nom de champ invalide: {name}")
+        projection[name] = computed_fields.get(name, 1)
+    
+    return projection
+
+
+def get_fields_param(request):
+    """Extrait le paramètre 'fields' de la requête (None si absent)."""
+    return request.args.get('fields')
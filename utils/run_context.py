@@ -0,0 +1,229 @@
+"""Portée d'exécution (test ou campagne) partageant des ressources entre actions."""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Portée des ressources partagées (configuration connections.scope) :
+#   test    : une portée par exécution de test (défaut)
+#   campain : ressources partagées par tous les tests d'une exécution de campagne
+SCOPE_TEST = 'test'
+SCOPE_CAMPAIN = 'campain'
+
+_current_scope = contextvars.ContextVar('testgyver_run_scope', default=None)
+
+
+class RunScope:
+    """
+    Cache de ressources (sessions HTTP, connexions SSH...) d'une exécution.
+
+    Les actions d'un même test (ou d'une même campagne) récupèrent une
+    ressource par son type et sa clé (ex: schéma + hôte) plutôt que d'ouvrir
+    une nouvelle connexion à chaque action. Toutes les ressources sont
+    fermées à la fin de la portée.
+
+    Une portée de test peut avoir pour parent la portée de la campagne : les
+    ressources sont alors créées et conservées dans la portée racine.
+    """
+
+    def __init__(self, name, parent=None, work_dir=None, live_log=None, files_dir=None):
+        """
+        Initialise la portée.
+
+        Args:
+            name: Nom de la portée (ex: 'test:<id>')
+            parent: Portée parente partageant ses ressources (None pour une portée racine)
+            work_dir: Répertoire de travail de la campagne (fichiers produits par les actions)
+            live_log: Fonction recevant une liste de lignes à afficher en direct (ou None)
+            files_dir: Répertoire des fichiers de la campagne (fichiers fournis aux actions)
+        """
+        self.name = name
+        self.parent = parent
+        self.work_dir = work_dir
+        self.live_log = live_log
+        self.files_dir = files_dir
+        self._resources = {}  # {(kind, key): {'value', 'close', 'created', 'last_used', 'uses'}}
+        self._creating = {}  # {(kind, key): verrou de création}
+        self._lock = threading.RLock()
+        self._closed = False
+
+    @property
+    def root(self):
+        """Portée racine (celle qui détient les ressources)."""
+        scope = self
+        while scope.parent is not None:
+            scope = scope.parent
+        return scope
+
+    def get_or_create(self, kind, key, factory, close=None):
+        """
+        Retourne la ressource (kind, key), créée par `factory` si absente.
+
+        Args:
+            kind: Type de ressource (ex: 'http.session')
+            key: Clé de la ressource (ex: ('https', 'api.example.com'))
+            factory: Fonction sans argument créant la ressource
+            close: Fonction appelée avec la ressource à la fermeture de la portée
+
+        Returns:
+            tuple: (ressource, nombre d'utilisations précédentes)
+        """
+        root = self.root
+        if root is not self:
+            return root.get_or_create(kind, key, factory, close)
+
+        resource_key = (kind, key)
+
+        with self._lock:
+            entry = self._use(resource_key)
+            if entry is not None:
+                return entry
+            creation_lock = self._creating.setdefault(resource_key, threading.Lock())
+
+        # Création hors du verrou global : une connexion lente vers un hôte ne
+        # bloque pas les autres tests de la campagne
+        with creation_lock:
+            with self._lock:
+                entry = self._use(resource_key)
+                if entry is not None:
+                    return entry
+
+            value = factory()
+            now = time.monotonic()
+
+            with self._lock:
+                self._creating.pop(resource_key, None)
+                if self._closed:
+                    self._close_entry(kind, key, {'value': value, 'close': close})
+                    raise RuntimeError(f"Portée d'exécution fermée: {self.name}")
+                self._resources[resource_key] = {
+                    'value': value,
+                    'close': close,
+                    'created': now,
+                    'last_used': now,
+                    'uses': 1
+                }
+            return value, 0
+
+    def _use(self, resource_key):
+        """Marque une ressource existante comme utilisée (appelé sous verrou)."""
+        if self._closed:
+            raise RuntimeError(f"Portée d'exécution fermée: {self.name}")
+
+        entry = self._resources.get(resource_key)
+        if entry is None:
+            return None
+
+        previous_uses = entry['uses']
+        entry['uses'] += 1
+        entry['last_used'] = time.monotonic()
+        return entry['value'], previous_uses
+
+    def discard(self, kind, key):
+        """
+        Ferme et retire une ressource (ex: connexion devenue inutilisable).
+
+        Args:
+            kind: Type de ressource
+            key: Clé de la ressource
+        """
+        root = self.root
+        if root is not self:
+            return root.discard(kind, key)
+
+        with self._lock:
+            entry = self._resources.pop((kind, key), None)
+        if entry:
+            self._close_entry(kind, key, entry)
+
+    def evict_idle(self, kind, max_idle, in_use=None):
+        """
+        Ferme les ressources d'un type inutilisées depuis plus de `max_idle` secondes.
+
+        Args:
+            kind: Type de ressource
+            max_idle: Durée d'inactivité maximale (secondes)
+            in_use: Fonction indiquant si une ressource est en cours d'utilisation (jamais fermée)
+
+        Returns:
+            int: Nombre de ressources fermées
+        """
+        root = self.root
+        if root is not self:
+            return root.evict_idle(kind, max_idle, in_use)
+
+        limit = time.monotonic() - max_idle
+        with self._lock:
+            expired = [
+                (resource_key, entry)
+                for resource_key, entry in self._resources.items()
+                if resource_key[0] == kind and entry['last_used'] < limit
+                and not (in_use and in_use(entry['value']))
+            ]
+            for resource_key, _ in expired:
+                del self._resources[resource_key]
+
+        for (resource_kind, key), entry in expired:
+            self._close_entry(resource_kind, key, entry)
+        return len(expired)
+
+    def close(self):
+        """Ferme toutes les ressources de la portée (dans l'ordre inverse de création)."""
+        if self.parent is not None:
+            # Les ressources appartiennent à la portée racine
+            return
+
+        with self._lock:
+            self._closed = True
+            entries = list(self._resources.items())
+            self._resources.clear()
+
+        for (kind, key), entry in reversed(entries):
+            self._close_entry(kind, key, entry)
+
+    @staticmethod
+    def _close_entry(kind, key, entry):
+        """Ferme une ressource sans propager d'erreur."""
+        if entry['close'] is None:
+            return
+        try:
+            entry['close'](entry['value'])
+        except Exception as e:
+            print(f"⚠ Fermeture de la ressource {kind} {key} impossible: {e}")
+
+
+def current_scope():
+    """
+    Retourne la portée d'exécution active dans le contexte courant.
+
+    Returns:
+        RunScope: Portée active ou None (action exécutée hors d'un test)
+    """
+    return _current_scope.get()
+
+
+@contextmanager
+def run_scope(name, parent=None, work_dir=None, live_log=None, files_dir=None):
+    """
+    Active une portée d'exécution le temps d'un bloc.
+
+    La portée est fermée en sortie de bloc (sauf si elle partage les
+    ressources de `parent`, fermé par son propriétaire).
+
+    Args:
+        name: Nom de la portée
+        parent: Portée parente (ressources partagées), ou None
+        work_dir: Répertoire de travail de la campagne
+        live_log: Fonction d'affichage en direct d'une liste de lignes
+        files_dir: Répertoire des fichiers de la campagne
+
+    Yields:
+        RunScope: Portée active
+    """
+    scope = RunScope(name, parent, work_dir, live_log, files_dir)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        scope.close()
@@ -0,0 +1,497 @@
+"""Connexions SSH partagées par les actions d'une exécution (plugins ssh et sftp)."""
+import codecs
+import hashlib
+import select
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import paramiko
+from utils.config import get_config
+from utils.run_context import current_scope
+
+SSH_RESOURCE = 'ssh.client'
+
+DEFAULT_CONNECT_TIMEOUT = 30  # secondes
+DEFAULT_IDLE_TIMEOUT = 300  # secondes
+DEFAULT_KEEPALIVE = 30  # secondes
+DEFAULT_MAX_SESSIONS = 8
+
+# Capture de la sortie des commandes (connections.ssh.output)
+DEFAULT_CHUNK_SIZE = 32 * 1024
+DEFAULT_HEAD_BYTES = 64 * 1024
+DEFAULT_TAIL_BYTES = 64 * 1024
+DEFAULT_LIVE_INTERVAL = 0.2  # secondes
+DEFAULT_LIVE_MAX_LINES = 1000
+MAX_LINE_LENGTH = 4096  # caractères, au-delà une ligne est découpée
+
+# Écriture de la sortie complète dans le répertoire de travail :
+#   truncated : seulement si la sortie dépasse head_bytes + tail_bytes (défaut)
+#   always    : toujours
+#   never     : jamais
+SPILL_TRUNCATED = 'truncated'
+SPILL_ALWAYS = 'always'
+SPILL_NEVER = 'never'
+
+
+def get_ssh_settings():
+    """Retourne la configuration des connexions SSH (connections.ssh)."""
+    return get_config().get('connections', {}).get('ssh', {})
+
+
+class SSHConnection:
+    """
+    Client SSH authentifié et nombre de canaux ouverts simultanément.
+
+    Le transport (échange de clés, authentification) est établi une seule
+    fois ; chaque commande ou session SFTP ouvre un nouveau canal. Le nombre
+    de canaux simultanés est borné par `max_sessions` (MaxSessions d'OpenSSH
+    vaut 10 par défaut).
+    """
+
+    def __init__(self, client, max_sessions=DEFAULT_MAX_SESSIONS):
+        """
+        Initialise la connexion.
+
+        Args:
+            client: paramiko.SSHClient connecté
+            max_sessions: Nombre maximum de canaux ouverts simultanément
+        """
+        self.client = client
+        self._sessions = threading.BoundedSemaphore(max_sessions)
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def is_alive(self):
+        """Indique si le transport SSH est toujours ouvert."""
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def in_use(self):
+        """Indique si un canal est en cours d'utilisation."""
+        return self.active > 0
+
+    def acquire(self):
+        """Réserve un canal."""
+        self._sessions.acquire()
+        with self._lock:
+            self.active += 1
+
+    def try_acquire(self, count):
+        """
+        Réserve sans attendre jusqu'à `count` canaux supplémentaires.
+
+        Une action qui détient déjà un canal ne doit pas attendre les autres :
+        plusieurs actions dans ce cas pourraient se bloquer mutuellement.
+
+        Args:
+            count: Nombre de canaux souhaités
+
+        Returns:
+            int: Nombre de canaux réservés (à libérer avec release)
+        """
+        acquired = 0
+        while acquired < count and self._sessions.acquire(blocking=False):
+            acquired += 1
+        with self._lock:
+            self.active += acquired
+        return acquired
+
+    def release(self, count=1):
+        """
+        Libère des canaux.
+
+        Args:
+            count: Nombre de canaux libérés
+        """
+        with self._lock:
+            self.active -= count
+        for _ in range(count):
+            self._sessions.release()
+
+    def close(self):
+        """Ferme le client SSH."""
+        self.client.close()
+
+
+def connect(host, port, username, password, settings=None):
+    """
+    Ouvre une connexion SSH authentifiée par mot de passe.
+
+    Args:
+        host: Hôte
+        port: Port
+        username: Nom d'utilisateur
+        password: Mot de passe
+        settings: Configuration connections.ssh (lue si None)
+
+    Returns:
+        SSHConnection: Connexion établie
+    """
+    settings = get_ssh_settings() if settings is None else settings
+
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(
+        hostname=host,
+        port=port,
+        username=username,
+        password=password,
+        timeout=settings.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT)
+    )
+
+    # Maintenir la connexion ouverte entre deux actions (pare-feu, NAT)
+    keepalive = int(settings.get('keepalive', DEFAULT_KEEPALIVE))
+    if keepalive > 0:
+        client.get_transport().set_keepalive(keepalive)
+
+    return SSHConnection(client, int(settings.get('max_sessions', DEFAULT_MAX_SESSIONS)))
+
+
+@contextmanager
+def ssh_connection(host, port, username, password):
+    """
+    Fournit une connexion SSH, réutilisée au sein de l'exécution en cours.
+
+    Dans une portée d'exécution (voir utils/run_context.py), la connexion est
+    identifiée par hôte, port, utilisateur et empreinte du mot de passe, puis
+    conservée jusqu'à la fin de la portée ou `connections.ssh.idle_timeout`
+    secondes d'inactivité. Une connexion en erreur est retirée du cache.
+    Hors portée, la connexion est fermée en sortie de bloc.
+
+    Un canal est réservé pour la durée du bloc ; les canaux supplémentaires
+    (transferts parallèles) se réservent avec SSHConnection.try_acquire.
+
+    Args:
+        host: Hôte
+        port: Port
+        username: Nom d'utilisateur
+        password: Mot de passe
+
+    Yields:
+        tuple: (SSHConnection, True si la connexion a été réutilisée)
+    """
+    settings = get_ssh_settings()
+    scope = current_scope()
+
+    if scope is None:
+        connection = connect(host, port, username, password, settings)
+        try:
+            yield connection, False
+        finally:
+            connection.close()
+        return
+
+    scope.evict_idle(SSH_RESOURCE, settings.get('idle_timeout', DEFAULT_IDLE_TIMEOUT), in_use=SSHConnection.in_use)
+
+    # Un mot de passe différent ne doit jamais réutiliser une session authentifiée
+    key = (host, port, username, hashlib.sha256((password or '').encode('utf-8')).hexdigest())
+    factory = lambda: connect(host, port, username, password, settings)  # noqa: E731
+
+    connection, previous_uses = scope.get_or_create(SSH_RESOURCE, key, factory, close=SSHConnection.close)
+    if previous_uses and not connection.is_alive():
+        # Connexion fermée par le serveur depuis la dernière action
+        scope.discard(SSH_RESOURCE, key)
+        connection, previous_uses = scope.get_or_create(SSH_RESOURCE, key, factory, close=SSHConnection.close)
+
+    connection.acquire()
+    try:
+        yield connection, previous_uses > 0
+    except (paramiko.SSHException, EOFError, OSError):
+        if not connection.is_alive():
+            scope.discard(SSH_RESOURCE, key)
+        raise
+    finally:
+        connection.release()
+
+
+class OutputCapture:
+    """
+    Capture bornée en mémoire d'un flux de sortie (stdout ou stderr).
+
+    Seuls les `head_bytes` premiers et `tail_bytes` derniers octets sont
+    conservés ; la sortie complète peut être écrite au fil de l'eau dans un
+    fichier. Les lignes reçues peuvent aussi être mises à disposition pour
+    un affichage en direct (`live_max_lines` lignes au plus).
+    """
+
+    def __init__(self, head_bytes=DEFAULT_HEAD_BYTES, tail_bytes=DEFAULT_TAIL_BYTES,
+                 spill_path=None, spill_mode=SPILL_TRUNCATED, live=False, live_max_lines=DEFAULT_LIVE_MAX_LINES):
+        """
+        Initialise la capture.
+
+        Args:
+            head_bytes: Nombre d'octets conservés en début de sortie
+            tail_bytes: Nombre d'octets conservés en fin de sortie
+            spill_path: Fichier recevant la sortie complète (None pour désactiver)
+            spill_mode: SPILL_TRUNCATED, SPILL_ALWAYS ou SPILL_NEVER
+            live: Découper la sortie en lignes pour l'affichage en direct
+            live_max_lines: Nombre maximal de lignes affichées en direct
+        """
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_path = spill_path if spill_mode != SPILL_NEVER else None
+        self.spill_mode = spill_mode
+        self.live = live
+        self.live_max_lines = live_max_lines
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+        self.spilled = False
+        self._spill_file = None
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._partial = ''
+        self._live_count = 0
+        self._pending = []
+
+    @property
+    def truncated(self):
+        """Indique si une partie de la sortie n'est pas conservée en mémoire."""
+        return self.total > self.head_bytes + self.tail_bytes
+
+    def feed(self, data):
+        """
+        Ajoute un bloc de données reçu.
+
+        Args:
+            data: Octets reçus
+        """
+        if not data:
+            return
+
+        self.total += len(data)
+        self._spill(data)
+
+        if self.live:
+            self._split_lines(self._decoder.decode(data))
+
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data and self.tail_bytes > 0:
+            self.tail += data
+            if len(self.tail) > self.tail_bytes:
+                del self.tail[:len(self.tail) - self.tail_bytes]
+
+    def _spill(self, data):
+        """Écrit le bloc dans le fichier de sortie complète (ouvert au besoin)."""
+        if self.spill_path is None:
+            return
+
+        if self._spill_file is None:
+            if self.spill_mode != SPILL_ALWAYS and not self.truncated:
+                return
+            Path(self.spill_path).parent.mkdir(parents=True, exist_ok=True)
+            self._spill_file = open(self.spill_path, 'wb')
+            self.spilled = True
+            # Tant que la sortie n'est pas tronquée, tête + fin contiennent tout ce qui précède
+            self._spill_file.write(bytes(self.head))
+            self._spill_file.write(bytes(self.tail))
+
+        self._spill_file.write(data)
+
+    def _split_lines(self, text):
+        """Découpe le texte reçu en lignes complètes pour l'affichage en direct."""
+        if self._live_count > self.live_max_lines:
+            return
+
+        self._partial += text
+        lines = self._partial.split('\n')
+        self._partial = lines.pop()
+        while len(self._partial) > MAX_LINE_LENGTH:
+            lines.append(self._partial[:MAX_LINE_LENGTH])
+            self._partial = self._partial[MAX_LINE_LENGTH:]
+        self._queue_lines(lines)
+
+    def _queue_lines(self, lines):
+        """Ajoute des lignes à afficher en respectant la limite `live_max_lines`."""
+        for line in lines:
+            if self._live_count >= self.live_max_lines:
+                # Un seul message de limite, puis plus aucune ligne
+                self._pending.append(f"[... affichage en direct limité à {self.live_max_lines} lignes ...]")
+                self._live_count += 1
+                self._partial = ''
+                return
+            self._pending.append(line.rstrip('\r'))
+            self._live_count += 1
+
+    def pop_lines(self):
+        """
+        Retourne et retire les lignes en attente d'affichage.
+
+        Returns:
+            list: Lignes complètes reçues depuis le dernier appel
+        """
+        lines, self._pending = self._pending, []
+        return lines
+
+    def finish(self):
+        """Termine la capture (dernière ligne incomplète, fermeture du fichier)."""
+        if self.live and self._live_count <= self.live_max_lines:
+            rest = self._partial + self._decoder.decode(b'', final=True)
+            self._partial = ''
+            if rest:
+                self._queue_lines([rest])
+
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def text(self):
+        """
+        Retourne la sortie conservée en mémoire.
+
+        Returns:
+            str: Sortie complète, ou début et fin séparés par le nombre d'octets omis
+        """
+        if not self.truncated:
+            return (bytes(self.head) + bytes(self.tail)).decode('utf-8', errors='replace')
+
+        omitted = self.total - len(self.head) - len(self.tail)
+        return (
+            bytes(self.head).decode('utf-8', errors='replace')
+            + f"\n[... {omitted} octets omis ...]\n"
+            + bytes(self.tail).decode('utf-8', errors='replace')
+        )
+
+
+def get_sftp_settings():
+    """Retourne la configuration des transferts SFTP (connections.sftp)."""
+    return get_config().get('connections', {}).get('sftp', {})
+
+
+def open_sftp(client, settings=None):
+    """
+    Ouvre une session SFTP (nouveau canal) sur le transport d'un client SSH.
+
+    La fenêtre et la taille maximale des paquets du canal sont lues dans
+    `connections.sftp` : une fenêtre plus grande améliore le débit sur les
+    liaisons à forte latence.
+
+    Args:
+        client: paramiko.SSHClient connecté
+        settings: Configuration connections.sftp (lue si None)
+
+    Returns:
+        paramiko.SFTPClient: Session SFTP
+    """
+    settings = get_sftp_settings() if settings is None else settings
+    return paramiko.SFTPClient.from_transport(
+        client.get_transport(),
+        window_size=settings.get('window_size'),
+        max_packet_size=settings.get('max_packet_size')
+    )
+
+
+def get_output_settings():
+    """Retourne la configuration de capture de la sortie des commandes (connections.ssh.output)."""
+    return get_ssh_settings().get('output', {})
+
+
+def run_command(client, command, spill_dir=None, on_lines=None, settings=None):
+    """
+    Exécute une commande et lit stdout et stderr au fil de l'eau.
+
+    Les deux flux sont lus par blocs dès que des données sont disponibles :
+    une commande produisant beaucoup de sortie d'erreur ne se bloque pas
+    pendant la lecture de la sortie standard, et la mémoire utilisée est
+    bornée par `head_bytes` + `tail_bytes` par flux.
+
+    Args:
+        client: paramiko.SSHClient connecté
+        command: Commande à exécuter
+        spill_dir: Répertoire recevant la sortie complète (None pour désactiver)
+        on_lines: Fonction appelée avec (flux, lignes) pour l'affichage en direct
+        settings: Configuration connections.ssh.output (lue si None)
+
+    Returns:
+        dict: exit_code, stdout et stderr (OutputCapture), duration (secondes)
+    """
+    settings = get_output_settings() if settings is None else settings
+
+    chunk_size = int(settings.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    live_interval = float(settings.get('live_interval', DEFAULT_LIVE_INTERVAL))
+    spill_mode = settings.get('spill', SPILL_TRUNCATED)
+    live = on_lines is not None and settings.get('live', True)
+
+    spill_prefix = None
+    if spill_dir and spill_mode != SPILL_NEVER:
+        spill_prefix = Path(spill_dir) / 'ssh' / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    captures = {}
+    for stream in ('stdout', 'stderr'):
+        captures[stream] = OutputCapture(
+            head_bytes=int(settings.get('head_bytes', DEFAULT_HEAD_BYTES)),
+            tail_bytes=int(settings.get('tail_bytes', DEFAULT_TAIL_BYTES)),
+            spill_path=f"{spill_prefix}.{stream}.log" if spill_prefix else None,
+            spill_mode=spill_mode,
+            live=live,
+            live_max_lines=int(settings.get('live_max_lines', DEFAULT_LIVE_MAX_LINES))
+        )
+
+    def publish():
+        """Transmet les lignes en attente à l'affichage en direct."""
+        for stream, capture in captures.items():
+            lines = capture.pop_lines()
+            if lines:
+                on_lines(stream, lines)
+
+    started = time.monotonic()
+    channel = client.get_transport().open_session()
+    try:
+        channel.exec_command(command)
+        last_publish = started
+
+        def receive():
+            """Lit les données disponibles sur stdout et stderr."""
+            received = False
+            if channel.recv_ready():
+                captures['stdout'].feed(channel.recv(chunk_size))
+                received = True
+            if channel.recv_stderr_ready():
+                captures['stderr'].feed(channel.recv_stderr(chunk_size))
+                received = True
+            return received
+
+        while True:
+            if not receive():
+                # Fin de la commande : flux fermé par le serveur. Les derniers
+                # blocs ont pu arriver avec l'EOF depuis la lecture précédente :
+                # les tampons sont vidés avant de sortir
+                if channel.exit_status_ready() and (channel.eof_received or channel.closed):
+                    while receive():
+                        pass
+                    break
+                _wait_readable(channel, live_interval)
+
+            if live and time.monotonic() - last_publish >= live_interval:
+                publish()
+                last_publish = time.monotonic()
+
+        exit_code = channel.recv_exit_status()
+    finally:
+        channel.close()
+        for capture in captures.values():
+            capture.finish()
+
+    if live:
+        publish()
+
+    return {
+        'exit_code': exit_code,
+        'stdout': captures['stdout'],
+        'stderr': captures['stderr'],
+        'duration': time.monotonic() - started
+    }
+
+
+def _wait_readable(channel, timeout):
+    """Attend des données sur le canal (stdout ou stderr) au plus `timeout` secondes."""
+    try:
+        select.select([channel], [], [], timeout)
+    except (OSError, ValueError):
+        # Canal sans descripteur sélectionnable : attente courte
+        time.sleep(min(timeout, 0.05))
@@ -0,0 +1,273 @@
+"""Moteur de substitution des variables {{...}} dans les valeurs des actions."""
+import re
+import threading
+from collections import OrderedDict
+
+# Une seule expression pour les trois syntaxes :
+#   {{app.nom}}  -> variable de test (sortie d'une action précédente)
+#   {{test.nom}} -> variable de collection (test_id, campain_id, files_dir...)
+#   {{nom}}      -> variable TestGyver de la filière
+VARIABLE_PATTERN = re.compile(r'\{\{(?:app\.([^}]+)|test\.([^}]+)|([^.}]+))\}\}')
+
+# Expressions historiques, utilisées pour résoudre les variables contenues
+# dans la valeur d'une autre variable (ex: une variable TestGyver valant "{{test.work_dir}}/in")
+APP_PATTERN = re.compile(r'\{\{app\.([^}]+)\}\}')
+TEST_PATTERN = re.compile(r'\{\{test\.([^}]+)\}\}')
+
+KIND_VARIABLE = 0
+KIND_APP = 1
+KIND_TEST = 2
+
+_MISSING = object()
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+def _resolve_app(text, variables_dict, test_variables):
+    """Remplace les variables {{app.x}} puis {{test.x}} d'un texte."""
+    if '{{app.' in text:
+        text = APP_PATTERN.sub(lambda m: str(test_variables.get(f"app.{m.group(1)}", m.group(0))), text)
+    return _resolve_test(text, variables_dict)
+
+
+def _resolve_test(text, variables_dict):
+    """Remplace les variables {{test.x}} d'un texte."""
+    if '{{test.' in text:
+        text = TEST_PATTERN.sub(lambda m: str(variables_dict.get(f"test.{m.group(1)}", m.group(0))), text)
+    return text
+
+
+class StringTemplate:
+    """Chaîne compilée : segments littéraux et emplacements de variables."""
+
+    __slots__ = ('parts',)
+
+    def __init__(self, text):
+        """
+        Découpe la chaîne une fois pour toutes.
+
+        Args:
+            text: Chaîne contenant des variables {{...}}
+        """
+        parts = []
+        position = 0
+        for match in VARIABLE_PATTERN.finditer(text):
+            if match.start() > position:
+                parts.append(text[position:match.start()])
+            app_name, test_name, name = match.groups()
+            if app_name is not None:
+                parts.append((KIND_APP, f"app.{app_name}", match.group(0)))
+            elif test_name is not None:
+                parts.append((KIND_TEST, f"test.{test_name}", match.group(0)))
+            else:
+                parts.append((KIND_VARIABLE, name, match.group(0)))
+            position = match.end()
+        if position < len(text):
+            parts.append(text[position:])
+        self.parts = tuple(parts)
+
+    def render(self, variables_dict, test_variables):
+        """Produit la chaîne finale en une seule passe."""
+        output = []
+        for part in self.parts:
+            if part.__class__ is str:
+                output.append(part)
+                continue
+
+            kind, key, raw = part
+            value = (test_variables if kind == KIND_APP else variables_dict).get(key, _MISSING)
+            if value is _MISSING:
+                output.append(raw)
+                continue
+
+            text = str(value)
+            # Comme avec les substitutions successives historiques, une valeur
+            # peut elle-même contenir des variables {{app.x}} / {{test.x}}
+            if '{{' in text:
+                if kind == KIND_VARIABLE:
+                    text = _resolve_app(text, variables_dict, test_variables)
+                elif kind == KIND_APP:
+                    text = _resolve_test(text, variables_dict)
+            output.append(text)
+        return ''.join(output)
+
+
+class DictTemplate:
+    """Dictionnaire compilé (un plan par valeur)."""
+
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        """Mémorise les couples (clé, plan)."""
+        self.items = items
+
+    def render(self, variables_dict, test_variables):
+        """Produit un nouveau dictionnaire."""
+        return {key: plan.render(variables_dict, test_variables) for key, plan in self.items}
+
+
+class ListTemplate:
+    """Liste compilée (un plan par élément)."""
+
+    __slots__ = ('plans',)
+
+    def __init__(self, plans):
+        """Mémorise les plans des éléments."""
+        self.plans = plans
+
+    def render(self, variables_dict, test_variables):
+        """Produit une nouvelle liste."""
+        return [plan.render(variables_dict, test_variables) for plan in self.plans]
+
+
+class Constant:
+    """Valeur scalaire sans variable, retournée telle quelle."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        """Mémorise la valeur."""
+        self.value = value
+
+    def render(self, variables_dict, test_variables):
+        """Retourne la valeur d'origine."""
+        return self.value
+
+
+def compile_value(value):
+    """
+    Compile une valeur d'action (str, dict, list) en plan de substitution.
+
+    Args:
+        value: Valeur à compiler
+
+    Returns:
+        Plan exposant render(variables_dict, test_variables)
+    """
+    if isinstance(value, str):
+        if '{{' not in value:
+            return Constant(value)
+        template = StringTemplate(value)
+        if all(part.__class__ is str for part in template.parts):
+            return Constant(value)
+        return template
+
+    if isinstance(value, dict):
+        return DictTemplate(tuple((key, compile_value(item)) for key, item in value.items()))
+
+    if isinstance(value, list):
+        return ListTemplate(tuple(compile_value(item) for item in value))
+
+    return Constant(value)
+
+
+class TemplateEngine:
+    """
+    Moteur de substitution avec cache LRU des plans compilés.
+
+    Un plan est identifié par une clé fournie par l'appelant, typiquement
+    (test_id, révision du test, index de l'action) : la valeur d'une action
+    n'est analysée qu'une fois tant que le test n'est pas modifié.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        """
+        Initialise le moteur.
+
+        Args:
+            max_size: Nombre maximum de plans conservés en cache
+        """
+        self.max_size = max_size
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_plan(self, value, cache_key=None):
+        """
+        Retourne le plan compilé d'une valeur.
+
+        Args:
+            value: Valeur de l'action
+            cache_key: Clé de cache (None pour compiler sans mise en cache)
+
+        Returns:
+            Plan de substitution
+        """
+        if cache_key is None:
+            return compile_value(value)
+
+        with self._lock:
+            plan = self._plans.get(cache_key)
+            if plan is not None:
+                self._plans.move_to_end(cache_key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        plan = compile_value(value)
+
+        with self._lock:
+            self._plans[cache_key] = plan
+            self._plans.move_to_end(cache_key)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+
+        return plan
+
+    def render(self, value, variables_dict, test_variables, cache_key=None):
+        """
+        Remplace les variables d'une valeur d'action.
+
+        Args:
+            value: Valeur à traiter (str, dict, list)
+            variables_dict: Variables TestGyver et de collection (test.*)
+            test_variables: Variables du test (app.*)
+            cache_key: Clé de cache du plan compilé
+
+        Returns:
+            Valeur avec les variables remplacées (nouveaux dict/list)
+        """
+        return self.get_plan(value, cache_key).render(variables_dict, test_variables)
+
+    def clear(self):
+        """Vide le cache des plans compilés."""
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        """
+        Retourne les statistiques du cache.
+
+        Returns:
+            dict: Taille, capacité, succès et échecs du cache
+        """
+        with self._lock:
+            return {
+                'size': len(self._plans),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Moteur partagé par les exécuteurs de tests et de campagnes
+template_engine = TemplateEngine()
+
+
+def resolve_variables(value, variables_dict, test_variables, cache_key=None):
+    """
+    Remplace les variables {{...}}, {{app.x}} et {{test.x}} d'une valeur d'action.
+
+    Args:
+        value: Valeur à traiter (str, dict, list)
+        variables_dict: Variables TestGyver et de collection (test.*)
+        test_variables: Variables du test (app.*)
+        cache_key: Clé de cache du plan compilé (ex: (test_id, revision, action_index))
+
+    Returns:
+        Valeur avec les variables remplacées
+    """
+    return template_engine.render(value, variables_dict, test_variables, cache_key)
@@ -3,45 +3,95 @@ import time
 from datetime import datetime
 from pathlib import Path
 from bson import ObjectId
+from models.job import Job
 from models.test import Test
 from models.campain import Campain
 from models.variable import Variable
-from plugins.plugin_manager import PluginManager
-from plugins.actions.action_base import ActionBase
+from plugins.actions import action_manager
+from utils.db import load_config
+from utils.log_channel import LogChannel
+from utils.run_context import run_scope
+from utils.template_engine import resolve_variables
 from utils.workdir import get_campain_workdir
 import traceback
-import re
 
 class TestExecutor:
     """Classe pour exécuter un test individuel."""
     
-    def __init__(self, socketio):
-        """Initialise l'exécuteur de test."""
+    def __init__(self, socketio, events=None):
+        """
+        Initialise l'exécuteur de test.
+        
+        Args:
+            socketio: Instance Flask-SocketIO (tâches d'arrière-plan)
+            events: Émetteur des événements (voir utils.event_bus), socketio par défaut
+        """
         self.socketio = socketio
-        self.plugin_manager = PluginManager('actions', ActionBase)
-        # Charger les plugins d'actions
-        self.plugin_manager.discover_plugins()
+        self.events = events if events is not None else socketio
+        # Registre des plugins d'actions partagé par tout le processus
+        self.plugin_manager = action_manager
+        # Worker local à réveiller lors d'un ajout dans la file (voir JobWorker)
+        self.job_worker = None
+        # Logs émis par lots (événement 'test_log_batch') plutôt que ligne par ligne
+        logs_config = load_config().get('logs', {})
+        self.log_channel = LogChannel(
+            self.events,
+            event='test_log_batch',
+            key_field='test_id',
+            flush_interval=logs_config.get('live_flush_interval_ms', 100) / 1000,
+            max_lines=logs_config.get('live_batch_max_lines', 500)
+        )
     
     def execute_test(self, test_id, filiere):
         """
         Exécute un test individuel en arrière-plan.
         
+        Si `execution.worker.queue_tests` est activé, le test est placé dans
+        la file d'attente des jobs et exécuté par un worker (voir worker.py).
+        
         Args:
             test_id: ID du test à exécuter
             filiere: Filière/environnement sélectionné
         """
+        if load_config().get('execution', {}).get('worker', {}).get('queue_tests', False):
+            # Un test seul n'est pas rejoué après une interruption
+            Job.enqueue('test', None, {'testId': str(test_id), 'filiere': filiere}, max_attempts=1)
+            if self.job_worker:
+                self.job_worker.notify()
+            return
+        
         # Lancer l'exécution dans une tâche d'arrière-plan SocketIO
         # Cela garantit que les événements sont émis dans le bon contexte
         self.socketio.start_background_task(self._run_test, test_id, filiere)
     
+    def run_job(self, job, cancel_event=None):
+        """
+        Exécute un job de test pris en charge par un worker.
+        
+        Args:
+            job: Job (voir models.job.Job.claim)
+            cancel_event: Signal d'interruption (non utilisé : le test va à son terme)
+        
+        Returns:
+            bool: True (le test est toujours terminé)
+        """
+        payload = job['payload']
+        self._run_test(payload['testId'], payload['filiere'])
+        return True
+    
     def _run_test(self, test_id, filiere):
+        """Exécute le test dans sa propre portée (connexions partagées par ses actions)."""
+        with run_scope(f'test:{test_id}', live_log=lambda lines: self._live_log(test_id, lines)) as scope:
+            self._run_test_actions(test_id, filiere, scope)
+    
+    def _run_test_actions(self, test_id, filiere, scope):
         """Exécute le test."""
         try:
             # Attendre un court instant pour que le client rejoigne la room WebSocket
             time.sleep(0.5)
             
             # Émettre l'événement de démarrage
-            self.socketio.emit('test_started', {
+            self.events.emit('test_started', {
                 'test_id': test_id,
                 'status': 'running'
             }, room=f'test_{test_id}')
@@ -51,12 +101,11 @@ class TestExecutor:
             # Récupérer le test
             test = Test.find_by_id(test_id)
             if not test:
-                self.socketio.emit('test_log', {
-                    'test_id': test_id,
-                    'log': f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Test introuvable"
-                }, room=f'test_{test_id}')
+                self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Test introuvable")
+                
+                self.log_channel.flush(f'test_{test_id}')
                 
-                self.socketio.emit('test_completed', {
+                self.events.emit('test_completed', {
                     'test_id': test_id,
                     'status': 'failed'
                 }, room=f'test_{test_id}')
@@ -66,12 +115,11 @@ class TestExecutor:
             campain_id = str(test.get('campainId'))
             campain = Campain.find_by_id(campain_id)
             if not campain:
-                self.socketio.emit('test_log', {
-                    'test_id': test_id,
-                    'log': f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Campagne introuvable"
-                }, room=f'test_{test_id}')
+                self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Campagne introuvable")
+                
+                self.log_channel.flush(f'test_{test_id}')
                 
-                self.socketio.emit('test_completed', {
+                self.events.emit('test_completed', {
                     'test_id': test_id,
                     'status': 'failed'
                 }, room=f'test_{test_id}')
@@ -90,6 +138,8 @@ class TestExecutor:
             variables_dict['test.campain_id'] = campain_id
             variables_dict['test.files_dir'] = files_dir
             variables_dict['test.work_dir'] = work_dir
+            scope.work_dir = work_dir
+            scope.files_dir = files_dir
             
             # Variables de sortie du test
             test_variables = {}
@@ -98,19 +148,13 @@ class TestExecutor:
                     test_variables['app.' + var_name] = None
             
             # Émettre le log de démarrage
-            self.socketio.emit('test_log', {
-                'test_id': test_id,
-                'log': f"[{datetime.now().strftime('%H:%M:%S')}] 🚀 Démarrage du test"
-            }, room=f'test_{test_id}')
+            self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] 🚀 Démarrage du test")
             
-            print(f"[TestExecutor] Émission de test_log (Démarrage) pour test {test_id}")
+            print(f"[TestExecutor] Log (Démarrage) mis en file pour test {test_id}")
             
-            self.socketio.emit('test_log', {
-                'test_id': test_id,
-                'log': f"[{datetime.now().strftime('%H:%M:%S')}] 📂 Environnement: {filiere}"
-            }, room=f'test_{test_id}')
+            self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] 📂 Environnement: {filiere}")
             
-            print(f"[TestExecutor] Émission de test_log (Environnement) pour test {test_id}")
+            print(f"[TestExecutor] Log (Environnement) mis en file pour test {test_id}")
             
             # Exécuter chaque action
             actions = test.get('actions', [])
@@ -120,46 +164,35 @@ class TestExecutor:
                 action_type = action_data.get('type')
                 action_value = action_data.get('value', {})
                 
-                self.socketio.emit('test_log', {
-                    'test_id': test_id,
-                    'log': "--------------------------------"
-                }, room=f'test_{test_id}')
+                self._log(test_id, "--------------------------------")
                 
-                self.socketio.emit('test_log', {
-                    'test_id': test_id,
-                    'log': f"[{datetime.now().strftime('%H:%M:%S')}] 🔧 Exécution de l'action {action_index + 1}/{len(actions)}: {action_type}"
-                }, room=f'test_{test_id}')
+                self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] 🔧 Exécution de l'action {action_index + 1}/{len(actions)}: {action_type}")
                 
                 # Remplacer les variables dans les valeurs de l'action
-                resolved_value = self._resolve_variables(action_value, variables_dict, test_variables)
+                resolved_value = self._resolve_variables(
+                    action_value, variables_dict, test_variables,
+                    cache_key=(str(test_id), test.get('revision', 0), action_index)
+                )
                 
                 # Charger le plugin d'action
                 action_plugin = self.plugin_manager.get_plugin(action_type)
                 if not action_plugin:
-                    self.socketio.emit('test_log', {
-                        'test_id': test_id,
-                        'log': f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Plugin d'action '{action_type}' non trouvé"
-                    }, room=f'test_{test_id}')
+                    self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Plugin d'action '{action_type}' non trouvé")
                     status = 'failed'
                     break
                 
-                # Exécuter l'action
+                # Exécuter l'action (les logs en attente sont envoyés avant l'exécution)
                 try:
+                    self.log_channel.flush(f'test_{test_id}')
                     result = action_plugin.execute(resolved_value)
                     
                     if result.get('result'):
-                        self.socketio.emit('test_log', {
-                            'test_id': test_id,
-                            'log': f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Action réussie"
-                        }, room=f'test_{test_id}')
+                        self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Action réussie")
                         
                         # Ajouter les traces de l'action si présentes
                         if result.get('traces'):
                             for trace in result['traces']:
-                                self.socketio.emit('test_log', {
-                                    'test_id': test_id,
-                                    'log': f"[{datetime.now().strftime('%H:%M:%S')}] 📋 {trace}"
-                                }, room=f'test_{test_id}')
+                                self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] 📋 {trace}")
 
                         # Récupérer les variables de sortie si output_mapping est défini
                         output_mapping = action_value.get('output_mapping', {})
@@ -172,54 +205,34 @@ class TestExecutor:
                                     # Stocker la variable de sortie avec le préfixe app.
                                     full_var_name = f"app.{test_var_name}"
                                     test_variables[full_var_name] = output_values[plugin_var_name]
-                                    self.socketio.emit('test_log', {
-                                        'test_id': test_id,
-                                        'log': f"[{datetime.now().strftime('%H:%M:%S')}] 📝 Variable '{test_var_name}' = {output_values[plugin_var_name]}"
-                                    }, room=f'test_{test_id}')
+                                    self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] 📝 Variable '{test_var_name}' = {output_values[plugin_var_name]}")
                     else:
-                        self.socketio.emit('test_log', {
-                            'test_id': test_id,
-                            'log': f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Action échouée: {result.get('message', 'Erreur inconnue')}"
-                        }, room=f'test_{test_id}')
+                        self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Action échouée: {result.get('message', 'Erreur inconnue')}")
                         
                         # Ajouter les traces même en cas d'échec
                         if result.get('traces'):
                             for trace in result['traces']:
-                                self.socketio.emit('test_log', {
-                                    'test_id': test_id,
-                                    'log': f"[{datetime.now().strftime('%H:%M:%S')}] 📋 {trace}"
-                                }, room=f'test_{test_id}')
+                                self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] 📋 {trace}")
                         status = 'failed'
                         break
                 
                 except Exception as e:
                     error_trace = traceback.format_exc()
-                    self.socketio.emit('test_log', {
-                        'test_id': test_id,
-                        'log': f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Erreur lors de l'exécution: {str(e)}"
-                    }, room=f'test_{test_id}')
+                    self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Erreur lors de l'exécution: {str(e)}")
                     
-                    self.socketio.emit('test_log', {
-                        'test_id': test_id,
-                        'log': f"[{datetime.now().strftime('%H:%M:%S')}] 📋 Trace:\n{error_trace}"
-                    }, room=f'test_{test_id}')
+                    self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] 📋 Trace:\n{error_trace}")
                     status = 'failed'
                     break
             
             # Émettre le log de fin
             if status == 'passed':
-                self.socketio.emit('test_log', {
-                    'test_id': test_id,
-                    'log': f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Test terminé avec succès"
-                }, room=f'test_{test_id}')
+                self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] ✅ Test terminé avec succès")
             else:
-                self.socketio.emit('test_log', {
-                    'test_id': test_id,
-                    'log': f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Test échoué"
-                }, room=f'test_{test_id}')
+                self._log(test_id, f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Test échoué")
             
             # Émettre l'événement de fin
-            self.socketio.emit('test_completed', {
+            self.log_channel.flush(f'test_{test_id}')
+            self.events.emit('test_completed', {
                 'test_id': test_id,
                 'status': status
             }, room=f'test_{test_id}')
@@ -228,17 +241,39 @@ class TestExecutor:
             # En cas d'erreur
             error_msg = f"[{datetime.now().strftime('%H:%M:%S')}] ❌ Erreur critique: {str(e)}\n{traceback.format_exc()}"
             
-            self.socketio.emit('test_log', {
-                'test_id': test_id,
-                'log': error_msg
-            }, room=f'test_{test_id}')
+            self._log(test_id, error_msg)
+            
+            self.log_channel.flush(f'test_{test_id}')
             
-            self.socketio.emit('test_completed', {
+            self.events.emit('test_completed', {
                 'test_id': test_id,
                 'status': 'failed'
             }, room=f'test_{test_id}')
     
-    def _resolve_variables(self, value, variables_dict, test_variables):
+    def _log(self, test_id, line):
+        """
+        Ajoute une ligne aux logs en direct d'un test.
+        
+        Args:
+            test_id: ID du test
+            line: Ligne de log
+        """
+        self.log_channel.write(f'test_{test_id}', test_id, line)
+    
+    def _live_log(self, test_id, lines):
+        """
+        Affiche immédiatement des lignes produites par une action en cours (ex: sortie SSH).
+        
+        Args:
+            test_id: ID du test
+            lines: Lignes à afficher
+        """
+        timestamp = datetime.now().strftime('%H:%M:%S')
+        for line in lines:
+            self._log(test_id, f"[{timestamp}] 📟 {line}")
+        self.log_channel.flush(f'test_{test_id}')
+    
+    def _resolve_variables(self, value, variables_dict, test_variables, cache_key=None):
         """
         Remplace les variables dans une valeur.
         
@@ -246,39 +281,9 @@ class TestExecutor:
             value: Valeur à traiter (peut être string, dict, list)
             variables_dict: Dictionnaire des variables TestGyver et collection
             test_variables: Dictionnaire des variables du test
+            cache_key: Clé du plan compilé en cache (test_id, révision, index de l'action)
         
         Returns:
             Valeur avec les variables remplacées
         """
-        if isinstance(value, str):
-            # Remplacer les variables TestGyver {{variable_name}}
-            def replace_testgyver(match):
-                var_name = match.group(1)
-                return str(variables_dict.get(var_name, match.group(0)))
-            
-            # Remplacer les variables de test {{app.variable_name}}
-            def replace_test(match):
-                var_name = match.group(1)
-                full_key = f"app.{var_name}"
-                return str(test_variables.get(full_key, match.group(0)))
-            
-            # Remplacer les variables de collection {{test.variable_name}}
-            def replace_collection(match):
-                var_name = match.group(1)
-                full_key = f"test.{var_name}"
-                return str(variables_dict.get(full_key, match.group(0)))
-            
-            value = re.sub(r'\{\{([^.}]+)\}\}', replace_testgyver, value)
-            value = re.sub(r'\{\{app\.([^}]+)\}\}', replace_test, value)
-            value = re.sub(r'\{\{test\.([^}]+)\}\}', replace_collection, value)
-            
-            return value
-        
-        elif isinstance(value, dict):
-            return {k: self._resolve_variables(v, variables_dict, test_variables) for k, v in value.items()}
-        
-        elif isinstance(value, list):
-            return [self._resolve_variables(v, variables_dict, test_variables) for v in value]
-        
-        else:
-            return value
+        return resolve_variables(value, variables_dict, test_variables, cache_key)
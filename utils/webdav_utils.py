@@ -1,14 +1,65 @@
 """Utilitaire WebDAV pour gérer les opérations WebDAV avec requêtes HTTP directes."""
+import hashlib
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 import xml.etree.ElementTree as ET
-from urllib.parse import urljoin, quote, unquote
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlparse, quote, unquote
+from utils.config import get_config
+from utils.run_context import current_scope
+
+WEBDAV_RESOURCE = 'webdav.session'
+
+DEFAULT_PARALLEL_REQUESTS = 8
+DEFAULT_POOL_SIZE = 10
+DEFAULT_IDLE_TIMEOUT = 300  # secondes
+
+# Propriétés demandées par PROPFIND (type, taille, etag, date de modification)
+PROPFIND_BODY = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<D:propfind xmlns:D="DAV:"><D:prop>'
+    '<D:resourcetype/><D:getcontentlength/><D:getetag/><D:getlastmodified/>'
+    '</D:prop></D:propfind>'
+).encode('utf-8')
+
+
+def get_webdav_settings():
+    """Retourne la configuration des clients WebDAV (connections.webdav)."""
+    return get_config().get('connections', {}).get('webdav', {})
+
+
+def create_session(parallel_requests=DEFAULT_PARALLEL_REQUESTS, settings=None):
+    """
+    Crée une session HTTP keep-alive pour un serveur WebDAV.
+    
+    Le pool conserve au moins une connexion par requête simultanée
+    (uploads et suppressions en parallèle).
+    
+    Args:
+        parallel_requests: Nombre de requêtes simultanées du client
+        settings: Configuration connections.webdav (lue si None)
+    
+    Returns:
+        requests.Session: Session configurée
+    """
+    settings = get_webdav_settings() if settings is None else settings
+    adapter = HTTPAdapter(
+        pool_connections=int(settings.get('pool_connections', DEFAULT_POOL_SIZE)),
+        pool_maxsize=max(int(settings.get('pool_maxsize', DEFAULT_POOL_SIZE)), parallel_requests)
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
 
 
 class WebDAVClient:
     """Client WebDAV utilisant directement les requêtes HTTP."""
     
-    def __init__(self, base_url, username=None, password=None):
+    def __init__(self, base_url, username=None, password=None, parallel_requests=None, session=None):
         """
         Initialise le client WebDAV.
         
@@ -16,13 +67,22 @@ class WebDAVClient:
             base_url: URL de base du serveur WebDAV
             username: Nom d'utilisateur (optionnel)
             password: Mot de passe (optionnel)
+            parallel_requests: Nombre de requêtes simultanées des opérations sur une arborescence
+            session: Session HTTP partagée (voir webdav_client), créée si None
         """
         self.base_url = base_url.rstrip('/')
         self.auth = HTTPBasicAuth(username, password) if username and password else None
-        self.session = requests.Session()
+        if parallel_requests is None:
+            parallel_requests = get_webdav_settings().get('parallel_requests', DEFAULT_PARALLEL_REQUESTS)
+        self.parallel_requests = max(1, int(parallel_requests))
+        self.session = session if session is not None else create_session(self.parallel_requests)
         if self.auth:
             self.session.auth = self.auth
     
+    def close(self):
+        """Ferme les connexions de la session HTTP du client."""
+        self.session.close()
+    
     def _get_full_url(self, path):
         """
         Construit l'URL complète à partir du chemin.
@@ -39,7 +99,6 @@ class WebDAVClient:
         # Si le path commence par /, l'utiliser tel quel
         if path.startswith('/'):
             # Extraire juste le domaine de base_url
-            from urllib.parse import urlparse
             parsed = urlparse(self.base_url)
             base = f"{parsed.scheme}://{parsed.netloc}"
             return base + path
@@ -96,6 +155,69 @@ class WebDAVClient:
         except Exception:
             return False
     
+    def _propfind(self, path, depth):
+        """
+        Envoie une requête PROPFIND (type, taille, etag et date de modification).
+        
+        Args:
+            path: Chemin de la ressource
+            depth: En-tête Depth ('0', '1' ou 'infinity')
+            
+        Returns:
+            requests.Response: Réponse du serveur
+        """
+        url = self._get_full_url(path)
+        headers = {'Depth': depth, 'Content-Type': 'application/xml; charset=utf-8'}
+        return self.session.request('PROPFIND', url, headers=headers, data=PROPFIND_BODY, allow_redirects=True)
+    
+    @staticmethod
+    def _parse_multistatus(content):
+        """
+        Extrait les ressources d'une réponse PROPFIND (207 Multi-Status).
+        
+        Args:
+            content: Corps XML de la réponse
+            
+        Returns:
+            Liste de dictionnaires avec 'href' (chemin sans slash final), 'type', 'size', 'etag', 'modified'
+        """
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError as e:
+            raise Exception(f"Erreur de parsing XML: {str(e)}")
+        
+        ns = {'D': 'DAV:'}
+        items = []
+        
+        for response_elem in root.findall('.//D:response', ns):
+            href_elem = response_elem.find('D:href', ns)
+            if href_elem is None or not href_elem.text:
+                continue
+            
+            href = unquote(href_elem.text)
+            
+            # Extraire juste le chemin depuis l'URL complète si nécessaire
+            if href.startswith('http://') or href.startswith('https://'):
+                href = urlparse(href).path
+            
+            # Déterminer le type
+            resourcetype = response_elem.find('.//D:resourcetype', ns)
+            is_dir = resourcetype is not None and resourcetype.find('D:collection', ns) is not None
+            
+            contentlength = response_elem.find('.//D:getcontentlength', ns)
+            etag = response_elem.find('.//D:getetag', ns)
+            lastmodified = response_elem.find('.//D:getlastmodified', ns)
+            
+            items.append({
+                'href': href.rstrip('/'),
+                'type': 'directory' if is_dir else 'file',
+                'size': int(contentlength.text) if contentlength is not None and contentlength.text else None,
+                'etag': etag.text if etag is not None else None,
+                'modified': lastmodified.text if lastmodified is not None else None
+            })
+        
+        return items
+    
     def list_directory(self, path):
         """
         Liste le contenu d'un répertoire.
@@ -104,65 +226,109 @@ class WebDAVClient:
             path: Chemin du répertoire
             
         Returns:
-            Liste de dictionnaires avec 'name', 'type', 'href'
+            Liste de dictionnaires avec 'name', 'type', 'href', 'size', 'etag', 'modified'
         """
         # Normaliser avec slash final
         dir_path = path.rstrip('/') + '/'
-        url = self._get_full_url(dir_path)
-        
-        headers = {'Depth': '1'}
-        response = self.session.request('PROPFIND', url, headers=headers, allow_redirects=True)
+        response = self._propfind(dir_path, '1')
         
         if response.status_code not in [200, 207]:
             raise Exception(f"Erreur lors du listing de {path}: {response.status_code} {response.text}")
         
+        # Extraire le chemin depuis l'URL finale après redirections
+        parent_path = unquote(urlparse(response.url).path).rstrip('/')
+        
         items = []
+        for item in self._parse_multistatus(response.content):
+            # Ignorer le répertoire parent lui-même
+            if item['href'] == parent_path:
+                continue
+            item['name'] = item['href']
+            items.append(item)
         
-        try:
-            root = ET.fromstring(response.content)
-            ns = {'D': 'DAV:'}
-            
-            # Extraire le chemin depuis l'URL finale après redirections
-            from urllib.parse import urlparse
-            final_parsed = urlparse(response.url)
-            parent_path = unquote(final_parsed.path).rstrip('/')
+        return items
+    
+    def walk(self, path):
+        """
+        Liste récursivement le contenu d'un répertoire.
+        
+        Une seule requête PROPFIND `Depth: infinity` est tentée ; si le serveur
+        la refuse (souvent 403 propfind-finite-depth), l'arborescence est
+        parcourue niveau par niveau avec `Depth: 1`, les répertoires d'un même
+        niveau étant listés en parallèle.
+        
+        Args:
+            path: Chemin du répertoire
             
-            for response_elem in root.findall('.//D:response', ns):
-                href_elem = response_elem.find('D:href', ns)
-                if href_elem is None:
-                    continue
-                
-                href = unquote(href_elem.text).rstrip('/')
-                
-                # Extraire juste le chemin depuis l'URL complète si nécessaire
-                if href.startswith('http://') or href.startswith('https://'):
-                    href = urlparse(href).path
-                
-                # Ignorer le répertoire parent lui-même
-                # Comparer les chemins normalisés (sans slash final)
-                if href == parent_path:
+        Returns:
+            Liste de dictionnaires (voir list_directory, plus 'relative') de tous les descendants
+        """
+        dir_path = path.rstrip('/') + '/'
+        response = self._propfind(dir_path, 'infinity')
+        root_path = unquote(urlparse(response.url).path).rstrip('/')
+        
+        if response.status_code == 207:
+            items = []
+            for item in self._parse_multistatus(response.content):
+                if item['href'] == root_path:
                     continue
-                
-                # Déterminer le type
-                resourcetype = response_elem.find('.//D:resourcetype', ns)
-                is_dir = False
-                if resourcetype is not None:
-                    collection = resourcetype.find('D:collection', ns)
-                    is_dir = collection is not None
-                
-                item = {
-                    'name': href,
-                    'type': 'directory' if is_dir else 'file',
-                    'href': href
-                }
-                
+                item['name'] = item['href']
                 items.append(item)
         
-        except ET.ParseError as e:
-            raise Exception(f"Erreur de parsing XML: {str(e)}")
+        elif response.status_code == 404:
+            raise Exception(f"Erreur lors du listing de {path}: 404 {response.text}")
+        
+        else:
+            # Parcours en largeur : un PROPFIND Depth: 1 par répertoire
+            items = []
+            level = [dir_path]
+            while level:
+                listings = self.run_parallel(self.list_directory, level)
+                level = []
+                for listing in listings:
+                    items.extend(listing)
+                    level.extend(item['href'] + '/' for item in listing if item['type'] == 'directory')
+        
+        # Chemin relatif au répertoire parcouru (ex: 'sous/fichier.txt')
+        for item in items:
+            item['relative'] = item['href'][len(root_path):].lstrip('/')
         
         return items
     
+    def run_parallel(self, function, arguments):
+        """
+        Applique une fonction à chaque argument avec au plus `parallel_requests` requêtes simultanées.
+        
+        Args:
+            function: Fonction à un argument
+            arguments: Liste des arguments
+            
+        Returns:
+            Liste des résultats (dans l'ordre des arguments)
+        
+        Raises:
+            Exception: Si au moins un appel a échoué (après la fin de tous les appels)
+        """
+        if len(arguments) <= 1 or self.parallel_requests == 1:
+            return [function(argument) for argument in arguments]
+        
+        results = [None] * len(arguments)
+        errors = []
+        
+        with ThreadPoolExecutor(max_workers=min(self.parallel_requests, len(arguments)), thread_name_prefix='webdav') as pool:
+            futures = {pool.submit(function, argument): index for index, argument in enumerate(arguments)}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    errors.append(str(e))
+        
+        if errors:
+            more = f" (et {len(errors) - 1} autre(s) erreur(s))" if len(errors) > 1 else ""
+            raise Exception(f"{errors[0]}{more}")
+        
+        return results
+    
     def remove(self, path):
         """
         Supprime une ressource (fichier ou répertoire vide).
@@ -180,6 +346,11 @@ class WebDAVClient:
         """
         Supprime une ressource (fichier ou répertoire).
         
+        En mode récursif, un seul DELETE est d'abord envoyé : un serveur
+        conforme à la RFC 4918 supprime une collection avec tout son contenu.
+        S'il échoue, l'arborescence est listée, les fichiers sont supprimés en
+        parallèle puis les répertoires, des plus profonds à la racine.
+        
         Args:
             path: Chemin de la ressource à supprimer
             recursive: Si True, supprime récursivement le contenu des répertoires
@@ -189,26 +360,29 @@ class WebDAVClient:
             self.remove(path)
             return
         
+        response = self.session.request('DELETE', self._get_full_url(path), allow_redirects=True)
+        if response.status_code in [200, 204, 404]:
+            return
+        
         # Vérifier si c'est un répertoire
         if not self.is_directory(path):
-            # C'est un fichier, le supprimer directement
+            # C'est un fichier : signaler l'échec de la suppression
             self.remove(path)
             return
         
-        # C'est un répertoire, lister et supprimer récursivement
         try:
-            items = self.list_directory(path)
+            items = self.walk(path)
+            
+            # Supprimer les fichiers en parallèle
+            self.run_parallel(self.remove, [item['href'] for item in items if item['type'] == 'file'])
             
-            # Supprimer chaque élément
+            # Puis les répertoires, niveau par niveau en partant du plus profond
+            levels = {}
             for item in items:
-                item_name = item['name']
-                
                 if item['type'] == 'directory':
-                    # Appel récursif pour le sous-répertoire
-                    self.delete(item_name, recursive=True)
-                else:
-                    # Supprimer le fichier
-                    self.remove(item_name)
+                    levels.setdefault(item['href'].count('/'), []).append(item['href'] + '/')
+            for depth in sorted(levels, reverse=True):
+                self.run_parallel(self.remove, levels[depth])
             
             # Une fois vide, supprimer le répertoire avec slash final
             dir_path = path.rstrip('/') + '/'
@@ -332,3 +506,85 @@ class WebDAVClient:
             
         except ET.ParseError as e:
             raise Exception(f"Erreur de parsing XML: {str(e)}")
+
+
+class SharedSession:
+    """Session HTTP partagée par les clients WebDAV d'une exécution, avec nombre d'utilisations en cours."""
+    
+    def __init__(self, session):
+        """
+        Initialise la session partagée.
+        
+        Args:
+            session: requests.Session
+        """
+        self.session = session
+        self._lock = threading.Lock()
+        self.active = 0
+    
+    def in_use(self):
+        """Indique si une action utilise la session."""
+        return self.active > 0
+    
+    def acquire(self):
+        """Marque la session comme utilisée."""
+        with self._lock:
+            self.active += 1
+    
+    def release(self):
+        """Libère la session."""
+        with self._lock:
+            self.active -= 1
+    
+    def close(self):
+        """Ferme les connexions de la session."""
+        self.session.close()
+
+
+@contextmanager
+def webdav_client(url, username=None, password=None):
+    """
+    Fournit un client WebDAV dont les connexions sont réutilisées au sein de l'exécution.
+    
+    Dans une portée d'exécution (voir utils/run_context.py), la session HTTP
+    et son pool de connexions keep-alive sont partagés par les actions vers
+    le même serveur (schéma + hôte) avec les mêmes identifiants, quel que
+    soit le chemin de l'URL. La session est fermée à la fin de la portée ou
+    après `connections.webdav.idle_timeout` secondes d'inactivité. Hors
+    portée, le client est fermé en sortie de bloc.
+    
+    Args:
+        url: URL WebDAV de l'action
+        username: Nom d'utilisateur (optionnel)
+        password: Mot de passe (optionnel)
+    
+    Yields:
+        tuple: (WebDAVClient, True si la session a été réutilisée)
+    """
+    settings = get_webdav_settings()
+    scope = current_scope()
+    
+    if scope is None:
+        client = WebDAVClient(url, username, password)
+        try:
+            yield client, False
+        finally:
+            client.close()
+        return
+    
+    parallel_requests = max(1, int(settings.get('parallel_requests', DEFAULT_PARALLEL_REQUESTS)))
+    scope.evict_idle(WEBDAV_RESOURCE, settings.get('idle_timeout', DEFAULT_IDLE_TIMEOUT), in_use=SharedSession.in_use)
+    
+    parsed = urlparse(url)
+    key = (parsed.scheme, parsed.netloc, username or '', hashlib.sha256((password or '').encode('utf-8')).hexdigest())
+    shared, previous_uses = scope.get_or_create(
+        WEBDAV_RESOURCE, key,
+        lambda: SharedSession(create_session(parallel_requests, settings)),
+        close=SharedSession.close
+    )
+    
+    shared.acquire()
+    try:
+        yield WebDAVClient(url, username, password, parallel_requests, session=shared.session), previous_uses > 0
+    finally:
+        shared.release()
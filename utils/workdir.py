@@ -1,17 +1,16 @@
 """Utilitaire pour la gestion du répertoire de travail des campagnes."""
 import os
 import shutil
-import json
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 from models.campain import Campain
+from utils.config import get_config
 
 
 def get_workdir():
     """Récupère le chemin du répertoire de travail depuis la configuration."""
-    config_path = Path(__file__).parent.parent / 'configuration.json'
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-    return config.get('workdir', './workdir')
+    return get_config().get('workdir', './workdir')
 
 
 def ensure_workdir_exists():
@@ -152,3 +151,63 @@ def get_campain_workdir(campain_id):
     workdir = get_workdir()
     campain_dir = Path(workdir) / str(campain_id)
     return str(campain_dir.absolute())
+
+
+def resolve_local_path(path, base_dir):
+    """
+    Résout un chemin local fourni par une action.
+    
+    Un chemin relatif est interprété dans `base_dir` (ex: répertoire `work`
+    ou `files` de la campagne). Un chemin absolu (ex: "{{test.work_dir}}/export.csv")
+    est accepté s'il désigne un fichier de `base_dir` : une action ne peut ni
+    lire ni écrire d'autres fichiers du serveur.
+    
+    Args:
+        path: Chemin saisi dans l'action
+        base_dir: Répertoire autorisé (None hors d'un test)
+    
+    Returns:
+        Path: Chemin absolu
+    
+    Raises:
+        ValueError: Chemin utilisé hors d'un test, ou sortant du répertoire autorisé
+    """
+    if not base_dir:
+        raise ValueError(f"Chemin local '{path}' utilisé hors de l'exécution d'un test")
+    
+    base = Path(base_dir).resolve()
+    # Un chemin absolu remplace base (opérateur /) ; resolve() suit les liens et '..'
+    resolved = (base / Path(path)).resolve()
+    if resolved != base and base not in resolved.parents:
+        raise ValueError(f"Le chemin '{path}' sort du répertoire {base}")
+    return resolved
+
+
+@contextmanager
+def open_download(path):
+    """
+    Ouvre en écriture binaire le fichier de destination d'un téléchargement.
+
+    Les données sont écrites dans un fichier temporaire du même répertoire,
+    renommé en `path` à la sortie du bloc. En cas d'erreur (fichier distant
+    absent, coupure réseau), le fichier temporaire est supprimé : `path`
+    n'est ni créé ni tronqué.
+
+    Args:
+        path: Chemin de destination (Path)
+
+    Yields:
+        file: Fichier temporaire ouvert en écriture binaire
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            yield temp_file
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
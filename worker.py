@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Processus worker TestGyver.
+
+Exécute les campagnes (et les tests seuls si `execution.worker.queue_tests`
+est activé) placées dans la file d'attente MongoDB, en dehors du serveur web.
+Les événements de progression sont publiés dans le bus d'événements
+(events.backend : MongoDB ou Redis) puis parviennent aux clients du serveur web.
+
+Plusieurs workers peuvent être lancés, sur un ou plusieurs serveurs :
+
+    python3 worker.py [--max-running N]
+
+Sur le serveur web, désactiver le worker intégré :
+"execution": {"worker": {"enabled": false}}
+"""
+import argparse
+import signal
+import sys
+import threading
+from utils.db import load_config, close_client
+from utils.config import install_reload_signal
+from utils.indexes import ensure_indexes
+from utils.event_bus import create_event_emitter
+from utils.campain_executor import CampainExecutor
+from utils.test_executor import TestExecutor
+from utils.job_worker import JobWorker
+from utils.workdir import ensure_workdir_exists
+
+
+def main():
+    """Démarre le worker et attend un signal d'arrêt (SIGTERM, SIGINT)."""
+    parser = argparse.ArgumentParser(description="Worker d'exécution des campagnes TestGyver")
+    parser.add_argument('--max-running', type=int, default=None,
+                        help="Nombre maximum de jobs exécutés simultanément (défaut: execution.worker.max_running_campains)")
+    parser.add_argument('--stop-timeout', type=float, default=30,
+                        help="Délai (secondes) d'attente des tests en cours à l'arrêt")
+    args = parser.parse_args()
+
+    config = load_config()
+    install_reload_signal()
+
+    ensure_workdir_exists()
+
+    if config['mongo'].get('ensure_indexes', True):
+        try:
+            ensure_indexes()
+        except Exception as e:
+            print(f"⚠ Provisionnement des index MongoDB impossible: {e}")
+
+    # Les événements sont publiés dans le bus configuré (MongoDB ou Redis)
+    # et parviennent aux clients de chaque serveur web
+    try:
+        events = create_event_emitter()
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+
+    worker = JobWorker(
+        CampainExecutor(None, events),
+        TestExecutor(None, events),
+        max_running=args.max_running
+    )
+
+    stop_requested = threading.Event()
+
+    def handle_stop(signum, frame):
+        """Demande l'arrêt du worker."""
+        stop_requested.set()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    worker.start()
+
+    while not stop_requested.wait(1):
+        pass
+
+    print("ℹ Arrêt du worker, interruption des campagnes en cours...")
+    if worker.stop(timeout=args.stop_timeout):
+        print("✓ Worker arrêté, jobs en cours remis en file")
+        close_client()
+    else:
+        # Les threads du pool sont attendus à la sortie de l'interpréteur
+        print("⚠ Tests encore en cours : arrêt du processus à la fin de ceux-ci")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())